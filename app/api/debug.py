@@ -0,0 +1,68 @@
+import hmac
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, Response
+
+from app.core.config import get_settings
+from app.core.errors import ForbiddenException, NotFoundException
+from app.core.profiling import StoredProfile, profile_store
+
+settings = get_settings()
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Profiles expose code paths and SQL; only PROFILING_TOKEN holders may read them."""
+    if not settings.PROFILING_TOKEN or x_profile_token is None or not hmac.compare_digest(
+        x_profile_token.encode(), settings.PROFILING_TOKEN.encode()
+    ):
+        raise ForbiddenException()
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_token)], include_in_schema=False)
+
+
+def _get_profile(profile_id: str) -> StoredProfile:
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise NotFoundException(f"Profile {profile_id} not found (only the last {settings.PROFILING_MAX_PROFILES} are kept)")
+    return profile
+
+
+@router.get("/profiles")
+async def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first."""
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Literal["json", "pstats", "collapsed", "text"] = "json",
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative",
+):
+    """
+    One profile. `json` has the summary, the SQL statements with their
+    durations and the top 30 functions by `sort`; `pstats` is a file for
+    `pstats.Stats`/snakeviz; `collapsed` is sampled stacks for
+    flamegraph.pl or speedscope; `text` is the pstats report.
+    """
+    profile = _get_profile(profile_id)
+    if format == "pstats":
+        return Response(
+            content=profile.pstats_bytes(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile.id}.pstats"'},
+        )
+    if format == "collapsed":
+        return Response(content=profile.collapsed(), media_type="text/plain")
+    if format == "text":
+        return Response(content=profile.text(sort), media_type="text/plain")
+    return {
+        **profile.summary(),
+        "sql": [
+            {"statement": statement, "ms": round(elapsed * 1000, 3)}
+            for statement, elapsed in profile.statements
+        ],
+        "sql_dropped": profile.statements_dropped,
+        "top": profile.top(sort),
+    }
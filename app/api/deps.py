@@ -0,0 +1,64 @@
+from typing import List, Optional
+
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import Principal
+from app.core.config import get_settings
+from app.core.errors import ForbiddenException
+from app.core.loader import DataLoader
+from app.db.session import get_db
+from app.models.user import User
+from app.services.auth import auth_service
+from app.services.user import async_user_service
+
+settings = get_settings()
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/token")
+
+
+def get_user_loader(db: AsyncSession = Depends(get_db)) -> DataLoader[int, User]:
+    """
+    Per-request loader of users by id. FastAPI caches dependencies per
+    request, so every handler and dependency of one request shares it and
+    the users they ask for concurrently are fetched in one query.
+    """
+
+    async def batch_load(user_ids: List[int]) -> List[Optional[User]]:
+        return await async_user_service.get_users_by_ids(db, user_ids)
+
+    return DataLoader(batch_load)
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    loader: DataLoader[int, User] = Depends(get_user_loader),
+) -> Principal:
+    """
+    Resolve the bearer token of the request, loading its user through the
+    request's user loader.
+
+    Raises:
+        UnauthorizedException: If the token is missing, invalid or expired
+    """
+    return await auth_service.resolve(db, token, loader=loader)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
+    """The authenticated, active user of the request."""
+    if not principal.is_active:
+        raise ForbiddenException("Inactive user")
+    return principal
+
+
+async def get_current_superuser(
+    principal: Principal = Depends(get_current_user),
+) -> Principal:
+    """The authenticated user of the request, who must be a superuser."""
+    if not principal.is_superuser:
+        raise ForbiddenException()
+    return principal
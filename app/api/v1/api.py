@@ -1,6 +1,7 @@
 from fastapi import APIRouter
-from app.api.v1.routes import user
+from app.api.v1.routes import auth, user
 
 api_router = APIRouter()
 
+api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(user.router, prefix="/users", tags=["users"]) 
\ No newline at end of file
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user, get_user_loader
+from app.api.v1.schemas.token import Token
+from app.api.v1.schemas.user import User
+from app.core.auth import Principal
+from app.core.loader import DataLoader
+from app.db.session import get_db
+from app.services.auth import auth_service
+from app.services.user import async_user_service
+
+router = APIRouter()
+
+
+@router.post("/token", response_model=Token)
+async def login_for_access_token(
+    form: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    OAuth2 password flow: exchange an email (as `username`) and password
+    for a bearer access token.
+    """
+    access_token = await auth_service.login(db, email=form.username, password=form.password)
+    return Token(access_token=access_token)
+
+
+@router.get("/me", response_model=User)
+async def read_current_user(
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    loader: DataLoader = Depends(get_user_loader),
+):
+    """
+    Get the authenticated user, who was already loaded (through the same
+    loader) to resolve the token unless the token was cached.
+    """
+    return await async_user_service.get_user(db, user_id=principal.user_id, loader=loader)
@@ -1,92 +1,356 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.schemas.user import User, UserCreate, UserUpdate
-from app.services.user import user_service
+from app.api.deps import get_user_loader
+from app.api.v1.schemas.user import (
+    User,
+    UserBatchLookup,
+    UserBatchResult,
+    UserBulkCreate,
+    UserBulkDelete,
+    UserBulkResult,
+    UserBulkUpdate,
+    UserCreate,
+    UserUpdate,
+)
+from app.core.conditional import (
+    collection_etag,
+    entity_etag,
+    is_conditional,
+    is_not_modified,
+    not_modified_response,
+    validator_headers,
+)
+from app.core.config import get_settings
+from app.core.errors import BadRequestException
+from app.core.loader import DataLoader
+from app.core.serialization import fast_response, schema_fields
+from app.services.export import EXPORT_MEDIA_TYPES, export_users
+from app.services.user import async_user_service
 from app.db.session import get_db
 
+settings = get_settings()
+
 router = APIRouter()
 
 
+def render(
+    data: Any,
+    *,
+    many: bool = False,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Dict[str, str]] = None,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> Any:
+    """
+    Return `data` for FastAPI to validate against the route's response_model,
+    or, with FAST_JSON_RESPONSES on, pre-serialize it with orjson and skip
+    that second validation pass. A field selection is always pre-serialized,
+    since the partial rows would not validate as a full User.
+    """
+    if settings.FAST_JSON_RESPONSES or fields:
+        return fast_response(
+            User, data, many=many, status_code=status_code, headers=headers, fields=fields
+        )
+    return data
+
+
+def sparse_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated User fields to return, e.g. `id,email`; "
+        "only those columns are read from the database",
+    ),
+) -> Optional[Tuple[str, ...]]:
+    """Parse and validate `?fields=` against the User response schema."""
+    if fields is None:
+        return None
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in schema_fields(User)]
+    if unknown or not selected:
+        raise BadRequestException(
+            f"fields must be a comma-separated subset of {', '.join(schema_fields(User))}"
+        )
+    return selected
+
+
+def list_headers(
+    users: List[Any],
+    total: Optional[Tuple[int, str]] = None,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> Dict[str, str]:
+    """ETag of a list response, plus X-Total-Count/-Mode when counted."""
+    # No Last-Modified: no row's updated_at can tell that a row left the list
+    headers = validator_headers(
+        collection_etag(
+            ((user.id, user.updated_at) for user in users), *(total or ()), *(fields or ())
+        ),
+        None,
+    )
+    if total is not None:
+        headers["X-Total-Count"] = str(total[0])
+        headers["X-Total-Count-Mode"] = total[1]
+    return headers
+
+
 @router.get("/users/", response_model=List[User])
-def list_users(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+async def list_users(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    order_by: Literal["id", "created_at"] = "id",
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(100, ge=1, le=1000),
+    count: Optional[Literal["exact", "estimated", "cached"]] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(sparse_fields),
 ):
     """
     Retrieve users.
+
+    Pages are keyset-paginated on (order_by, id). When more rows exist the
+    response carries a `Link: <...>; rel="next"` header and `X-Next-Cursor`;
+    pass the cursor back to fetch the next page. `skip` keeps the legacy
+    offset behaviour and gets slower the deeper it goes.
+
+    The page carries a collection ETag over its rows' ids and `updated_at`;
+    a matching If-None-Match gets a 304 without serializing the rows.
+
+    With `count`, the total number of users is returned in `X-Total-Count`
+    and the mode actually used in `X-Total-Count-Mode`: `exact` counts
+    every row, `estimated` reads Postgres statistics (falling back to
+    `exact` elsewhere) and `cached` serves a periodically recounted total
+    adjusted on create and delete.
+
+    With `fields` (e.g. `fields=id,email`) each user carries only those
+    fields, and only those columns are selected.
     """
-    users = user_service.get_users(db, skip=skip, limit=limit)
-    return users
+    total = await async_user_service.count_users(db, mode=count) if count else None
+    if skip:
+        users = await async_user_service.get_users(
+            db, skip=skip, limit=limit, fields=fields
+        )
+        headers = list_headers(users, total, fields)
+        if is_not_modified(request, headers["ETag"], None):
+            return not_modified_response(headers)
+        response.headers.update(headers)
+        return render(users, many=True, headers=headers, fields=fields)
+
+    page = await async_user_service.get_users_page(
+        db, cursor=cursor, limit=limit, order_by=order_by, fields=fields
+    )
+    headers = list_headers(page.items, total, fields)
+    if is_not_modified(request, headers["ETag"], None):
+        return not_modified_response(headers)
+    if page.next_cursor:
+        next_url = request.url.remove_query_params("skip").include_query_params(
+            cursor=page.next_cursor, limit=limit, order_by=order_by
+        )
+        headers["Link"] = f'<{next_url}>; rel="next"'
+        headers["X-Next-Cursor"] = page.next_cursor
+    response.headers.update(headers)
+    return render(page.items, many=True, headers=headers, fields=fields)
 
 
 @router.post("/users/", response_model=User, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_in: UserCreate,
 ):
     """
     Create new user.
     """
-    user = user_service.get_user_by_email(db, email=user_in.email)
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="The user with this email already exists in the system.",
-        )
-    user = user_service.create_user(db, user_in=user_in)
-    return user
+    user = await async_user_service.create_user(db, user_in=user_in)
+    return render(user, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/users/bulk", response_model=UserBulkResult)
+async def bulk_create_users(
+    *,
+    db: AsyncSession = Depends(get_db),
+    bulk_in: UserBulkCreate,
+):
+    """
+    Create many users. Rows are inserted in chunked transactions; items
+    that fail (e.g. duplicate email) are reported in `errors` by index.
+    """
+    result = await async_user_service.bulk_create_users(db, users_in=bulk_in.items)
+    return result._asdict()
+
+
+@router.put("/users/bulk", response_model=UserBulkResult)
+async def bulk_update_users(
+    *,
+    db: AsyncSession = Depends(get_db),
+    bulk_in: UserBulkUpdate,
+):
+    """
+    Update many users, each item addressed by id.
+    """
+    result = await async_user_service.bulk_update_users(db, users_in=bulk_in.items)
+    return result._asdict()
+
+
+@router.post("/users/bulk/delete", response_model=UserBulkResult)
+async def bulk_delete_users(
+    *,
+    db: AsyncSession = Depends(get_db),
+    bulk_in: UserBulkDelete,
+):
+    """
+    Delete many users by id. Ids that do not exist are reported in `errors`.
+    """
+    result = await async_user_service.bulk_delete_users(db, user_ids=bulk_in.ids)
+    return result._asdict()
+
+
+@router.get(
+    "/users/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}
+    },
+)
+async def export_all_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+):
+    """
+    Stream every user as NDJSON or CSV straight from a server-side cursor.
+    """
+    headers = {"Content-Disposition": f'attachment; filename="users.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_users(format, gzip=gzip, batch_size=settings.EXPORT_BATCH_SIZE),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers,
+    )
+
+
+@router.get("/users/search", response_model=List[User])
+async def search_users(
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    include_inactive: bool = False,
+):
+    """
+    Find users by part of their email or full name, case-insensitively.
+
+    Results rank email prefix matches first, then name prefix matches, then
+    other matches. Queries of one or two characters match prefixes only.
+    """
+    users = await async_user_service.search_users(
+        db, q=q, limit=limit, active_only=not include_inactive
+    )
+    return render(users, many=True)
+
+
+def parse_ids(
+    ids: str = Query(..., description="Comma-separated user ids, e.g. `3,1,7`"),
+) -> List[int]:
+    try:
+        return [int(id) for id in ids.split(",") if id.strip()]
+    except ValueError:
+        raise BadRequestException("ids must be a comma-separated list of integers")
+
+
+async def batch_result(loader: DataLoader, user_ids: List[int]) -> Dict[str, Any]:
+    users = await loader.load_many(user_ids)
+    missing = [id for id, user in zip(user_ids, users) if user is None]
+    return {"items": users, "missing": list(dict.fromkeys(missing))}
+
+
+@router.get("/users/batch", response_model=UserBatchResult)
+async def get_users_batch(
+    user_ids: List[int] = Depends(parse_ids),
+    loader: DataLoader = Depends(get_user_loader),
+):
+    """
+    Get many users by id in one request: `?ids=3,1,7`.
+
+    `items` follows the order of `ids`, with null for ids that match no
+    user; those ids are also listed in `missing`. Cached users are read
+    from the cache and the rest with chunked `IN` queries. For more ids
+    than fit in a URL, POST to the same path.
+    """
+    return await batch_result(loader, user_ids)
+
+
+@router.post("/users/batch", response_model=UserBatchResult)
+async def post_users_batch(
+    *,
+    lookup: UserBatchLookup,
+    loader: DataLoader = Depends(get_user_loader),
+):
+    """
+    Get many users by id, with the ids in the request body. Same response
+    as `GET /users/batch`.
+    """
+    return await batch_result(loader, lookup.ids)
 
 
 @router.get("/users/{user_id}", response_model=User)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    fields: Optional[Tuple[str, ...]] = Depends(sparse_fields),
+    loader: DataLoader = Depends(get_user_loader),
 ):
     """
     Get a specific user by id.
+
+    Responses carry a strong ETag and Last-Modified derived from the user's
+    `updated_at`. Conditional requests (If-None-Match / If-Modified-Since)
+    are checked against that column alone, from the cache or a one-column
+    query, and answered with 304 when the client's copy is current.
+
+    With `fields`, only those fields are returned and, unless the user is
+    cached, only those columns are selected.
     """
-    user = user_service.get_user(db, user_id=user_id)
-    return user
+    if is_conditional(request):
+        updated_at = await async_user_service.get_user_updated_at(db, user_id=user_id)
+        headers = validator_headers(
+            entity_etag(user_id, updated_at, *(fields or ())), updated_at
+        )
+        if is_not_modified(request, headers["ETag"], updated_at):
+            return not_modified_response(headers)
+    user = await async_user_service.get_user(db, user_id=user_id, fields=fields, loader=loader)
+    headers = validator_headers(
+        entity_etag(user.id, user.updated_at, *(fields or ())), user.updated_at
+    )
+    response.headers.update(headers)
+    return render(user, headers=headers, fields=fields)
 
 
 @router.put("/users/{user_id}", response_model=User)
-def update_user(
+async def update_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int,
     user_in: UserUpdate,
 ):
     """
     Update a user.
     """
-    user = user_service.get_user(db, user_id=user_id)
-    if not user:
-        raise HTTPException(
-            status_code=404,
-            detail="The user with this id does not exist in the system",
-        )
-    user = user_service.update_user(db, user_id=user_id, user_in=user_in)
-    return user
+    user = await async_user_service.update_user(db, user_id=user_id, user_in=user_in)
+    return render(user)
 
 
 @router.delete("/users/{user_id}", response_model=User)
-def delete_user(
+async def delete_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: int,
 ):
     """
     Delete a user.
     """
-    user = user_service.get_user(db, user_id=user_id)
-    if not user:
-        raise HTTPException(
-            status_code=404,
-            detail="The user with this id does not exist in the system",
-        )
-    user = user_service.delete_user(db, user_id=user_id)
-    return user 
\ No newline at end of file
+    user = await async_user_service.delete_user(db, user_id=user_id)
+    return render(user) 
\ No newline at end of file
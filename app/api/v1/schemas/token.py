@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class Token(BaseModel):
+    """Access token returned by the token endpoint"""
+    access_token: str
+    token_type: str = "bearer"
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
 
@@ -38,4 +38,48 @@ class User(UserInDBBase):
 
 class UserInDB(UserInDBBase):
     """Additional properties stored in DB"""
-    hashed_password: str 
\ No newline at end of file
+    hashed_password: str
+
+
+class UserBulkCreate(BaseModel):
+    """Users to create in one request"""
+    items: List[UserCreate]
+
+
+class UserBulkUpdateItem(UserUpdate):
+    """A single update addressed by id"""
+    id: int
+
+
+class UserBulkUpdate(BaseModel):
+    """Users to update in one request"""
+    items: List[UserBulkUpdateItem]
+
+
+class UserBulkDelete(BaseModel):
+    """Ids of users to delete in one request"""
+    ids: List[int]
+
+
+class UserBatchLookup(BaseModel):
+    """Ids of users to fetch in one request"""
+    ids: List[int]
+
+
+class UserBatchResult(BaseModel):
+    """Users in the order their ids were given, null where none exists"""
+    items: List[Optional[User]]
+    missing: List[int]
+
+
+class BulkItemError(BaseModel):
+    """Failure of a single item in a bulk request"""
+    index: int
+    id: Optional[int] = None
+    detail: str
+
+
+class UserBulkResult(BaseModel):
+    """Outcome of a bulk request: the rows written and the items that failed"""
+    items: List[User]
+    errors: List[BulkItemError]
@@ -0,0 +1,392 @@
+import asyncio
+import glob
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, List, Mapping, Optional
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.core.metrics import AUDIT_FLUSH_DURATION
+from app.db.session import get_mongodb
+
+logger = get_logger(__name__)
+
+settings = get_settings()
+
+DUPLICATE_KEY = 11000
+# Stored in place of values that must not reach the audit trail
+REDACTED = "<redacted>"
+
+
+@dataclass
+class AuditStats:
+    """Counters of the audit pipeline"""
+    recorded: int = 0
+    written: int = 0
+    spilled: int = 0
+    replayed: int = 0
+    flush_failures: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _append_events(path: str, events: List[Dict[str, Any]]) -> None:
+    with open(path, "a") as f:
+        f.writelines(json_util.dumps(event) + "\n" for event in events)
+
+
+def _read_events(f: IO[str], limit: int) -> List[Dict[str, Any]]:
+    events = []
+    for line in f:
+        if line.strip():
+            events.append(json_util.loads(line))
+            if len(events) >= limit:
+                break
+    return events
+
+
+def _append_rest(f: IO[str], path: str) -> int:
+    count = 0
+    with open(path, "a") as out:
+        for line in f:
+            if line.strip():
+                out.write(line)
+                count += 1
+    return count
+
+
+def _claim(path: str, claimed: str) -> None:
+    try:
+        os.replace(path, claimed)
+    except OSError:
+        pass
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def diff(
+    before: Optional[Mapping[str, Any]],
+    after: Optional[Mapping[str, Any]],
+    redact: tuple = (),
+) -> tuple:
+    """
+    Reduce two row snapshots to the fields that differ. A create (no
+    `before`) or delete (no `after`) keeps the whole other snapshot.
+    Fields in `redact` keep their key but not their value.
+    """
+    if before is not None and after is not None:
+        changed = [key for key in after if before.get(key) != after.get(key)]
+        before = {key: before.get(key) for key in changed}
+        after = {key: after.get(key) for key in changed}
+
+    def scrub(values: Optional[Mapping[str, Any]]) -> Optional[Dict[str, Any]]:
+        if values is None:
+            return None
+        return {key: REDACTED if key in redact else value for key, value in values.items()}
+
+    return scrub(before), scrub(after)
+
+
+class AuditLog:
+    """
+    Buffered, asynchronous writer of audit events to a MongoDB collection.
+
+    `record` only appends to an in-process buffer; a background task
+    writes the buffer with insert_many once `batch_size` events are waiting
+    or every `flush_interval` seconds. When Mongo is unreachable, a failed
+    batch, and anything recorded while the buffer is at `max_buffer`, is
+    appended to the JSON-lines file at `spill_path` and replayed after the
+    next successful flush. Events carry their own _id, so a replay never
+    duplicates an event that did get written. File I/O runs on worker
+    threads, never on the event loop, and spilled files are replayed a
+    batch at a time.
+    """
+
+    def __init__(
+        self,
+        collection_factory: Callable[[], Any],
+        *,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10000,
+        spill_path: str = "audit-spill.jsonl",
+    ):
+        self.collection_factory = collection_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self.stats = AuditStats()
+        self.spill_backlog = self._count_spilled()
+        self._buffer: List[Dict[str, Any]] = []
+        # Recorded while the buffer was full, waiting to be spilled
+        self._overflow: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._spiller: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # Held while the spill file is appended to or claimed for replay
+        self._spill_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def backlog(self) -> int:
+        return len(self._buffer)
+
+    def record(
+        self,
+        action: str,
+        entity: str,
+        entity_id: Any,
+        before: Optional[Mapping[str, Any]] = None,
+        after: Optional[Mapping[str, Any]] = None,
+        actor: Optional[Any] = None,
+    ) -> None:
+        """Queue one event. Never blocks on Mongo and never raises for it."""
+        event = {
+            "_id": uuid.uuid4().hex,
+            "at": datetime.utcnow(),
+            "action": action,
+            "entity": entity,
+            "entity_id": entity_id,
+            "before": dict(before) if before is not None else None,
+            "after": dict(after) if after is not None else None,
+            "actor": actor,
+        }
+        self.stats.recorded += 1
+        if len(self._buffer) >= self.max_buffer:
+            self._overflow.append(event)
+            self._ensure_spiller()
+            return
+        self._buffer.append(event)
+        self._ensure_flusher()
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        self._flusher = loop.create_task(self._run())
+
+    def _ensure_spiller(self) -> None:
+        if self._spiller is not None and not self._spiller.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._spiller = loop.create_task(self._spill_overflow())
+
+    async def _spill_overflow(self) -> None:
+        while self._overflow:
+            events, self._overflow = self._overflow, []
+            await self._spill(events)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Audit flush failed unexpectedly: %s", exc)
+
+    async def flush(self) -> None:
+        """Write everything buffered, then replay any spilled events."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                try:
+                    written = await self._write(batch)
+                except asyncio.CancelledError:
+                    # Shutting down mid-write; keep the batch for close()
+                    self._buffer[:0] = batch
+                    raise
+                if not written:
+                    events = batch + self._buffer
+                    self._buffer.clear()
+                    await self._spill(events)
+                    return
+                self.stats.written += len(batch)
+            if self.spill_backlog:
+                await self._replay()
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        started = time.perf_counter()
+        try:
+            await self.collection_factory().insert_many(batch, ordered=False)
+        except BulkWriteError as exc:
+            # Events already written by an earlier attempt are fine
+            errors = exc.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                return self._failed(exc)
+        except Exception as exc:
+            return self._failed(exc)
+        finally:
+            AUDIT_FLUSH_DURATION.observe(time.perf_counter() - started)
+        return True
+
+    def _failed(self, exc: Exception) -> bool:
+        self.stats.flush_failures += 1
+        logger.warning("Audit write to MongoDB failed, spilling to %s: %s", self.spill_path, exc)
+        return False
+
+    async def _spill(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        async with self._spill_guard():
+            await asyncio.to_thread(_append_events, self.spill_path, events)
+        self.stats.spilled += len(events)
+        self.spill_backlog += len(events)
+
+    def _spill_guard(self) -> asyncio.Lock:
+        if self._spill_lock is None:
+            self._spill_lock = asyncio.Lock()
+        return self._spill_lock
+
+    def _count_spilled(self) -> int:
+        count = 0
+        for path in [self.spill_path, *self._orphaned_replays()]:
+            try:
+                with open(path) as f:
+                    count += sum(1 for _ in f)
+            except OSError:
+                pass
+        return count
+
+    def _orphaned_replays(self) -> List[str]:
+        # Replay files of processes that exited before finishing them
+        orphans = []
+        for path in glob.glob(f"{glob.escape(self.spill_path)}.*.replaying"):
+            pid = path[len(self.spill_path) + 1:-len(".replaying")]
+            if pid.isdigit() and not _process_alive(int(pid)):
+                orphans.append(path)
+        return orphans
+
+    async def _replay(self) -> None:
+        """
+        Write spilled events back. The spill file is first renamed to one
+        owned by this process, so workers sharing `spill_path` never replay
+        the same file and events spilled meanwhile start a new one.
+        """
+        replaying = f"{self.spill_path}.{os.getpid()}.replaying"
+        # Left behind if a replay was cancelled, e.g. at shutdown
+        if not await self._replay_file(replaying):
+            return
+        async with self._spill_guard():
+            await asyncio.to_thread(_claim, self.spill_path, replaying)
+            self.spill_backlog = 0
+        orphans = await asyncio.to_thread(self._orphaned_replays)
+        for path in [replaying, *orphans]:
+            if not await self._replay_file(path):
+                return
+
+    async def _replay_file(self, path: str) -> bool:
+        """
+        Write one spilled file back, `batch_size` events at a time. If a
+        write fails, that batch and the unread rest go back to the spill
+        file. Returns whether the file was written in full.
+        """
+        try:
+            f = await asyncio.to_thread(open, path)
+        except OSError:
+            return True
+        replayed = 0
+        complete = True
+        try:
+            while True:
+                batch = await asyncio.to_thread(_read_events, f, self.batch_size)
+                if not batch:
+                    break
+                if not await self._write(batch):
+                    complete = False
+                    await self._spill(batch)
+                    async with self._spill_guard():
+                        rest = await asyncio.to_thread(_append_rest, f, self.spill_path)
+                    self.stats.spilled += rest
+                    self.spill_backlog += rest
+                    break
+                replayed += len(batch)
+                self.stats.replayed += len(batch)
+        finally:
+            f.close()
+        await asyncio.to_thread(_remove, path)
+        if replayed:
+            logger.info("Replayed %s spilled audit events", replayed)
+        return complete
+
+    def status(self) -> Dict[str, int]:
+        """Counters plus the current backlog, for register_stats."""
+        return {
+            **self.stats.as_dict(),
+            "buffered": self.backlog,
+            "spill_backlog": self.spill_backlog,
+        }
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Stop the flusher, write what is buffered, spill what cannot be."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except (asyncio.TimeoutError, Exception) as exc:
+            logger.warning("Audit flush on shutdown failed: %s", exc)
+        if self._spiller is not None:
+            await asyncio.gather(self._spiller, return_exceptions=True)
+            self._spiller = None
+        events = self._buffer + self._overflow
+        self._buffer.clear()
+        self._overflow.clear()
+        await self._spill(events)
+
+
+# Create a singleton instance
+audit_log: Optional[AuditLog] = (
+    AuditLog(
+        lambda: get_mongodb()[settings.AUDIT_COLLECTION],
+        batch_size=settings.AUDIT_BATCH_SIZE,
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+        max_buffer=settings.AUDIT_BUFFER_SIZE,
+        spill_path=settings.AUDIT_SPILL_PATH,
+    )
+    if settings.AUDIT_ENABLED
+    else None
+)
@@ -0,0 +1,92 @@
+import hashlib
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from app.core.cache import LocalTTLCache
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The user a verified access token belongs to"""
+    user_id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+    expires_at: float
+
+
+def token_key(token: str) -> str:
+    """Cache key for a token; the raw token is never kept in memory."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Bounded TTL cache of verified tokens, keyed by token hash.
+
+    Entries are also indexed by user id so that every token of a user can
+    be dropped when the user changes (invalidate_user). An entry is never
+    served past its token's own expiry.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.local = LocalTTLCache(maxsize=maxsize, ttl=ttl)
+        self._keys_by_user: Dict[int, Set[str]] = defaultdict(set)
+        self._indexed = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        key = token_key(token)
+        principal = self.local.get(key)
+        if principal is None:
+            return None
+        if principal.expires_at <= time.time():
+            self.local.delete(key)
+            return None
+        return principal
+
+    def set(self, token: str, principal: Principal) -> None:
+        key = token_key(token)
+        self.local.set(key, principal)
+        keys = self._keys_by_user[principal.user_id]
+        if key not in keys:
+            keys.add(key)
+            self._indexed += 1
+        # Amortized: after a prune the index holds at most maxsize keys
+        if self._indexed > 2 * self.local.maxsize:
+            self._prune_index()
+
+    def invalidate_user(self, user_id: int) -> None:
+        keys = self._keys_by_user.pop(user_id, set())
+        self._indexed -= len(keys)
+        for key in keys:
+            self.local.delete(key)
+
+    def on_user_cache_invalidated(self, keys: List[str]) -> None:
+        """TwoTierCache invalidation listener for the user cache ("id:<id>" keys)."""
+        for key in keys:
+            if key.startswith("id:"):
+                self.invalidate_user(int(key[3:]))
+
+    def _prune_index(self) -> None:
+        # Drop index entries whose tokens were evicted or expired
+        self._indexed = 0
+        for user_id in list(self._keys_by_user):
+            live = {key for key in self._keys_by_user[user_id] if key in self.local}
+            if live:
+                self._keys_by_user[user_id] = live
+                self._indexed += len(live)
+            else:
+                del self._keys_by_user[user_id]
+
+
+# Create a singleton instance
+principal_cache: Optional[PrincipalCache] = (
+    PrincipalCache(maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL)
+    if settings.AUTH_CACHE_ENABLED
+    else None
+)
@@ -0,0 +1,325 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for both cache tiers"""
+    local_hits: int = 0
+    local_misses: int = 0
+    redis_hits: int = 0
+    redis_misses: int = 0
+    invalidations: int = 0
+    redis_errors: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class LocalTTLCache:
+    """
+    Per-process LRU cache whose entries also expire after `ttl` seconds.
+    Not thread-safe; it is only touched from the event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: str) -> bool:
+        """Whether `key` holds a live entry, without touching its LRU position."""
+        entry = self._data.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache:
+    """
+    Read-through cache with a local LRU tier in front of a shared Redis tier.
+
+    Values must be JSON-serializable. Invalidations delete the key from both
+    tiers and are published on a Redis channel so every other worker drops
+    its local copy too. Redis failures are logged and treated as misses so
+    the cache never takes the request down with it.
+
+    Callbacks registered with `add_invalidation_listener` are called with
+    the keys of every invalidation, local or received from another worker,
+    so derived caches can drop their own entries.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        local: LocalTTLCache,
+        redis_factory: Optional[Callable[[], Any]] = None,
+        redis_ttl: int = 300,
+        channel: str = "cache:invalidate",
+    ):
+        self.namespace = namespace
+        self.local = local
+        self.redis_factory = redis_factory
+        self.redis_ttl = redis_ttl
+        self.channel = f"{channel}:{namespace}"
+        self.stats = CacheStats()
+        self._instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._invalidation_listeners: List[Callable[[List[str]], None]] = []
+
+    def add_invalidation_listener(self, callback: Callable[[List[str]], None]) -> None:
+        self._invalidation_listeners.append(callback)
+
+    def _notify(self, keys: List[str]) -> None:
+        for callback in self._invalidation_listeners:
+            callback(keys)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    @property
+    def redis(self) -> Optional[Any]:
+        if self.redis_factory is None:
+            return None
+        self._ensure_listener()
+        return self.redis_factory()
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats.local_hits += 1
+            return value
+        self.stats.local_misses += 1
+
+        redis = self.redis
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._key(key))
+        except Exception as exc:
+            self._redis_failed("get", exc)
+            return None
+        if raw is None:
+            self.stats.redis_misses += 1
+            return None
+        self.stats.redis_hits += 1
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Values for `keys` in order, None for misses; one MGET for local misses."""
+        values = [self.local.get(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        self.stats.local_hits += len(keys) - len(missing)
+        self.stats.local_misses += len(missing)
+
+        redis = self.redis
+        if redis is None or not missing:
+            return values
+        try:
+            raws = await redis.mget([self._key(keys[index]) for index in missing])
+        except Exception as exc:
+            self._redis_failed("mget", exc)
+            return values
+        for index, raw in zip(missing, raws):
+            if raw is None:
+                self.stats.redis_misses += 1
+                continue
+            self.stats.redis_hits += 1
+            values[index] = json.loads(raw)
+            self.local.set(keys[index], values[index])
+        return values
+
+    async def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        redis = self.redis
+        if redis is None:
+            return
+        try:
+            await redis.set(self._key(key), json.dumps(value), ex=self.redis_ttl)
+        except Exception as exc:
+            self._redis_failed("set", exc)
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        """Store several values, in one Redis round trip."""
+        for key, value in items.items():
+            self.local.set(key, value)
+        redis = self.redis
+        if redis is None or not items:
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(self._key(key), json.dumps(value), ex=self.redis_ttl)
+                await pipe.execute()
+        except Exception as exc:
+            self._redis_failed("set_many", exc)
+
+    async def invalidate(self, keys: Iterable[str]) -> None:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        self.stats.invalidations += len(keys)
+        for key in keys:
+            self.local.delete(key)
+        self._notify(keys)
+        redis = self.redis
+        if redis is None:
+            return
+        try:
+            await redis.delete(*(self._key(key) for key in keys))
+            await redis.publish(
+                self.channel,
+                json.dumps({"origin": self._instance_id, "keys": keys}),
+            )
+        except Exception as exc:
+            self._redis_failed("invalidate", exc)
+
+    def _redis_failed(self, operation: str, exc: Exception) -> None:
+        self.stats.redis_errors += 1
+        logger.warning("Redis cache %s failed for %s: %s", operation, self.namespace, exc)
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None and not self._listener.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Drop local entries invalidated by other workers."""
+        while True:
+            try:
+                pubsub = self.redis_factory().pubsub()
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") == self._instance_id:
+                        continue
+                    keys = payload.get("keys", [])
+                    for key in keys:
+                        self.local.delete(key)
+                    self._notify(keys)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._redis_failed("subscribe", exc)
+                # Anything published while disconnected was missed
+                self.local.clear()
+                await asyncio.sleep(1)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+# INCRBY only when the key exists, so an expired count is reloaded rather
+# than restarted from the delta
+INCR_IF_EXISTS = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+
+class CachedCount:
+    """
+    A row count kept in process, or in Redis so every worker shares it,
+    and adjusted by writers instead of recounted.
+
+    The value is reloaded with the `load` callback once it is `ttl` seconds
+    old, which bounds the drift from writes that never call `adjust` (other
+    services, raw SQL). Redis failures fall back to the local value.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        ttl: float,
+        redis_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.key = key
+        self.ttl = ttl
+        self.redis_factory = redis_factory
+        self._value: Optional[int] = None
+        self._expires_at = 0.0
+
+    async def get(self, load: Callable[[], Awaitable[int]]) -> int:
+        redis = self.redis_factory() if self.redis_factory is not None else None
+        if redis is not None:
+            try:
+                raw = await redis.get(self.key)
+                if raw is not None:
+                    return int(raw)
+            except Exception as exc:
+                logger.warning("Redis count get failed for %s: %s", self.key, exc)
+                redis = None
+        if redis is None and self._value is not None and self._expires_at > time.monotonic():
+            return self._value
+
+        value = await load()
+        self._value = value
+        self._expires_at = time.monotonic() + self.ttl
+        if redis is not None:
+            try:
+                await redis.set(self.key, value, ex=max(int(self.ttl), 1))
+            except Exception as exc:
+                logger.warning("Redis count set failed for %s: %s", self.key, exc)
+        return value
+
+    async def adjust(self, delta: int) -> None:
+        if not delta:
+            return
+        if self._value is not None:
+            self._value += delta
+        if self.redis_factory is None:
+            return
+        try:
+            await self.redis_factory().eval(INCR_IF_EXISTS, 1, self.key, delta)
+        except Exception as exc:
+            logger.warning("Redis count adjust failed for %s: %s", self.key, exc)
@@ -0,0 +1,75 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode(), digest_size=12
+    ).hexdigest()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored naive in UTC (datetime.utcnow)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def entity_etag(id: Any, updated_at: datetime, *extra: Any) -> str:
+    """
+    Strong ETag of one row, derived from its id and updated_at plus any
+    other values that shape the response (e.g. a field selection).
+    """
+    return f'"{_digest(id, _as_utc(updated_at).isoformat(), *extra)}"'
+
+
+def collection_etag(versions: Iterable[Tuple[Any, datetime]], *extra: Any) -> str:
+    """
+    Strong ETag of a list of rows, over each row's (id, updated_at) in
+    order plus any other values the response carries (e.g. a total).
+    """
+    parts = [f"{id}@{_as_utc(updated_at).isoformat()}" for id, updated_at in versions]
+    return f'"{_digest(*parts, *extra)}"'
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when there is no
+    If-None-Match (RFC 9110, section 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have one-second resolution
+    return _as_utc(last_modified).replace(microsecond=0) <= since
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
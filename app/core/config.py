@@ -1,8 +1,22 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its asyncio counterpart."""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
 class Settings(BaseSettings):
     # Application Settings
     APP_NAME: str = "python-starter-kit"
@@ -14,6 +28,17 @@ class Settings(BaseSettings):
     # Server Settings
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # python -m app.serve: worker processes, 0 to size from available CPUs
+    SERVER_WORKERS: int = 0
+    # Connections all workers together may hold on each database; keep it
+    # under Postgres max_connections minus superuser_reserved_connections
+    DB_CONNECTION_BUDGET: int = 90
+    # Recycle a worker after this many requests (plus up to the jitter,
+    # so workers don't restart together); 0 never recycles
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    # Seconds a stopping worker gets to finish in-flight requests
+    SERVER_GRACEFUL_TIMEOUT: int = 30
 
     # Database Settings
     # PostgreSQL
@@ -23,24 +48,139 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
     DATABASE_URL: Optional[str] = None
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Async engine pool, per process (app.serve sets these per worker from
+    # DB_CONNECTION_BUDGET)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # Read replicas (sync URLs, as for DATABASE_URL); reads are spread over
+    # them and writes go to the primary
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_SELECTION: Literal["round_robin", "least_connections"] = "round_robin"
+    # Reads go to the primary for this long after a client writes; 0 disables
+    REPLICA_STICKY_SECONDS: float = 5.0
+    # How long an unreachable replica is skipped before it is tried again
+    REPLICA_RETRY_SECONDS: float = 30.0
+
+    # Bulk operations
+    BULK_MAX_ITEMS: int = 10000
+    BULK_CHUNK_SIZE: int = 500
+
+    # Serialize user responses with orjson, skipping response_model validation
+    FAST_JSON_RESPONSES: bool = False
+
+    # Streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Warm-up run by the lifespan handler before /ready reports ready:
+    # pre-open pool connections, start hashing workers, build validators
+    STARTUP_WARMUP: bool = True
+    DB_POOL_WARMUP_CONNECTIONS: int = 5
 
     # MongoDB
     MONGODB_URL: str = "mongodb://localhost:27017/"
     MONGODB_DB: str = "starter_kit"
 
+    # Where the async user repository keeps users: "sql" (DATABASE_URL) or
+    # "mongo" (the MONGODB_DB users collection)
+    USER_REPOSITORY_BACKEND: Literal["sql", "mongo"] = "sql"
+
     # Redis Settings
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
 
+    # Cache Settings. The local tier is per process and other workers only
+    # hear of invalidations over Redis, so `python -m app.serve` turns the
+    # user and token caches off when it runs several workers without
+    # CACHE_REDIS_ENABLED
+    CACHE_ENABLED: bool = True
+    CACHE_LOCAL_MAXSIZE: int = 10000
+    CACHE_LOCAL_TTL: int = 30
+    CACHE_REDIS_ENABLED: bool = False
+    CACHE_REDIS_TTL: int = 300
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    # Concurrent lookups of the same user (by id or email) that miss the
+    # cache share one query; waiters give up after the timeout (seconds)
+    # and query themselves
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_TIMEOUT: float = 2.0
+    # Cached user total (list_users?count=cached), adjusted on create and
+    # delete and recounted after this many seconds
+    COUNT_CACHE_TTL: int = 300
+
+    # Audit trail of user changes, written to the AUDIT_COLLECTION MongoDB
+    # collection in batches of AUDIT_BATCH_SIZE or every AUDIT_FLUSH_INTERVAL
+    # seconds. Events that cannot be written (Mongo down, more than
+    # AUDIT_BUFFER_SIZE waiting) are appended to AUDIT_SPILL_PATH and
+    # replayed once writes succeed again. Off by default: it needs a
+    # reachable MongoDB.
+    AUDIT_ENABLED: bool = False
+    AUDIT_COLLECTION: str = "audit"
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_BUFFER_SIZE: int = 10000
+    AUDIT_SPILL_PATH: str = "audit-spill.jsonl"
+
+    # On-demand profiling: requests sent with `X-Profile: <PROFILING_TOKEN>`,
+    # and a PROFILING_SAMPLE_RATE share of all others, are profiled
+    # (cProfile, stacks sampled every PROFILING_SAMPLE_INTERVAL seconds, SQL).
+    # The last PROFILING_MAX_PROFILES are served under /debug/profiles to
+    # clients sending the same token. Off unless enabled.
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SAMPLE_INTERVAL: float = 0.005
+    PROFILING_MAX_PROFILES: int = 50
+
     # JWT Settings
     JWT_SECRET_KEY: str = "your-jwt-secret-key-here"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Verified tokens are cached (by SHA-256) with the user's flags
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_MAXSIZE: int = 10000
+    AUTH_CACHE_TTL: int = 60
+
+    # Load shedding: requests over an adaptive (AIMD) in-flight limit get
+    # an immediate 503. The limit backs off when responses take longer than
+    # CONCURRENCY_LATENCY_TARGET seconds and grows again while they don't.
+    LOAD_SHEDDING_ENABLED: bool = True
+    CONCURRENCY_LIMIT_INITIAL: int = 20
+    CONCURRENCY_LIMIT_MIN: int = 4
+    CONCURRENCY_LIMIT_MAX: int = 200
+    CONCURRENCY_LATENCY_TARGET: float = 0.5
+    CONCURRENCY_BACKOFF: float = 0.9
+    # Path prefix -> "critical" (never shed), "normal" or "low" (shed once
+    # in-flight requests pass LOAD_SHED_LOW_PRIORITY_SHARE of the limit)
+    ROUTE_PRIORITIES: Dict[str, Literal["critical", "normal", "low"]] = {
+        "/health": "critical",
+        "/ready": "critical",
+        "/metrics": "critical",
+        "/api/v1/users/users/export": "low",
+        "/api/v1/users/users/bulk": "low",
+    }
+    LOAD_SHED_LOW_PRIORITY_SHARE: float = 0.5
+    LOAD_SHED_RETRY_AFTER: int = 1
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # 0 hashes on the default thread pool instead
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Passwords of one bulk request hashed at a time; longer batches go in rounds
+    PASSWORD_HASH_BULK_MAX_PENDING: int = 16
 
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_JSON: bool = False
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of records kept per logger prefix, e.g. {"sqlalchemy.engine": 0.01}
+    LOG_SAMPLING: Dict[str, float] = {}
+    # Log SQL statements; defaults to DEBUG
+    SQL_ECHO: Optional[bool] = None
 
     class Config:
         env_file = ".env"
@@ -50,6 +190,10 @@ class Settings(BaseSettings):
         super().__init__(**kwargs)
         if not self.DATABASE_URL:
             self.DATABASE_URL = f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        if self.SQL_ECHO is None:
+            self.SQL_ECHO = self.DEBUG
+        if not self.ASYNC_DATABASE_URL:
+            self.ASYNC_DATABASE_URL = to_async_url(self.DATABASE_URL)
 
 
 @lru_cache()
@@ -44,4 +44,20 @@ class ValidationException(BaseAPIException):
 class DatabaseException(BaseAPIException):
     """Exception raised when database operations fail."""
     def __init__(self, detail: str = "Database error occurred"):
-        super().__init__(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail) 
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail)
+
+
+class BadRequestException(BaseAPIException):
+    """Exception raised when the request is malformed."""
+    def __init__(self, detail: str = "Bad request"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class ServiceUnavailableException(BaseAPIException):
+    """Exception raised when the service is overloaded and sheds the request."""
+    def __init__(self, detail: str = "Service temporarily overloaded", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
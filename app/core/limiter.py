@@ -0,0 +1,130 @@
+import time
+from typing import Dict, Literal, Mapping
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import LOAD_SHED_TOTAL, route_template
+
+Priority = Literal["critical", "normal", "low"]
+
+
+class AIMDLimit:
+    """
+    Additive-increase/multiplicative-decrease limit on in-flight requests.
+
+    Every finished request is a latency sample. A sample slower than
+    `latency_target` multiplies the limit by `backoff`, at most once per
+    `latency_target` so one burst of slow requests counts as one signal.
+    Otherwise, while at least half the limit is in use, each sample adds
+    1/limit, i.e. the limit grows by about one per limit's worth of fast
+    requests.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        backoff: float = 0.9,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._last_decrease = 0.0
+        self.in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def on_sample(self, latency: float, in_flight: int) -> None:
+        if latency > self.latency_target:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self._last_decrease = now
+                self._limit = max(self._limit * self.backoff, self.min_limit)
+        elif in_flight * 2 >= self._limit:
+            self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+
+    def status(self) -> Dict[str, int]:
+        return {"limit": self.limit, "in_flight": self.in_flight}
+
+
+class LoadSheddingMiddleware:
+    """
+    Reject requests over the adaptive concurrency limit with an immediate
+    503 and Retry-After, instead of letting them queue on the DB pool.
+
+    `priorities` maps path prefixes to a priority (longest prefix wins,
+    default "normal"). "critical" routes are never shed and are neither
+    counted nor sampled; "low" routes are only admitted while in-flight
+    requests are below `low_priority_share` of the limit, so they are shed
+    first. Latency is measured to the start of the response so streaming
+    bodies do not read as slow requests.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limit: AIMDLimit,
+        priorities: Mapping[str, Priority],
+        low_priority_share: float = 0.5,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.limit = limit
+        self.priorities = sorted(priorities.items(), key=lambda item: len(item[0]), reverse=True)
+        self.low_priority_share = low_priority_share
+        self.retry_after = retry_after
+
+    def priority(self, path: str) -> Priority:
+        for prefix, priority in self.priorities:
+            if path.startswith(prefix):
+                return priority
+        return "normal"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        priority = self.priority(scope["path"])
+        if priority == "critical":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit
+        admit_below = limit.limit
+        if priority == "low":
+            admit_below = max(int(admit_below * self.low_priority_share), 1)
+        if limit.in_flight >= admit_below:
+            LOAD_SHED_TOTAL.labels(route_template(scope), priority).inc()
+            response = JSONResponse(
+                {"detail": "Service temporarily overloaded"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        latency = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal latency
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - start
+            await send(message)
+
+        limit.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight = limit.in_flight
+            limit.in_flight -= 1
+            if latency is None:
+                latency = time.perf_counter() - start
+            limit.on_sample(latency, in_flight)
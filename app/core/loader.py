@@ -0,0 +1,74 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Sequence, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def _consume(future: asyncio.Future) -> None:
+    # Keep asyncio from logging exceptions nobody was waiting for
+    if not future.cancelled():
+        future.exception()
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Batch lookups by key made during one request.
+
+    `load` calls made in the same event-loop iteration are resolved
+    together with one call to `batch_load`, which receives the distinct
+    keys and returns their values in the same order, None for a miss.
+    Results are remembered for the loader's lifetime, so a key is fetched
+    once however often it is asked for; create one loader per request.
+    """
+
+    def __init__(self, batch_load: Callable[[List[K]], Awaitable[Sequence[Optional[V]]]]):
+        self.batch_load = batch_load
+        self.batches = 0
+        self._futures: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+        # Batches run one at a time: they usually share one AsyncSession
+        self._lock = asyncio.Lock()
+
+    def load(self, key: K) -> Awaitable[Optional[V]]:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            future.add_done_callback(_consume)
+            if not self._queue:
+                # Two hops, so tasks started alongside this one (e.g. by
+                # gather) get to queue their keys before the batch goes out
+                loop.call_soon(loop.call_soon, self._dispatch)
+            self._queue.append(key)
+        return asyncio.shield(future)
+
+    async def load_many(self, keys: Sequence[K]) -> List[Optional[V]]:
+        """Values for `keys` in input order, None where there is none."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        asyncio.get_running_loop().create_task(self._resolve(keys))
+
+    async def _resolve(self, keys: List[K]) -> None:
+        try:
+            async with self._lock:
+                self.batches += 1
+                values = await self.batch_load(keys)
+            if len(values) != len(keys):
+                # zip would leave the unmatched keys' futures pending forever
+                raise ValueError(
+                    f"batch_load returned {len(values)} values for {len(keys)} keys"
+                )
+        except asyncio.CancelledError:
+            for key in keys:
+                self._futures.pop(key).cancel()
+            raise
+        except Exception as exc:
+            for key in keys:
+                # Forget failed keys so a later load retries them
+                self._futures.pop(key).set_exception(exc)
+            return
+        for key, value in zip(keys, values):
+            self._futures[key].set_result(value)
@@ -1,29 +1,175 @@
+import atexit
 import logging
+import queue
+import random
 import sys
-from typing import Any, Dict
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import orjson
 
 from app.core.config import get_settings
 
 settings = get_settings()
 
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller: when the bounded queue is
+    full the record is dropped and counted instead.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now, since args may be mutated
+        # later; the formatter runs on the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records from high-volume loggers.
+
+    `rates` maps a logger name prefix to the fraction of its records to
+    keep, e.g. {"sqlalchemy.engine": 0.01}. The longest matching prefix
+    wins; warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rates or record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                if random.random() < rate:
+                    return True
+                self.sampled_out += 1
+                return False
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Render records as single-line JSON objects using orjson."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = "".join(traceback.format_exception(*record.exc_info))
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        return orjson.dumps(payload, default=str).decode()
+
 
 def setup_logging() -> None:
-    """Configure logging for the application."""
-    logging.basicConfig(
-        level=settings.LOG_LEVEL,
-        format=settings.LOG_FORMAT,
-        handlers=[logging.StreamHandler(sys.stdout)]
+    """
+    Configure logging for the application.
+
+    Records are put on a bounded in-memory queue and written to stdout by a
+    background QueueListener thread, so a slow log collector never adds
+    latency to requests. When the queue is full records are dropped and
+    counted (see get_log_stats).
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_JSON:
+        stream_handler.setFormatter(JSONFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(settings.LOG_FORMAT))
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    # Route server and SQL logs through the same queue instead of the
+    # synchronous stream handlers uvicorn and SQLAlchemy install themselves
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers = []
+        server_logger.propagate = True
+    if settings.SQL_ECHO:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = QueueListener(
+        _queue_handler.queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except queue.Full:
+            # No room for the stop sentinel; the listener thread is a daemon
+            pass
+        _listener = None
+
+
+def get_log_stats() -> Dict[str, int]:
+    """Counters for the logging pipeline, for the /metrics endpoint."""
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0, "sampled_out": 0}
+    sampled_out = sum(
+        getattr(f, "sampled_out", 0) for f in _queue_handler.filters
     )
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "sampled_out": sampled_out,
+    }
 
 
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the specified name.
-    
+
     Args:
         name: The name for the logger, typically __name__ from the calling module
-        
+
     Returns:
         logging.Logger: Configured logger instance
     """
-    return logging.getLogger(name) 
\ No newline at end of file
+    return logging.getLogger(name)
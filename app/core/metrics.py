@@ -0,0 +1,265 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# HTTP metrics
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+)
+REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+LOAD_SHED_TOTAL = Counter(
+    "http_requests_shed_total",
+    "Requests rejected with 503 by the concurrency limiter",
+    ["route", "priority"],
+)
+
+# Database metrics
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements issued while serving a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent in SQL statements while serving a request",
+    ["route"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool, not counting "
+    "opening a new one (db_pool_connect_seconds)",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+POOL_CONNECT = Histogram(
+    "db_pool_connect_seconds",
+    "Time spent opening a new database connection for the pool",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 30),
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["engine"],
+)
+POOL_SATURATION = Gauge(
+    "db_pool_saturation_ratio",
+    "Checked-out connections over pool capacity (pool_size + max_overflow)",
+    ["engine"],
+)
+DB_ROUTED_STATEMENTS = Counter(
+    "db_routed_statements_total",
+    "Statements routed by the read-replica router, by target",
+    ["target"],
+)
+
+
+# Audit metrics
+AUDIT_FLUSH_DURATION = Histogram(
+    "audit_flush_duration_seconds",
+    "Duration of each insert_many of buffered audit events",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+@dataclass
+class RequestStats:
+    """Work attributed to the request being served in the current context"""
+    db_queries: int = 0
+    db_time: float = 0.0
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+# (statement, seconds) of each SQL statement, while a request is profiled
+sql_capture: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "sql_capture", default=None
+)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Return the route path template (e.g. /api/v1/users/users/{user_id}) for
+    the request, so label cardinality stays bounded by the number of routes.
+    """
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "__unmatched__"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status counts, in-flight
+    requests and the DB work done on behalf of each request.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            request_stats.reset(token)
+            route = route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUESTS_TOTAL.labels(method, route, str(status_code)).inc()
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.db_queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_time)
+
+
+def _pool_capacity(pool: Any) -> Optional[int]:
+    size = getattr(pool, "size", None)
+    overflow = getattr(pool, "_max_overflow", None)
+    if not callable(size) or overflow is None or overflow < 0:
+        return None
+    return size() + overflow
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Attach statement timing, per-request attribution and pool checkout
+    metrics to a (sync) Engine; for an AsyncEngine pass `.sync_engine`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        DB_QUERY_DURATION.labels(name).observe(elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+        captured = sql_capture.get()
+        if captured is not None:
+            captured.append((statement, elapsed))
+
+    pool = engine.pool
+    capacity = _pool_capacity(pool)
+
+    def update_pool_gauges(returning: int) -> None:
+        if not hasattr(pool, "checkedout"):
+            return
+        checked_out = max(pool.checkedout() - returning, 0)
+        POOL_CHECKED_OUT.labels(name).set(checked_out)
+        if capacity:
+            POOL_SATURATION.labels(name).set(checked_out / capacity)
+
+    # checkin fires before the connection is handed back to the pool
+    event.listen(pool, "checkout", lambda *args: update_pool_gauges(0))
+    event.listen(pool, "checkin", lambda *args: update_pool_gauges(1))
+
+    # Opening a connection runs from the engine's do_connect to the pool's
+    # connect event, both given the pool's record of the connection
+    @event.listens_for(engine, "do_connect")
+    def connect_started(dialect, conn_rec, cargs, cparams) -> None:
+        conn_rec.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(pool, "connect")
+    def connected(dbapi_connection, conn_rec) -> None:
+        started = conn_rec.info.pop("connect_started", None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            conn_rec.info["connect_seconds"] = elapsed
+            POOL_CONNECT.labels(name).observe(elapsed)
+
+    @event.listens_for(pool, "checkout")
+    def checked_out(dbapi_connection, conn_rec, conn_proxy) -> None:
+        # Left by a reconnect after the timed get (recycled or invalidated)
+        conn_rec.info.pop("connect_seconds", None)
+
+    # Pool has no event for "started waiting", so time the blocking get
+    # itself, less the time spent opening a connection inside it
+    do_get: Callable[[], Any] = pool._do_get
+
+    def timed_do_get() -> Any:
+        start = time.perf_counter()
+        record = None
+        try:
+            record = do_get()
+            return record
+        finally:
+            elapsed = time.perf_counter() - start
+            if record is not None:
+                elapsed -= record.info.pop("connect_seconds", 0.0)
+            POOL_CHECKOUT_WAIT.labels(name).observe(max(elapsed, 0.0))
+
+    pool._do_get = timed_do_get
+
+
+class StatsCollector:
+    """Expose counters kept elsewhere (e.g. CacheStats) as Prometheus gauges."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], dict], label: str):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.label = label
+
+    def collect(self):
+        family = GaugeMetricFamily(self.name, self.documentation, labels=[self.label])
+        for key, value in self.read().items():
+            family.add_metric([key], value)
+        yield family
+
+
+def register_stats(name: str, documentation: str, read: Callable[[], dict], label: str = "counter") -> None:
+    REGISTRY.register(StatsCollector(name, documentation, read, label))
+
+
+def render_metrics() -> tuple:
+    """Return (body, content_type) for the /metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,255 @@
+import cProfile
+import hmac
+import io
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.metrics import sql_capture
+
+settings = get_settings()
+
+# Statements kept per profile; the rest are only counted
+MAX_STATEMENTS = 1000
+
+
+@dataclass
+class StoredProfile:
+    """One profiled request: its cProfile stats, sampled stacks and SQL"""
+    id: str
+    at: datetime
+    method: str
+    path: str
+    trigger: str
+    status: int = 0
+    duration: float = 0.0
+    stats: Dict[Any, Any] = field(default_factory=dict, repr=False)
+    stacks: Counter = field(default_factory=Counter, repr=False)
+    statements: List[Tuple[str, float]] = field(default_factory=list, repr=False)
+    statements_dropped: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "at": self.at.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 3),
+            "trigger": self.trigger,
+            "sql_count": len(self.statements) + self.statements_dropped,
+            "sql_ms": round(sum(elapsed for _, elapsed in self.statements) * 1000, 3),
+        }
+
+    def pstats_bytes(self) -> bytes:
+        """The stats in the format pstats.Stats(filename) loads."""
+        return marshal.dumps(self.stats)
+
+    def collapsed(self) -> str:
+        """Sampled stacks as "frame;frame;frame count" lines, for flamegraph.pl or speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, sort: str = "cumulative", limit: int = 30) -> List[Dict[str, Any]]:
+        """The `limit` functions with the most cumulative/own time or calls."""
+        index = {"calls": 1, "tottime": 2, "cumulative": 3}[sort]
+        rows = sorted(self.stats.items(), key=lambda item: item[1][index], reverse=True)
+        return [
+            {
+                "function": pstats.func_std_string(func),
+                "calls": calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            }
+            for func, (_, calls, tottime, cumtime, _) in rows[:limit]
+        ]
+
+    def text(self, sort: str = "cumulative", limit: int = 50) -> str:
+        holder = _StatsHolder(self.stats)
+        out = io.StringIO()
+        pstats.Stats(holder, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class _StatsHolder:
+    # pstats.Stats accepts any object with create_stats() and .stats
+    def __init__(self, stats: Dict[Any, Any]):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def _frame_name(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Sample the stack of one thread every `interval` seconds from a
+    background thread, counting identical stacks.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+class ProfileStore:
+    """
+    The most recent `maxlen` profiles, oldest dropped first, and counts of
+    requests profiled and of those skipped while another was profiled.
+    """
+
+    def __init__(self, maxlen: int):
+        self._profiles: Deque[StoredProfile] = deque(maxlen=maxlen)
+        self.profiled = 0
+        self.skipped = 0
+
+    def add(self, profile: StoredProfile) -> None:
+        self._profiles.append(profile)
+        self.profiled += 1
+
+    def get(self, id: str) -> Optional[StoredProfile]:
+        for profile in self._profiles:
+            if profile.id == id:
+                return profile
+        return None
+
+    def list(self) -> List[StoredProfile]:
+        return list(reversed(self._profiles))
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def status(self) -> Dict[str, int]:
+        return {"stored": len(self), "profiled": self.profiled, "skipped_busy": self.skipped}
+
+
+class ProfilingMiddleware:
+    """
+    Profile selected requests: those carrying `X-Profile: <token>` and a
+    random `sample_rate` share of the rest. A profiled request runs under
+    cProfile with a stack sampler beside it, and every SQL statement it
+    issues is recorded with its duration; the result goes to `store`.
+
+    Requests that are not selected cost one header lookup and, with a
+    sample rate set, one random number. cProfile hooks the whole event
+    loop thread, so only one request per process is profiled at a time
+    and work of other requests interleaved with it shows up too.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        token: str = "",
+        sample_rate: float = 0.0,
+        sample_interval: float = 0.005,
+        exclude_prefixes: Tuple[str, ...] = ("/debug/", "/metrics"),
+    ):
+        self.app = app
+        self.store = store
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.sample_interval = sample_interval
+        self.exclude_prefixes = exclude_prefixes
+        self.busy = False
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    if hmac.compare_digest(value, self.token):
+                        return "header"
+                    break
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        if self.busy:
+            self.store.skipped += 1
+            await self.app(scope, receive, send)
+            return
+
+        profile = StoredProfile(
+            id=uuid.uuid4().hex[:12],
+            at=datetime.utcnow(),
+            method=scope["method"],
+            path=scope["path"],
+            trigger=trigger,
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []), (b"x-profile-id", profile.id.encode())
+                ]
+            await send(message)
+
+        statements: List[Tuple[str, float]] = []
+        token = sql_capture.set(statements)
+        sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        profiler = cProfile.Profile()
+        self.busy = True
+        sampler.start()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            profile.duration = time.perf_counter() - start
+            profile.stacks = sampler.stop()
+            self.busy = False
+            sql_capture.reset(token)
+            profiler.create_stats()
+            profile.stats = profiler.stats
+            profile.statements = statements[:MAX_STATEMENTS]
+            profile.statements_dropped = max(len(statements) - MAX_STATEMENTS, 0)
+            self.store.add(profile)
+
+
+# Create a singleton instance
+profile_store = ProfileStore(maxlen=settings.PROFILING_MAX_PROFILES)
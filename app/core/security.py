@@ -0,0 +1,214 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from jose import jwt
+from passlib.context import CryptContext
+
+from app.core.config import get_settings
+from app.core.errors import ServiceUnavailableException
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+def build_pwd_context(rounds: int) -> CryptContext:
+    """
+    Build the bcrypt context. Pinning min/max rounds to the configured cost
+    makes `needs_update` flag hashes made with any other cost, so they are
+    rehashed on the next successful login.
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+pwd_context = build_pwd_context(settings.BCRYPT_ROUNDS)
+
+# Context used inside pool worker processes, set by _init_worker
+_worker_context: Optional[CryptContext] = None
+
+
+def _init_worker(rounds: int) -> None:
+    global _worker_context
+    _worker_context = build_pwd_context(rounds)
+
+
+def _context() -> CryptContext:
+    return _worker_context or pwd_context
+
+
+def _hash(passwords: Sequence[str]) -> List[str]:
+    context = _context()
+    return [context.hash(password) for password in passwords]
+
+
+def _load_backend() -> None:
+    _context().handler("bcrypt").get_backend()
+
+
+def _verify_and_update(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return _context().verify_and_update(plain_password, hashed_password)
+
+
+def _chunks(items: Sequence[str], size: int) -> List[Sequence[str]]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded process pool.
+
+    Every password being hashed or verified takes one of `max_pending`
+    slots; beyond that callers get a ServiceUnavailableException (503)
+    straight away instead of waiting behind a queue that only grows. A
+    bulk hash holds at most `bulk_max_pending` slots at once, so a large
+    batch cannot lock out logins. If a pool worker dies, the pool is
+    replaced and the job retried once.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int, bulk_max_pending: int = 16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.bulk_max_pending = max(1, min(bulk_max_pending, max_pending))
+        self.rounds = rounds
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.rounds,),
+            )
+        return self._executor
+
+    def _discard(self, executor: Executor, error: Exception) -> None:
+        # Concurrent jobs all see the same broken pool; only replace it once
+        if self._executor is not executor:
+            return
+        logger.warning("Password hashing pool broken, starting a new one: %s", error)
+        self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reserve(self, slots: int) -> None:
+        if self.pending + slots > self.max_pending:
+            self.rejected += 1
+            raise ServiceUnavailableException("Password hashing capacity exceeded")
+        self.pending += slots
+
+    async def _submit(self, func, *args):
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool as e:
+            self._discard(executor, e)
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def _run(self, slots: int, func, *args):
+        self._reserve(slots)
+        try:
+            return await self._submit(func, *args)
+        finally:
+            self.pending -= slots
+
+    async def hash(self, password: str) -> str:
+        return (await self._run(1, _hash, [password]))[0]
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash a batch, `bulk_max_pending` passwords at a time, each round
+        split across the pool workers and taking one slot per password.
+        """
+        hashed: List[str] = []
+        for chunk in _chunks(passwords, self.bulk_max_pending):
+            slices = max(1, min(self.workers, len(chunk)))
+            size = -(-len(chunk) // slices)
+            self._reserve(len(chunk))
+            try:
+                results = await asyncio.gather(*(
+                    self._submit(_hash, list(part)) for part in _chunks(chunk, size)
+                ))
+            finally:
+                self.pending -= len(chunk)
+            hashed.extend(value for part in results for value in part)
+        return hashed
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password. Returns (valid, new_hash) where new_hash is set
+        when the stored hash used outdated settings and should be replaced.
+        """
+        return await self._run(1, _verify_and_update, plain_password, hashed_password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        valid, _ = await self.verify_and_update(plain_password, hashed_password)
+        return valid
+
+    async def warm_up(self) -> None:
+        """Start every pool worker and load the bcrypt backend in each."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _load_backend)
+            for _ in range(max(self.workers, 1))
+        ))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Create a singleton instance
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+    bulk_max_pending=settings.PASSWORD_HASH_BULK_MAX_PENDING,
+)
+
+
+def create_access_token(
+    subject: Union[str, int], expires_delta: Optional[timedelta] = None
+) -> str:
+    """
+    Create a signed JWT access token.
+
+    Args:
+        subject: Token subject, the user id
+        expires_delta: Lifetime; defaults to ACCESS_TOKEN_EXPIRE_MINUTES
+
+    Returns:
+        str: Encoded token
+    """
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    payload = {"sub": str(subject), "exp": datetime.utcnow() + expires_delta}
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a token's signature and expiry and return its claims.
+
+    Raises:
+        jose.JWTError: If the token is malformed, forged or expired
+    """
+    return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
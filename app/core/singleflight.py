@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Calls that ran (leaders), joined one in flight, or gave up waiting"""
+    leaders: int = 0
+    coalesced: int = 0
+    timeouts: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class LeaderCancelled(Exception):
+    """The call being waited on was cancelled; waiters start their own."""
+
+
+def _consume(future: asyncio.Future) -> None:
+    # Keep asyncio from logging exceptions nobody was waiting for
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Merge concurrent identical async calls into one.
+
+    The first caller for a key runs `fn`; callers arriving while it is in
+    flight wait for its result, or its exception, instead of running their
+    own. A waiter gives up after `timeout` seconds and runs `fn` itself.
+    If the running call is cancelled (e.g. its client went away), waiters
+    are released to retry rather than cancelled with it.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.stats = SingleFlightStats()
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is not None:
+            self.stats.coalesced += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(call), self.timeout)
+            except asyncio.TimeoutError:
+                self.stats.timeouts += 1
+                return await fn()
+            except LeaderCancelled:
+                return await self.do(key, fn)
+
+        call = asyncio.get_running_loop().create_future()
+        call.add_done_callback(_consume)
+        self._calls[key] = call
+        self.stats.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.set_exception(LeaderCancelled())
+            raise
+        except Exception as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ThreadedSingleFlight:
+    """SingleFlight for synchronous callers on different threads."""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.stats = SingleFlightStats()
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats.leaders += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self._lock:
+                    self.stats.timeouts += 1
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from typing import Dict
+
+from app.api.v1.schemas.user import User, UserCreate
+from app.core.config import get_settings
+from app.core.logger import get_logger
+from app.core.security import password_hasher
+from app.core.serialization import dump_row
+from app.db.session import async_engine, replica_engines, warm_up_pool
+
+logger = get_logger(__name__)
+
+settings = get_settings()
+
+
+def warm_up_schemas() -> None:
+    """
+    Run the user schemas once, so lazy imports (email-validator, idna) and
+    first-use setup happen now rather than in the first request.
+    """
+    UserCreate.model_validate({"email": "warmup@example.com", "password": "warmup"})
+    user = User.model_validate(
+        {"id": 0, "email": "warmup@example.com", "is_active": True, "is_superuser": False}
+    )
+    user.model_dump_json()
+    dump_row(User, user)
+
+
+async def _timed(name: str, coro, timings: Dict[str, float]) -> None:
+    started = time.perf_counter()
+    try:
+        await coro
+    except Exception as exc:
+        logger.warning("Warm-up step %s failed: %s", name, exc)
+    timings[name] = time.perf_counter() - started
+
+
+async def warm_up() -> Dict[str, float]:
+    """
+    Pre-open pool connections (primary and replicas), start the password
+    hashing workers and exercise the schemas, all in parallel. A failing
+    step is logged and skipped, never raised.
+
+    Returns:
+        Dict[str, float]: Seconds spent per step
+    """
+    timings: Dict[str, float] = {}
+    steps = {
+        "db_primary": warm_up_pool(async_engine, settings.DB_POOL_WARMUP_CONNECTIONS),
+        "password_hasher": password_hasher.warm_up(),
+        "schemas": asyncio.to_thread(warm_up_schemas),
+    }
+    for index, replica_engine in enumerate(replica_engines):
+        steps[f"db_replica{index}"] = warm_up_pool(
+            replica_engine, settings.DB_POOL_WARMUP_CONNECTIONS
+        )
+    await asyncio.gather(*(_timed(name, coro, timings) for name, coro in steps.items()))
+    logger.info(
+        "Warm-up finished: %s",
+        ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items()),
+    )
+    return timings
@@ -0,0 +1,229 @@
+import asyncio
+import itertools
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logger import get_logger
+from app.core.metrics import DB_ROUTED_STATEMENTS
+
+logger = get_logger(__name__)
+
+STICKY_COOKIE = "db_primary_until"
+
+# What a replica that cannot be reached raises on connect: drivers such as
+# asyncpg raise OSError (refused, unreachable) or a timeout unwrapped, the
+# sqlite and psycopg drivers a DBAPI error
+REPLICA_CONNECT_ERRORS = (DBAPIError, OSError, asyncio.TimeoutError)
+
+
+@dataclass
+class ReadYourWrites:
+    """Per-request stickiness: read from the primary until `primary_until`."""
+    primary_until: float = 0.0
+    wrote: bool = False
+
+
+read_your_writes: ContextVar[Optional[ReadYourWrites]] = ContextVar(
+    "read_your_writes", default=None
+)
+
+
+class ReplicaSet:
+    """
+    Pick a healthy replica engine for a read.
+
+    `strategy` is "round_robin" or "least_connections" (fewest connections
+    checked out of the replica's pool). A replica that fails to connect is
+    skipped for `retry_after` seconds, after which it is tried again.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        strategy: str = "round_robin",
+        retry_after: float = 30.0,
+    ):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica selection strategy: {strategy}")
+        self.engines = list(engines)
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self._down_until: Dict[Engine, float] = {}
+        self._next = itertools.cycle(range(len(self.engines)))
+
+    def healthy(self) -> List[Engine]:
+        now = time.monotonic()
+        return [e for e in self.engines if self._down_until.get(e, 0.0) <= now]
+
+    def choose(self) -> Optional[Engine]:
+        candidates = self.healthy()
+        if not candidates:
+            return None
+        if self.strategy == "least_connections":
+            return min(candidates, key=_checked_out)
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._next)]
+            if engine in candidates:
+                return engine
+        return None
+
+    def mark_down(self, engine: Engine, error: Exception) -> None:
+        logger.warning(
+            "Replica %s unavailable, reading from the primary for %ss: %s",
+            engine.url.render_as_string(hide_password=True), self.retry_after, error,
+        )
+        self._down_until[engine] = time.monotonic() + self.retry_after
+
+    def status(self) -> Dict[str, int]:
+        healthy = self.healthy()
+        return {
+            engine.url.render_as_string(hide_password=True): int(engine in healthy)
+            for engine in self.engines
+        }
+
+
+def _checked_out(engine: Engine) -> int:
+    pool = engine.pool
+    return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a replica and everything else to the primary.
+
+    A session sticks to the primary once it has flushed or executed DML or
+    SELECT ... FOR UPDATE, so a request reads its own writes; it also reads
+    from the primary while the request's ReadYourWrites window is open.
+    Passing bind_arguments={"primary": True} forces a single statement to
+    the primary. If a replica cannot be connected to, the read falls back
+    to the primary and the replica is skipped for a while.
+    """
+
+    def __init__(self, *args: Any, replicas: ReplicaSet, sticky_seconds: float = 0.0, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+
+    def get_bind(self, mapper=None, clause=None, **kw: Any):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if kw.get("primary") or self._flushing or _is_write(clause):
+            self._stick_to_primary()
+            DB_ROUTED_STATEMENTS.labels("primary").inc()
+            return primary
+        if reads_from_primary(self):
+            DB_ROUTED_STATEMENTS.labels("primary").inc()
+            return primary
+
+        replica = self.info.get("replica")
+        if replica is not None:
+            DB_ROUTED_STATEMENTS.labels("replica").inc()
+            return replica
+        replica = self.replicas.choose()
+        if replica is None:
+            DB_ROUTED_STATEMENTS.labels("fallback").inc()
+            return primary
+        try:
+            # Check the connection out now so a dead replica falls back here
+            # rather than failing the query; the session reuses it afterwards
+            self.connection(bind_arguments={"bind": replica})
+        except REPLICA_CONNECT_ERRORS as e:
+            self.replicas.mark_down(replica, e)
+            DB_ROUTED_STATEMENTS.labels("fallback").inc()
+            return primary
+        self.info["replica"] = replica
+        DB_ROUTED_STATEMENTS.labels("replica").inc()
+        return replica
+
+    def _stick_to_primary(self) -> None:
+        self.info["primary"] = True
+        state = read_your_writes.get()
+        if state is not None and self.sticky_seconds > 0:
+            state.wrote = True
+            state.primary_until = max(state.primary_until, time.time() + self.sticky_seconds)
+
+    def close(self) -> None:
+        super().close()
+        self.info.pop("primary", None)
+        self.info.pop("replica", None)
+
+
+def _is_write(clause: Any) -> bool:
+    if clause is None:
+        return False
+    if getattr(clause, "is_dml", False):
+        return True
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+def _within_sticky_window() -> bool:
+    state = read_your_writes.get()
+    return state is not None and state.primary_until > time.time()
+
+
+def reads_from_primary(session: Any) -> bool:
+    """
+    Whether a read on `session` goes to the primary rather than a replica:
+    the session has written, or the request's read-your-writes window is
+    open. Takes a Session or an AsyncSession.
+    """
+    return bool(session.info.get("primary")) or _within_sticky_window()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Carry the read-your-writes window across requests in a cookie.
+
+    After a request that wrote, the response sets a cookie holding the time
+    until which that client's reads go to the primary, so a follow-up GET
+    does not observe a replica that has not caught up yet.
+    """
+
+    def __init__(self, app: ASGIApp, sticky_seconds: float):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.sticky_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        # The deadline comes from the client, so never honour more than one window
+        deadline = min(_cookie_deadline(scope), time.time() + self.sticky_seconds)
+        state = ReadYourWrites(primary_until=deadline)
+        token = read_your_writes.set(state)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and state.wrote:
+                cookie = (
+                    f"{STICKY_COOKIE}={state.primary_until:.3f}; "
+                    f"Max-Age={int(self.sticky_seconds) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            read_your_writes.reset(token)
+
+
+def _cookie_deadline(scope: Scope) -> float:
+    for name, value in scope.get("headers", ()):
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(STICKY_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value)
+                except ValueError:
+                    return 0.0
+    return 0.0
@@ -1,29 +1,103 @@
-from typing import Generator
+import asyncio
+from typing import Any, AsyncGenerator, Dict, Generator, Optional
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from motor.motor_asyncio import AsyncIOMotorClient
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from redis.asyncio import Redis
 
-from app.core.config import get_settings
+from app.core.config import get_settings, to_async_url
+from app.core.metrics import instrument_engine
+from app.db.routing import ReplicaSet, RoutingSession
 
 settings = get_settings()
 
-# PostgreSQL configuration
+
+def pool_options(url: str) -> Dict[str, Any]:
+    """
+    Pool sizing for an async engine: DB_POOL_SIZE and DB_MAX_OVERFLOW, which
+    app.serve sets per worker. SQLite's pools do not take these arguments.
+    """
+    if url.startswith("sqlite"):
+        return {}
+    return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
+# Engines and clients below open no connections until first used; the
+# lifespan handler in main.py pre-opens pool connections with warm_up_pool.
+
+# PostgreSQL configuration. SQL echo is enabled through the
+# "sqlalchemy.engine" logger in setup_logging rather than `echo=`, which
+# would attach its own synchronous stdout handler.
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=settings.DEBUG
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_engine(engine, "sync")
+
+# Async PostgreSQL configuration (asyncpg, or aiosqlite for tests)
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    **pool_options(settings.ASYNC_DATABASE_URL),
+)
+instrument_engine(async_engine.sync_engine, "primary")
 
-# MongoDB configuration
-mongo_client = AsyncIOMotorClient(settings.MONGODB_URL)
-mongodb = mongo_client[settings.MONGODB_DB]
+# Read replicas: when configured, sessions route reads to them
+replica_engines = [
+    create_async_engine(to_async_url(url), pool_pre_ping=True, **pool_options(url))
+    for url in settings.DATABASE_REPLICA_URLS
+]
+for index, replica_engine in enumerate(replica_engines):
+    instrument_engine(replica_engine.sync_engine, f"replica{index}")
+replicas = ReplicaSet(
+    [replica_engine.sync_engine for replica_engine in replica_engines],
+    strategy=settings.REPLICA_SELECTION,
+    retry_after=settings.REPLICA_RETRY_SECONDS,
+)
+
+if replica_engines:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    )
+else:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+# MongoDB and Redis configuration (created on first use)
+mongo_client: Optional[AsyncIOMotorClient] = None
+redis_client: Optional[Redis] = None
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async SQLAlchemy database session.
+
+    Yields:
+        AsyncSession: Database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
-def get_db() -> Generator:
+def get_sync_db() -> Generator[Session, None, None]:
     """
-    Get SQLAlchemy database session.
-    
+    Get SQLAlchemy database session for synchronous callers
+    (scripts, migrations helpers, thread pool code).
+
     Yields:
         Session: Database session
     """
@@ -34,11 +108,74 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_mongodb() -> AsyncIOMotorClient:
+def get_mongodb() -> AsyncIOMotorDatabase:
+    """
+    Get MongoDB database, creating the client on first use.
+
+    Returns:
+        AsyncIOMotorDatabase: The MONGODB_DB database
+    """
+    global mongo_client
+    if mongo_client is None:
+        mongo_client = AsyncIOMotorClient(settings.MONGODB_URL)
+    return mongo_client[settings.MONGODB_DB]
+
+
+def get_redis() -> Redis:
+    """
+    Get Redis client.
+
+    Returns:
+        Redis: asyncio Redis client
+    """
+    global redis_client
+    if redis_client is None:
+        redis_client = Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+        )
+    return redis_client
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> int:
     """
-    Get MongoDB client.
-    
+    Open up to `connections` pool connections in parallel and hand them back
+    to the pool, so the first requests do not pay for connection setup.
+    Capped at the pool's size.
+
     Returns:
-        AsyncIOMotorClient: MongoDB client
+        int: Number of connections opened
+
+    Raises:
+        Exception: The first connection error, if none could be opened
     """
-    return mongodb 
\ No newline at end of file
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        connections = min(connections, pool_size())
+    if connections <= 0:
+        return 0
+    # Hold every connection until all are open so each is a distinct one
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)), return_exceptions=True
+    )
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    await asyncio.gather(*(conn.close() for conn in opened))
+    if not opened:
+        raise results[0]
+    return len(opened)
+
+
+async def close_connections() -> None:
+    """Dispose every engine pool and close the MongoDB and Redis clients."""
+    global mongo_client, redis_client
+    await async_engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
+    engine.dispose()
+    if mongo_client is not None:
+        mongo_client.close()
+        mongo_client = None
+    if redis_client is not None:
+        await redis_client.aclose()
+        redis_client = None
@@ -1,14 +1,49 @@
-from sqlalchemy import Boolean, Column, String, Integer
+from sqlalchemy import Boolean, Column, Index, String, Integer, func, text
 from app.models.base import Base
 
 
 class User(Base):
     """User model for storing user related details"""
     __tablename__ = "users"
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     full_name = Column(String)
     is_active = Column(Boolean, default=True)
-    is_superuser = Column(Boolean, default=False) 
\ No newline at end of file
+    is_superuser = Column(Boolean, default=False)
+
+
+# User search (AsyncUserRepository.search), Postgres only: trigram indexes
+# for substring matches and text_pattern_ops for prefixes, all partial on
+# is_active since search skips inactive users by default
+Index(
+    "ix_users_email_trgm",
+    User.email,
+    postgresql_using="gin",
+    postgresql_ops={"email": "gin_trgm_ops"},
+    postgresql_where=text("is_active"),
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_full_name_trgm",
+    User.full_name,
+    postgresql_using="gin",
+    postgresql_ops={"full_name": "gin_trgm_ops"},
+    postgresql_where=text("is_active"),
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_email_lower_prefix",
+    func.lower(User.email).label("email_lower"),
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+    postgresql_where=text("is_active"),
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_users_full_name_lower_prefix",
+    func.lower(User.full_name).label("full_name_lower"),
+    postgresql_ops={"full_name_lower": "text_pattern_ops"},
+    postgresql_where=text("is_active"),
+).ddl_if(dialect="postgresql")
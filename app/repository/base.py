@@ -1,30 +1,243 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
-from sqlalchemy.orm import Session
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+from datetime import datetime
+from sqlalchemy import (
+    DateTime,
+    Select,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 
+from app.core.cache import TwoTierCache
+from app.core.singleflight import SingleFlight, ThreadedSingleFlight
+from app.core.errors import BadRequestException
+from app.db.routing import reads_from_primary
 from app.models.base import Base
+from app.repository.pagination import Page, decode_cursor, encode_cursor
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+# Detail of a bulk item whose id matched no row
+NOT_FOUND = "Not found"
+
+
+class BulkError(NamedTuple):
+    """Failure of one item of a bulk operation, by position in the input"""
+    index: int
+    id: Optional[Any]
+    detail: str
+
+
+class BulkResult(NamedTuple):
+    """Rows written by a bulk operation and the items that failed"""
+    items: List[Any]
+    errors: List[BulkError]
+    # Column values of the rows before an update, by id, when asked for
+    before: Optional[Dict[Any, Dict[str, Any]]] = None
+
+
+def chunked(items: Sequence[Any], size: int):
+    """Yield (offset, chunk) pairs of at most `size` items."""
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def column_values(obj: Base) -> Dict[str, Any]:
+    """Column attributes of a loaded row, safe to hand to other sessions."""
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def detached_copy(model: Type[ModelType], values: Dict[str, Any]) -> ModelType:
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Escape LIKE wildcards in user input, for use with `escape=`."""
+    return (
+        value.replace(escape, escape * 2)
+        .replace("%", f"{escape}%")
+        .replace("_", f"{escape}_")
+    )
+
+
+def narrow_columns(
+    model: Type[ModelType],
+    columns: Sequence[str],
+    *,
+    hidden: Sequence[str] = (),
+    required: Sequence[str] = (),
+) -> List[str]:
+    """
+    Validate a column selection and add the `required` columns, in table
+    order. Columns in `hidden` can never be selected.
+    """
+    known = model.__table__.columns.keys()
+    for column in columns:
+        if column not in known or column in hidden:
+            raise BadRequestException(f"Cannot select {column!r}")
+    wanted = set(columns) | set(required)
+    return [column for column in known if column in wanted]
+
+
+def keyset_query(
+    model: Type[ModelType],
+    *,
+    order_by: str,
+    cursor: Optional[str],
+    limit: int,
+    sortable_columns: Sequence[str],
+    columns: Optional[Sequence[str]] = None,
+) -> Select:
+    """
+    Build a keyset-paginated SELECT ordered by (order_by, id), of whole
+    rows or, with `columns`, of just those columns.
+
+    One extra row is fetched so the caller can tell whether a next page
+    exists without a COUNT.
+    """
+    if order_by not in sortable_columns:
+        raise BadRequestException(f"Cannot order by {order_by!r}")
+    sort_column = getattr(model, order_by)
+    if columns:
+        query = select(*(getattr(model, column) for column in columns))
+    else:
+        query = select(model)
+    sort_type = sort_column.type.python_type
+    if order_by == "id":
+        query = query.order_by(model.id)
+        if cursor:
+            _, last_id = decode_cursor(cursor, order_by, sort_type)
+            query = query.where(model.id > last_id)
+    else:
+        query = query.order_by(sort_column, model.id)
+        if cursor:
+            last_value, last_id = decode_cursor(cursor, order_by, sort_type)
+            query = query.where(
+                tuple_(sort_column, model.id) > tuple_(last_value, last_id)
+            )
+    return query.limit(limit + 1)
+
+
+def keyset_page(rows: List[ModelType], *, order_by: str, limit: int) -> Page:
+    """Trim the look-ahead row from a keyset query and build the next cursor."""
+    if len(rows) <= limit:
+        return Page(items=rows, next_cursor=None)
+    items = rows[:limit]
+    last = items[-1]
+    return Page(
+        items=items,
+        next_cursor=encode_cursor(order_by, getattr(last, order_by), last.id),
+    )
+
+
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Base class for all repositories with common CRUD operations
     """
 
-    def __init__(self, model: Type[ModelType]):
+    sortable_columns: Sequence[str] = ("id", "created_at")
+
+    def __init__(self, model: Type[ModelType], flight: Optional[ThreadedSingleFlight] = None):
         self.model = model
+        self.flight = flight
+
+    def coalesce(self, key: str, load: Callable[[], Optional[ModelType]]) -> Optional[ModelType]:
+        """
+        Run `load` once for concurrent callers asking for the same `key`.
+        The caller that ran it gets its own instance; the others get
+        detached copies of its column values.
+        """
+        if self.flight is None:
+            return load()
+        own: List[Optional[ModelType]] = []
+
+        def run() -> Optional[Dict[str, Any]]:
+            obj = load()
+            own.append(obj)
+            return column_values(obj) if obj is not None else None
+
+        values = self.flight.do(key, run)
+        if own:
+            return own[0]
+        return detached_copy(self.model, values) if values is not None else None
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        return self.coalesce(
+            f"id:{id}",
+            lambda: db.query(self.model).filter(self.model.id == id).first(),
+        )
+
+    def get_many(
+        self, db: Session, ids: Sequence[Any], chunk_size: int = 500
+    ) -> List[Optional[ModelType]]:
+        """
+        Rows for `ids` with one `id IN (...)` query per chunk of distinct
+        ids, in input order, with None where no row has that id.
+        """
+        by_id: Dict[Any, ModelType] = {}
+        for _, chunk in chunked(list(dict.fromkeys(ids)), chunk_size):
+            rows = db.scalars(select(self.model).where(self.model.id.in_(chunk)))
+            by_id.update((obj.id, obj) for obj in rows)
+        return [by_id.get(id) for id in ids]
 
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return (
+            db.query(self.model)
+            .order_by(self.model.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "id",
+    ) -> Page:
+        query = keyset_query(
+            self.model,
+            order_by=order_by,
+            cursor=cursor,
+            limit=limit,
+            sortable_columns=self.sortable_columns,
+        )
+        rows = list(db.scalars(query).all())
+        return keyset_page(rows, order_by=order_by, limit=limit)
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
@@ -58,4 +271,587 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
-        return obj 
\ No newline at end of file
+        return obj 
+
+
+class AsyncBaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Async counterpart of BaseRepository for use with AsyncSession.
+
+    When a cache is given, `get` and `get_many` are read-through: rows are cached as plain
+    column dicts and handed back as detached instances, and every write
+    invalidates the keys returned by `cache_keys` for the rows it touched.
+    With a SingleFlight, concurrent lookups of the same row that miss the
+    cache share one query.
+
+    Reads that take `columns` select only those columns (plus id and the
+    columns the query itself needs) and return Core rows with attribute
+    access instead of ORM instances, so nothing half-loaded ever enters
+    the session's identity map or the cache.
+
+    `hidden_columns` are never cached either: a row served from the cache
+    has them set to None, so code that needs them must query for them.
+    """
+
+    sortable_columns: Sequence[str] = ("id", "created_at")
+    # Columns that `columns=` may never select and the cache never holds
+    hidden_columns: Sequence[str] = ()
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        cache: Optional[TwoTierCache] = None,
+        flight: Optional[SingleFlight] = None,
+    ):
+        self.model = model
+        self.cache = cache
+        self.flight = flight
+
+    async def coalesce(
+        self,
+        db: AsyncSession,
+        key: str,
+        load: Callable[[], Awaitable[Optional[ModelType]]],
+    ) -> Optional[ModelType]:
+        """
+        Run `load` once for concurrent callers asking for the same `key`.
+        The caller that ran it gets its own instance; the others get
+        detached copies of its column values, never an object bound to
+        another request's session.
+
+        Callers whose `db` reads from the primary (it has written, or the
+        read-your-writes window is open) only share with each other, never
+        with a replica read that may not see their writes yet.
+        """
+        if self.flight is None:
+            return await load()
+        if reads_from_primary(db):
+            key = f"primary:{key}"
+        own: List[Optional[ModelType]] = []
+
+        async def run() -> Optional[Dict[str, Any]]:
+            obj = await load()
+            own.append(obj)
+            return column_values(obj) if obj is not None else None
+
+        values = await self.flight.do(key, run)
+        if own:
+            return own[0]
+        return detached_copy(self.model, values) if values is not None else None
+
+    def cache_keys(self, obj: ModelType) -> List[str]:
+        """Cache keys that must be dropped when `obj` changes."""
+        return [f"id:{obj.id}"]
+
+    def to_cache(self, obj: ModelType) -> Dict[str, Any]:
+        data = {}
+        for column in self.model.__table__.columns:
+            if column.key in self.hidden_columns:
+                continue
+            value = getattr(obj, column.key)
+            data[column.key] = value.isoformat() if isinstance(value, datetime) else value
+        return data
+
+    def from_cache(self, data: Dict[str, Any]) -> ModelType:
+        values = dict(data)
+        for column in self.model.__table__.columns:
+            if column.key in self.hidden_columns:
+                values[column.key] = None
+            elif isinstance(column.type, DateTime) and values.get(column.key):
+                values[column.key] = datetime.fromisoformat(values[column.key])
+        obj = self.model(**values)
+        make_transient_to_detached(obj)
+        return obj
+
+    async def invalidate(self, objs: Sequence[ModelType]) -> None:
+        if self.cache is not None:
+            await self.cache.invalidate(
+                key for obj in objs for key in self.cache_keys(obj)
+            )
+
+    def _columns(self, columns: Sequence[str], *required: str) -> List[str]:
+        return narrow_columns(
+            self.model, columns, hidden=self.hidden_columns, required=("id", *required)
+        )
+
+    async def get(
+        self, db: AsyncSession, id: Any, columns: Optional[Sequence[str]] = None
+    ) -> Optional[ModelType]:
+        """
+        A row by id. With `columns`, a cached row is still served whole;
+        on a cache miss only those columns are queried, and not cached.
+        """
+        if self.cache is not None:
+            data = await self.cache.get(f"id:{id}")
+            if data is not None:
+                return self.from_cache(data)
+        if columns:
+            query = select(
+                *(getattr(self.model, column) for column in self._columns(columns))
+            ).where(self.model.id == id)
+            return (await db.execute(query)).first()
+
+        async def load() -> Optional[ModelType]:
+            obj = await db.get(self.model, id)
+            if obj is not None and self.cache is not None:
+                await self.cache.set(f"id:{id}", self.to_cache(obj))
+            return obj
+
+        return await self.coalesce(db, f"id:{id}", load)
+
+    async def get_many(
+        self, db: AsyncSession, ids: Sequence[Any], chunk_size: int = 500
+    ) -> List[Optional[ModelType]]:
+        """
+        Rows for `ids` in input order, with None where no row has that id.
+        Cached rows come from one cache lookup; the rest are read with one
+        `id IN (...)` query per chunk of distinct ids and then cached.
+        """
+        distinct = list(dict.fromkeys(ids))
+        by_id: Dict[Any, ModelType] = {}
+        if self.cache is not None:
+            cached = await self.cache.get_many([f"id:{id}" for id in distinct])
+            by_id.update(
+                (id, self.from_cache(data)) for id, data in zip(distinct, cached) if data is not None
+            )
+        missing = [id for id in distinct if id not in by_id]
+        for _, chunk in chunked(missing, chunk_size):
+            rows = list(await db.scalars(select(self.model).where(self.model.id.in_(chunk))))
+            by_id.update((obj.id, obj) for obj in rows)
+            if self.cache is not None and rows:
+                await self.cache.set_many({f"id:{obj.id}": self.to_cache(obj) for obj in rows})
+        return [by_id.get(id) for id in ids]
+
+    async def get_updated_at(self, db: AsyncSession, id: Any) -> Optional[datetime]:
+        """
+        `updated_at` of a row, for freshness checks: read from the cache when
+        the row is there, else a query on that one column. None when no row
+        has that id.
+        """
+        if self.cache is not None:
+            data = await self.cache.get(f"id:{id}")
+            if data is not None:
+                return datetime.fromisoformat(data["updated_at"])
+        return await db.scalar(
+            select(self.model.updated_at).where(self.model.id == id)
+        )
+
+    async def count(self, db: AsyncSession) -> int:
+        """Exact row count; a full scan of the table or an index."""
+        return await db.scalar(select(func.count()).select_from(self.model))
+
+    async def estimate_count(self, db: AsyncSession) -> Optional[int]:
+        """
+        The Postgres planner's row estimate: pg_class.reltuples scaled by the
+        table's current size, as the planner itself does. None on other
+        databases and for tables never vacuumed or analyzed.
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        estimate = await db.scalar(
+            text(
+                "SELECT CASE WHEN c.reltuples < 0 THEN NULL"
+                " WHEN c.relpages = 0 THEN c.reltuples"
+                " ELSE c.reltuples / c.relpages"
+                " * (pg_relation_size(c.oid) / current_setting('block_size')::int)"
+                " END FROM pg_class c WHERE c.oid = to_regclass(:table)"
+            ),
+            {"table": self.model.__tablename__},
+        )
+        return int(estimate) if estimate is not None else None
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        if columns:
+            query = select(
+                *(getattr(self.model, column) for column in self._columns(columns))
+            )
+            result = await db.execute(
+                query.order_by(self.model.id).offset(skip).limit(limit)
+            )
+            return list(result.all())
+        result = await db.scalars(
+            select(self.model).order_by(self.model.id).offset(skip).limit(limit)
+        )
+        return list(result.all())
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        *,
+        columns: Sequence[str],
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Yield the given columns of every row, ordered by id, in lists of at
+        most `batch_size` rows. Uses a server-side cursor (stream_results +
+        yield_per) and Core rows rather than ORM instances, so memory stays
+        flat however large the table is.
+        """
+        query = (
+            select(*(getattr(self.model, column) for column in columns))
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page:
+        if columns:
+            # The cursor is built from the last row's sort column
+            columns = self._columns(columns, order_by)
+        query = keyset_query(
+            self.model,
+            order_by=order_by,
+            cursor=cursor,
+            limit=limit,
+            sortable_columns=self.sortable_columns,
+            columns=columns,
+        )
+        if columns:
+            rows = list((await db.execute(query)).all())
+        else:
+            rows = list((await db.scalars(query)).all())
+        return keyset_page(rows, order_by=order_by, limit=limit)
+
+    async def create(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: Union[CreateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """
+        INSERT ... RETURNING in a single round-trip. Constraint violations
+        surface as IntegrityError (after rolling back) for the caller to map.
+        """
+        obj_in_data = jsonable_encoder(obj_in)
+        try:
+            db_obj = await db.scalar(
+                insert(self.model).values(**obj_in_data).returning(self.model)
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        if inspect(db_obj).detached:
+            # Instances served from the cache are not attached to this session
+            db_obj = await db.merge(db_obj, load=False)
+        stale_keys = self.cache_keys(db_obj) if self.cache is not None else []
+        columns = self.model.__table__.columns.keys()
+        for field, value in update_data.items():
+            if field in columns:
+                setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        if self.cache is not None:
+            await self.cache.invalidate(stale_keys + self.cache_keys(db_obj))
+        return db_obj
+
+    async def _expire_loaded(self, db: AsyncSession, ids: Sequence[Any]) -> None:
+        """
+        Expire instances of these rows already in the session, so the rows
+        an UPDATE/DELETE ... RETURNING hands back overwrite their state
+        instead of being matched to it unchanged (populate_existing is not
+        applied to ORM UPDATE and DELETE). Pending changes are flushed first.
+        """
+        session = db.sync_session
+        loaded = [
+            obj for obj in (
+                session.identity_map.get(session.identity_key(self.model, id)) for id in ids
+            )
+            if obj is not None
+        ]
+        if not loaded:
+            return
+        await db.flush()
+        for obj in loaded:
+            session.expire(obj)
+
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """
+        UPDATE ... WHERE id = :id RETURNING in a single round-trip, without
+        loading the row first. Returns None when no row has that id.
+        """
+        values = self._update_values(obj_in)
+        if not values:
+            return await self.get(db, id=id)
+        await self._expire_loaded(db, [id])
+        try:
+            db_obj = await db.scalar(
+                update(self.model)
+                .where(self.model.id == id)
+                .values(**values)
+                .returning(self.model)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
+        if db_obj is not None:
+            await self.invalidate([db_obj])
+        return db_obj
+
+    async def update_by_id_with_before(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[ModelType]]:
+        """
+        update_by_id that also returns the row's column values from before
+        the update; (None, None) when no row has that id. On PostgreSQL the
+        old row comes from a locked sub-select joined into the same
+        UPDATE ... FROM ... RETURNING; elsewhere a SELECT ... FOR UPDATE
+        precedes the UPDATE in its transaction.
+        """
+        values = self._update_values(obj_in)
+        if not values:
+            obj = await self.get(db, id=id)
+            return (column_values(obj) if obj is not None else None), obj
+        table = self.model.__table__
+        keys = table.columns.keys()
+        await self._expire_loaded(db, [id])
+        try:
+            if _dialect(db) == "postgresql":
+                old = select(table).where(table.c.id == id).with_for_update().subquery("old")
+                row = (await db.execute(
+                    update(self.model)
+                    .where(self.model.id == old.c.id)
+                    .values(**values)
+                    .returning(self.model, *(old.c[key].label(f"old_{key}") for key in keys))
+                    .execution_options(synchronize_session=False)
+                )).first()
+                before = {key: row._mapping[f"old_{key}"] for key in keys} if row else None
+                db_obj = row[0] if row else None
+            else:
+                old_row = (await db.execute(
+                    select(table).where(table.c.id == id).with_for_update()
+                )).first()
+                before = dict(old_row._mapping) if old_row is not None else None
+                db_obj = None
+                if old_row is not None:
+                    db_obj = await db.scalar(
+                        update(self.model)
+                        .where(self.model.id == id)
+                        .values(**values)
+                        .returning(self.model)
+                        .execution_options(synchronize_session=False)
+                    )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
+        if db_obj is not None:
+            await self.invalidate([db_obj])
+        return before, db_obj
+
+    def _update_values(self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        columns = self.model.__table__.columns.keys()
+        return {k: v for k, v in update_data.items() if k in columns and k != "id"}
+
+    async def delete(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        """DELETE ... RETURNING in a single round-trip; None when nothing matched."""
+        await self._expire_loaded(db, [id])
+        obj = await db.scalar(
+            delete(self.model)
+            .where(self.model.id == id)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if obj is not None:
+            await self.invalidate([obj])
+        return obj
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        chunk_size: int = 500,
+    ) -> BulkResult:
+        """
+        Insert rows with one multi-row INSERT ... RETURNING per chunk, and
+        commit once per chunk. Each chunk runs under a savepoint; if it
+        violates a constraint only the savepoint is rolled back, so rows
+        returned by earlier chunks are not expired, and the chunk is retried
+        row by row under savepoints: only the offending items are reported
+        and the rest of the chunk still lands.
+        """
+        items: List[ModelType] = []
+        errors: List[BulkError] = []
+        rows = [jsonable_encoder(obj_in) for obj_in in objs_in]
+        statement = insert(self.model).returning(
+            self.model, sort_by_parameter_order=True
+        )
+        for offset, chunk in chunked(rows, chunk_size):
+            try:
+                async with db.begin_nested():
+                    created = (await db.scalars(statement, chunk)).all()
+                await db.commit()
+                items.extend(created)
+                continue
+            except IntegrityError:
+                pass
+            for position, row in enumerate(chunk, start=offset):
+                try:
+                    async with db.begin_nested():
+                        items.append(await db.scalar(statement, [row]))
+                except IntegrityError as exc:
+                    errors.append(BulkError(position, None, _integrity_detail(exc)))
+            await db.commit()
+        return BulkResult(items=items, errors=errors)
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        chunk_size: int = 500,
+        with_before: bool = False,
+    ) -> BulkResult:
+        """
+        Apply per-row updates, each a dict carrying the primary key `id`.
+        Every chunk costs one SELECT for existence, one executemany UPDATE
+        and one SELECT to return the new state, then a commit. A chunk that
+        violates a constraint is retried row by row under savepoints, as in
+        `create_many`.
+
+        With `with_before`, the existence SELECT reads the whole rows, FOR
+        UPDATE, and the result's `before` maps ids to their old values.
+        """
+        items: List[ModelType] = []
+        errors: List[BulkError] = []
+        before: Optional[Dict[Any, Dict[str, Any]]] = {} if with_before else None
+        table = self.model.__table__
+        columns = set(table.columns.keys())
+        for offset, chunk in chunked(list(objs_in), chunk_size):
+            ids = [row["id"] for row in chunk]
+            if before is not None:
+                old_rows = (await db.execute(
+                    select(table).where(table.c.id.in_(ids)).with_for_update()
+                )).all()
+                before.update((row.id, dict(row._mapping)) for row in old_rows)
+                existing = {row.id for row in old_rows}
+            else:
+                existing = set(
+                    (await db.scalars(
+                        select(self.model.id).where(self.model.id.in_(ids))
+                    )).all()
+                )
+            pending = []
+            for position, row in enumerate(chunk, start=offset):
+                if row["id"] not in existing:
+                    errors.append(BulkError(position, row["id"], NOT_FOUND))
+                else:
+                    pending.append(
+                        (position, {k: v for k, v in row.items() if k in columns})
+                    )
+            if not pending:
+                continue
+            try:
+                async with db.begin_nested():
+                    await db.execute(update(self.model), [row for _, row in pending])
+                await db.commit()
+            except IntegrityError:
+                failed = set()
+                for position, row in pending:
+                    try:
+                        async with db.begin_nested():
+                            await db.execute(update(self.model), [row])
+                    except IntegrityError as exc:
+                        failed.add(position)
+                        errors.append(
+                            BulkError(position, row["id"], _integrity_detail(exc))
+                        )
+                await db.commit()
+                pending = [(p, row) for p, row in pending if p not in failed]
+            updated_ids = list(dict.fromkeys(row["id"] for _, row in pending))
+            updated = await db.scalars(
+                select(self.model)
+                .where(self.model.id.in_(updated_ids))
+                .execution_options(populate_existing=True)
+            )
+            by_id = {obj.id: obj for obj in updated}
+            items.extend(by_id[id] for id in updated_ids if id in by_id)
+        # Keys derived from pre-update values (e.g. an old email) are not
+        # known here; lookups by such keys re-check the row they point to.
+        await self.invalidate(items)
+        errors.sort(key=lambda error: error.index)
+        return BulkResult(items=items, errors=errors, before=before)
+
+    async def delete_many(
+        self, db: AsyncSession, *, ids: Sequence[Any], chunk_size: int = 500
+    ) -> BulkResult:
+        """
+        Delete rows with one DELETE ... WHERE id IN (...) RETURNING per
+        chunk; ids that matched no row are reported as not found.
+        """
+        items: List[ModelType] = []
+        errors: List[BulkError] = []
+        for offset, chunk in chunked(list(ids), chunk_size):
+            await self._expire_loaded(db, chunk)
+            deleted = (await db.scalars(
+                delete(self.model)
+                .where(self.model.id.in_(chunk))
+                .returning(self.model)
+                .execution_options(synchronize_session=False)
+            )).all()
+            await db.commit()
+            by_id = {obj.id: obj for obj in deleted}
+            for position, id in enumerate(chunk, start=offset):
+                if id in by_id:
+                    items.append(by_id.pop(id))
+                else:
+                    errors.append(BulkError(position, id, NOT_FOUND))
+        await self.invalidate(items)
+        return BulkResult(items=items, errors=errors)
+
+
+def _dialect(db: AsyncSession) -> str:
+    return db.bind.dialect.name if db.bind is not None else ""
+
+
+def _integrity_detail(exc: IntegrityError) -> str:
+    return str(exc.orig).splitlines()[0] if exc.orig else "Integrity error"
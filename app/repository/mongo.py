@@ -0,0 +1,405 @@
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.errors import BadRequestException
+from app.repository.base import (
+    NOT_FOUND,
+    BulkError,
+    BulkResult,
+    CreateSchemaType,
+    ModelType,
+    UpdateSchemaType,
+    chunked,
+    column_values,
+    keyset_page,
+    narrow_columns,
+)
+from app.repository.pagination import Page, decode_cursor
+
+COUNTERS_COLLECTION = "counters"
+
+
+class MongoBaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    AsyncBaseRepository counterpart backed by a Motor collection.
+
+    Documents mirror the model's columns, with the integer primary key
+    stored as `_id` (allocated from a counters collection) so ids stay
+    compatible with the SQL backend, and are returned as transient model
+    instances. The `db` argument of every method is accepted for interface
+    compatibility and ignored.
+    """
+
+    sortable_columns: Sequence[str] = ("id", "created_at")
+    # Fields left out of list queries; the API never returns them
+    list_exclude: Sequence[str] = ()
+
+    def __init__(self, model: Type[ModelType], collection: AsyncIOMotorCollection):
+        self.model = model
+        self.collection = collection
+        self.counters = collection.database[COUNTERS_COLLECTION]
+        self.columns = self.model.__table__.columns.keys()
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index([("created_at", ASCENDING), ("_id", ASCENDING)])
+
+    async def invalidate(self, objs: Sequence[ModelType]) -> None:
+        """No cache in front of this backend; kept for interface parity."""
+
+    def to_model(self, doc: Dict[str, Any]) -> ModelType:
+        values = {key: value for key, value in doc.items() if key in self.columns}
+        values["id"] = doc["_id"]
+        return self.model(**values)
+
+    def to_document(self, obj_in: Union[CreateSchemaType, Dict[str, Any]], id: int) -> Dict[str, Any]:
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+        now = datetime.utcnow()
+        doc: Dict[str, Any] = {"_id": id}
+        for column in self.model.__table__.columns:
+            if column.key == "id":
+                continue
+            value = data.get(column.key)
+            if value is None and column.default is not None and column.default.is_scalar:
+                value = column.default.arg
+            if value is None and column.key in ("created_at", "updated_at"):
+                value = now
+            # Unset rather than null, so the collection validator accepts it
+            if value is not None:
+                doc[column.key] = value
+        return doc
+
+    async def _allocate_ids(self, count: int) -> List[int]:
+        counter = await self.counters.find_one_and_update(
+            {"_id": self.collection.name},
+            {"$inc": {"seq": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        last = counter["seq"]
+        return list(range(last - count + 1, last + 1))
+
+    def _update_spec(self, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        values = {k: v for k, v in update_data.items() if k in self.columns and k != "id"}
+        spec: Dict[str, Any] = {}
+        to_set = {k: v for k, v in values.items() if v is not None}
+        to_unset = {k: "" for k, v in values.items() if v is None}
+        to_set["updated_at"] = datetime.utcnow()
+        spec["$set"] = to_set
+        if to_unset:
+            spec["$unset"] = to_unset
+        return spec
+
+    def _list_projection(
+        self, columns: Optional[Sequence[str]] = None, *required: str
+    ) -> Optional[Dict[str, int]]:
+        if columns:
+            # Same rules as the SQL backend; list_exclude fields are never selectable
+            columns = narrow_columns(
+                self.model, columns, hidden=self.list_exclude, required=required
+            )
+            return {column: 1 for column in columns if column != "id"}
+        return {field: 0 for field in self.list_exclude} or None
+
+    async def get(
+        self, db: Any, id: Any, columns: Optional[Sequence[str]] = None
+    ) -> Optional[ModelType]:
+        projection = self._list_projection(columns) if columns else None
+        doc = await self.collection.find_one({"_id": id}, projection)
+        return self.to_model(doc) if doc is not None else None
+
+    async def get_many(
+        self, db: Any, ids: Sequence[Any], chunk_size: int = 500
+    ) -> List[Optional[ModelType]]:
+        by_id: Dict[Any, ModelType] = {}
+        for _, chunk in chunked(list(dict.fromkeys(ids)), chunk_size):
+            cursor = self.collection.find({"_id": {"$in": chunk}}).batch_size(len(chunk))
+            async for doc in cursor:
+                by_id[doc["_id"]] = self.to_model(doc)
+        return [by_id.get(id) for id in ids]
+
+    async def get_updated_at(self, db: Any, id: Any) -> Optional[datetime]:
+        doc = await self.collection.find_one({"_id": id}, {"updated_at": 1})
+        return doc.get("updated_at") if doc is not None else None
+
+    async def count(self, db: Any) -> int:
+        return await self.collection.count_documents({})
+
+    async def estimate_count(self, db: Any) -> Optional[int]:
+        """Document count from collection metadata, without a scan."""
+        return await self.collection.estimated_document_count()
+
+    async def get_multi(
+        self,
+        db: Any,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        cursor = (
+            self.collection.find({}, self._list_projection(columns))
+            .sort("_id", ASCENDING)
+            .skip(skip)
+            .limit(limit)
+            .batch_size(limit)
+        )
+        return [self.to_model(doc) async for doc in cursor]
+
+    async def stream(
+        self,
+        db: Any,
+        *,
+        columns: Sequence[str],
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Yield the given fields of every document, ordered by id, in lists
+        of at most `batch_size` rows. Only those fields are projected, and
+        the cursor's batch size matches so each list is one getMore.
+        """
+        fields = ["_id" if column == "id" else column for column in columns]
+        projection = {field: 1 for field in fields}
+        cursor = (
+            self.collection.find({}, projection)
+            .sort("_id", ASCENDING)
+            .batch_size(batch_size)
+        )
+        while True:
+            docs = await cursor.to_list(length=batch_size)
+            if not docs:
+                return
+            yield [tuple(doc.get(field) for field in fields) for doc in docs]
+
+    async def get_page(
+        self,
+        db: Any,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        columns: Optional[Sequence[str]] = None,
+    ) -> Page:
+        if order_by not in self.sortable_columns:
+            raise BadRequestException(f"Cannot order by {order_by!r}")
+        query: Dict[str, Any] = {}
+        if order_by == "id":
+            sort = [("_id", ASCENDING)]
+            if cursor:
+                _, last_id = decode_cursor(cursor, order_by)
+                query = {"_id": {"$gt": last_id}}
+        else:
+            sort = [(order_by, ASCENDING), ("_id", ASCENDING)]
+            if cursor:
+                sort_type = getattr(self.model, order_by).type.python_type
+                last_value, last_id = decode_cursor(cursor, order_by, sort_type)
+                query = {"$or": [
+                    {order_by: {"$gt": last_value}},
+                    {order_by: last_value, "_id": {"$gt": last_id}},
+                ]}
+        # One extra document tells whether there is a next page
+        docs = (
+            self.collection.find(query, self._list_projection(columns, order_by))
+            .sort(sort)
+            .limit(limit + 1)
+            .batch_size(limit + 1)
+        )
+        rows = [self.to_model(doc) async for doc in docs]
+        return keyset_page(rows, order_by=order_by, limit=limit)
+
+    async def create(
+        self, db: Any, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """Insert one document; a unique index violation raises DuplicateKeyError."""
+        (id,) = await self._allocate_ids(1)
+        doc = self.to_document(obj_in, id)
+        await self.collection.insert_one(doc)
+        return self.to_model(doc)
+
+    async def update(
+        self,
+        db: Any,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        return await self.update_by_id(db, id=db_obj.id, obj_in=obj_in)
+
+    async def update_by_id(
+        self,
+        db: Any,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """Update and return the new document in one find_one_and_update."""
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        if not any(k in self.columns and k != "id" for k in update_data):
+            return await self.get(db, id=id)
+        doc = await self.collection.find_one_and_update(
+            {"_id": id},
+            self._update_spec(update_data),
+            return_document=ReturnDocument.AFTER,
+        )
+        return self.to_model(doc) if doc is not None else None
+
+    async def update_by_id_with_before(
+        self,
+        db: Any,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[ModelType]]:
+        """
+        update_by_id that also returns the document's values from before
+        the update: one find_one_and_update returning the old document,
+        with the update applied to it here.
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        if not any(k in self.columns and k != "id" for k in update_data):
+            obj = await self.get(db, id=id)
+            return (column_values(obj) if obj is not None else None), obj
+        spec = self._update_spec(update_data)
+        doc = await self.collection.find_one_and_update(
+            {"_id": id}, spec, return_document=ReturnDocument.BEFORE
+        )
+        if doc is None:
+            return None, None
+        after = {**doc, **spec["$set"]}
+        for key in spec.get("$unset", {}):
+            after.pop(key, None)
+        return column_values(self.to_model(doc)), self.to_model(after)
+
+    async def delete(self, db: Any, *, id: int) -> Optional[ModelType]:
+        doc = await self.collection.find_one_and_delete({"_id": id})
+        return self.to_model(doc) if doc is not None else None
+
+    async def create_many(
+        self,
+        db: Any,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        chunk_size: int = 500,
+    ) -> BulkResult:
+        """
+        One unordered insert_many per chunk, after reserving all ids in a
+        single counter update. Documents rejected by the server (e.g. a
+        duplicate email) are reported and the rest of the chunk still lands.
+        """
+        items: List[ModelType] = []
+        errors: List[BulkError] = []
+        ids = await self._allocate_ids(len(objs_in)) if objs_in else []
+        docs = [self.to_document(obj_in, id) for obj_in, id in zip(objs_in, ids)]
+        for offset, chunk in chunked(docs, chunk_size):
+            failed: Dict[int, str] = {}
+            try:
+                await self.collection.insert_many(chunk, ordered=False)
+            except BulkWriteError as exc:
+                for error in exc.details.get("writeErrors", []):
+                    failed[error["index"]] = error["errmsg"].splitlines()[0]
+            for index, doc in enumerate(chunk):
+                if index in failed:
+                    errors.append(BulkError(offset + index, None, failed[index]))
+                else:
+                    items.append(self.to_model(doc))
+        return BulkResult(items=items, errors=errors)
+
+    async def update_many(
+        self,
+        db: Any,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        chunk_size: int = 500,
+        with_before: bool = False,
+    ) -> BulkResult:
+        """
+        Apply per-document updates, each a dict carrying `id`. Every chunk
+        costs one find for existence, one unordered bulk_write and one find
+        to return the new state. With `with_before`, the existence find
+        reads whole documents and the result's `before` maps ids to their
+        old values.
+        """
+        items: List[ModelType] = []
+        errors: List[BulkError] = []
+        before: Optional[Dict[Any, Dict[str, Any]]] = {} if with_before else None
+        for offset, chunk in chunked(list(objs_in), chunk_size):
+            ids = [row["id"] for row in chunk]
+            projection = None if before is not None else {"_id": 1}
+            existing = set()
+            async for doc in self.collection.find({"_id": {"$in": ids}}, projection):
+                existing.add(doc["_id"])
+                if before is not None:
+                    before[doc["_id"]] = column_values(self.to_model(doc))
+            pending = []
+            for position, row in enumerate(chunk, start=offset):
+                if row["id"] not in existing:
+                    errors.append(BulkError(position, row["id"], NOT_FOUND))
+                else:
+                    pending.append((position, row))
+            if not pending:
+                continue
+            failed = set()
+            try:
+                await self.collection.bulk_write(
+                    [UpdateOne({"_id": row["id"]}, self._update_spec(row)) for _, row in pending],
+                    ordered=False,
+                )
+            except BulkWriteError as exc:
+                for error in exc.details.get("writeErrors", []):
+                    position, row = pending[error["index"]]
+                    failed.add(position)
+                    errors.append(
+                        BulkError(position, row["id"], error["errmsg"].splitlines()[0])
+                    )
+            updated_ids = list(dict.fromkeys(
+                row["id"] for position, row in pending if position not in failed
+            ))
+            by_id = {
+                doc["_id"]: self.to_model(doc)
+                async for doc in self.collection.find({"_id": {"$in": updated_ids}})
+            }
+            items.extend(by_id[id] for id in updated_ids if id in by_id)
+        errors.sort(key=lambda error: error.index)
+        return BulkResult(items=items, errors=errors, before=before)
+
+    async def delete_many(
+        self, db: Any, *, ids: Sequence[Any], chunk_size: int = 500
+    ) -> BulkResult:
+        """
+        Per chunk, fetch the documents to return and remove them with one
+        delete_many; ids that matched nothing are reported as not found.
+        """
+        items: List[ModelType] = []
+        errors: List[BulkError] = []
+        for offset, chunk in chunked(list(ids), chunk_size):
+            by_id = {
+                doc["_id"]: self.to_model(doc)
+                async for doc in self.collection.find({"_id": {"$in": chunk}})
+            }
+            if by_id:
+                await self.collection.delete_many({"_id": {"$in": list(by_id)}})
+            for position, id in enumerate(chunk, start=offset):
+                if id in by_id:
+                    items.append(by_id.pop(id))
+                else:
+                    errors.append(BulkError(position, id, NOT_FOUND))
+        return BulkResult(items=items, errors=errors)
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Generic, List, NamedTuple, Optional, TypeVar
+
+from app.core.errors import BadRequestException
+
+ItemType = TypeVar("ItemType")
+
+
+class Page(NamedTuple, Generic[ItemType]):
+    """A page of results and the opaque cursor for the page after it"""
+    items: List[ItemType]
+    next_cursor: Optional[str]
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(order_by: str, sort_value: Any, id: Any) -> str:
+    """
+    Encode the position after a row as an opaque, URL-safe cursor.
+
+    Args:
+        order_by: Name of the column the page is sorted on
+        sort_value: Value of that column for the last row of the page
+        id: Primary key of the last row, used as the tie-breaker
+
+    Returns:
+        str: Cursor to pass back to fetch the next page
+    """
+    payload = json.dumps(
+        [order_by, _dump_value(sort_value), id], separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _is_a(value: Any, expected: type) -> bool:
+    # bool is an int subclass, but never a valid id or integer sort value
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, order_by: str, sort_type: Optional[type] = None) -> tuple:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor received from the client
+        order_by: Sort column of the current request
+        sort_type: Python type of the sort column's values, when known
+
+    Returns:
+        tuple: (sort_value, id) of the last row of the previous page
+
+    Raises:
+        BadRequestException: If the cursor is malformed, its values are
+            not of the sort column's and id's types, or it was issued for
+            a different sort column
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        column, sort_value, id = json.loads(base64.urlsafe_b64decode(padded))
+        sort_value = _load_value(sort_value)
+    except (ValueError, TypeError):
+        raise BadRequestException("Invalid pagination cursor")
+    if column != order_by:
+        raise BadRequestException("Pagination cursor does not match order_by")
+    if not _is_a(id, int) or (sort_type is not None and not _is_a(sort_value, sort_type)):
+        raise BadRequestException("Invalid pagination cursor")
+    return sort_value, id
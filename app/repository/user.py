@@ -1,10 +1,34 @@
-from typing import Optional
+import re
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.cache import CachedCount, LocalTTLCache, TwoTierCache
+from app.core.config import get_settings
+from app.core.singleflight import SingleFlight, ThreadedSingleFlight
+from app.db.session import get_mongodb, get_redis
 from app.models.user import User
-from app.repository.base import BaseRepository
+from app.repository.base import AsyncBaseRepository, BaseRepository, escape_like
+from app.repository.mongo import MongoBaseRepository
 from app.api.v1.schemas.user import UserCreate, UserUpdate
 
+# Shorter search queries match prefixes only: trigram indexes need at
+# least three characters to narrow a substring match
+SEARCH_SUBSTRING_MIN_LENGTH = 3
+
+
+def search_rank(user: User, needle: str) -> tuple:
+    """Sort key of a search hit: email prefix, then name prefix, then the rest."""
+    if user.email.lower().startswith(needle):
+        tier = 0
+    elif (user.full_name or "").lower().startswith(needle):
+        tier = 1
+    else:
+        tier = 2
+    return tier, len(user.email), user.id
+
 
 class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
     """
@@ -12,7 +36,91 @@ class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
     """
     
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
+        return self.coalesce(
+            f"email:{email}",
+            lambda: db.query(User).filter(User.email == email).first(),
+        )
+
+    def is_active(self, user: User) -> bool:
+        return user.is_active
+
+    def is_superuser(self, user: User) -> bool:
+        return user.is_superuser
+
+
+class AsyncUserRepository(AsyncBaseRepository[User, UserCreate, UserUpdate]):
+    """
+    Async user repository with custom methods for user-specific operations
+    """
+
+    hidden_columns = ("hashed_password",)
+
+    def cache_keys(self, obj: User) -> List[str]:
+        return super().cache_keys(obj) + [f"email:{obj.email}"]
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        if self.cache is not None:
+            # The email key only points at the id; the row itself lives under
+            # the id key, and is re-checked in case the email has since changed.
+            user_id = await self.cache.get(f"email:{email}")
+            if user_id is not None:
+                user = await self.get(db, id=user_id)
+                if user is not None and user.email == email:
+                    return user
+
+        async def load() -> Optional[User]:
+            user = await db.scalar(select(User).where(User.email == email))
+            if user is not None and self.cache is not None:
+                await self.cache.set(f"email:{email}", user.id)
+                await self.cache.set(f"id:{user.id}", self.to_cache(user))
+            return user
+
+        return await self.coalesce(db, f"email:{email}", load)
+
+    async def get_credentials(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        """
+        The user with `email` including `hashed_password`, which the cache
+        never holds, so this always reads the database.
+        """
+        return await self.coalesce(
+            db,
+            f"credentials:{email}",
+            lambda: db.scalar(select(User).where(User.email == email)),
+        )
+
+    async def search(
+        self, db: AsyncSession, *, q: str, limit: int = 20, active_only: bool = True
+    ) -> List[User]:
+        """
+        Users whose email or full name contains `q`, case-insensitively,
+        ranked by search_rank. Queries shorter than SEARCH_SUBSTRING_MIN_LENGTH
+        match prefixes only, served on Postgres by the lower(...)
+        text_pattern_ops indexes; longer ones match substrings through the
+        pg_trgm indexes. Both are partial on is_active. SQLite runs the same
+        query as a scan.
+        """
+        needle = q.lower()
+        prefix = f"{escape_like(needle)}%"
+        email = func.lower(User.email)
+        full_name = func.lower(User.full_name)
+        if len(needle) < SEARCH_SUBSTRING_MIN_LENGTH:
+            match = or_(email.like(prefix, escape="\\"), full_name.like(prefix, escape="\\"))
+        else:
+            pattern = f"%{escape_like(needle)}%"
+            match = or_(
+                User.email.ilike(pattern, escape="\\"),
+                User.full_name.ilike(pattern, escape="\\"),
+            )
+        rank = case(
+            (email.like(prefix, escape="\\"), 0),
+            (full_name.like(prefix, escape="\\"), 1),
+            else_=2,
+        )
+        query = select(User).where(match)
+        if active_only:
+            query = query.where(User.is_active)
+        query = query.order_by(rank, func.length(User.email), User.id).limit(limit)
+        return list((await db.scalars(query)).all())
 
     def is_active(self, user: User) -> bool:
         return user.is_active
@@ -21,5 +129,95 @@ class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
         return user.is_superuser
 
 
-# Create a singleton instance
-user_repository = UserRepository(User) 
\ No newline at end of file
+class MongoUserRepository(MongoBaseRepository[User, UserCreate, UserUpdate]):
+    """
+    User repository backed by the MongoDB `users` collection
+    (see services/mongodb/init/01-init.js)
+    """
+
+    list_exclude = ("hashed_password",)
+
+    async def ensure_indexes(self) -> None:
+        await super().ensure_indexes()
+        await self.collection.create_index([("email", ASCENDING)], unique=True)
+        await self.collection.create_index([("is_active", ASCENDING)])
+
+    async def get_by_email(self, db: Any, *, email: str) -> Optional[User]:
+        doc = await self.collection.find_one({"email": email})
+        return self.to_model(doc) if doc is not None else None
+
+    async def get_credentials(self, db: Any, *, email: str) -> Optional[User]:
+        return await self.get_by_email(db, email=email)
+
+    async def search(
+        self, db: Any, *, q: str, limit: int = 20, active_only: bool = True
+    ) -> List[User]:
+        """
+        Same matching as AsyncUserRepository.search, as unanchored regexes,
+        so this scans the collection. Prefix hits are fetched first so that
+        ranking never drops them in favour of weaker substring hits.
+        """
+        needle = q.lower()
+        escaped = re.escape(needle)
+        base = {"is_active": True} if active_only else {}
+        prefix = {"$or": [
+            {"email": {"$regex": f"^{escaped}", "$options": "i"}},
+            {"full_name": {"$regex": f"^{escaped}", "$options": "i"}},
+        ]}
+        queries = [prefix]
+        if len(needle) >= SEARCH_SUBSTRING_MIN_LENGTH:
+            queries.append({"$or": [
+                {"email": {"$regex": escaped, "$options": "i"}},
+                {"full_name": {"$regex": escaped, "$options": "i"}},
+            ]})
+        users: Dict[int, User] = {}
+        for query in queries:
+            cursor = self.collection.find(
+                {**base, **query, "_id": {"$nin": list(users)}}, self._list_projection()
+            ).limit(limit)
+            async for doc in cursor:
+                users[doc["_id"]] = self.to_model(doc)
+            if len(users) >= limit:
+                break
+        return sorted(users.values(), key=lambda user: search_rank(user, needle))[:limit]
+
+    def is_active(self, user: User) -> bool:
+        return user.is_active
+
+    def is_superuser(self, user: User) -> bool:
+        return user.is_superuser
+
+
+settings = get_settings()
+
+user_cache = TwoTierCache(
+    "users",
+    local=LocalTTLCache(
+        maxsize=settings.CACHE_LOCAL_MAXSIZE, ttl=settings.CACHE_LOCAL_TTL
+    ),
+    redis_factory=get_redis if settings.CACHE_REDIS_ENABLED else None,
+    redis_ttl=settings.CACHE_REDIS_TTL,
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+)
+
+user_count = CachedCount(
+    "users:count",
+    ttl=settings.COUNT_CACHE_TTL,
+    redis_factory=get_redis if settings.CACHE_REDIS_ENABLED else None,
+)
+
+user_flight = SingleFlight(timeout=settings.SINGLEFLIGHT_TIMEOUT)
+sync_user_flight = ThreadedSingleFlight(timeout=settings.SINGLEFLIGHT_TIMEOUT)
+
+# Create singleton instances
+user_repository = UserRepository(
+    User, flight=sync_user_flight if settings.SINGLEFLIGHT_ENABLED else None
+)
+if settings.USER_REPOSITORY_BACKEND == "mongo":
+    async_user_repository = MongoUserRepository(User, get_mongodb()["users"])
+else:
+    async_user_repository = AsyncUserRepository(
+        User,
+        cache=user_cache if settings.CACHE_ENABLED else None,
+        flight=user_flight if settings.SINGLEFLIGHT_ENABLED else None,
+    ) 
\ No newline at end of file
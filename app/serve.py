@@ -0,0 +1,240 @@
+"""
+Multi-worker server launcher.
+
+    python -m app.serve
+    python -m app.serve --workers 4 --port 8000
+
+A preforking supervisor: the parent binds the listening socket once and
+spawns uvicorn workers that all accept on it. It restarts workers that
+exit, whether recycled after SERVER_MAX_REQUESTS or crashed. SIGHUP
+replaces the workers one at a time; SIGTERM/SIGINT stops them gracefully.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from multiprocessing.context import SpawnProcess
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.core.logger import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+settings = get_settings()
+
+# A worker that dies sooner than this after starting is restarted after a
+# pause, so a broken deploy doesn't spin the supervisor
+MIN_WORKER_LIFETIME = 1.0
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may use: the scheduler affinity mask, further capped
+    by a cgroup CPU quota (v2 cpu.max or v1 cfs_quota_us) when one is set.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def pool_budget(workers: int, budget: int) -> Dict[str, int]:
+    """
+    Split a connection budget into per-worker pool settings. One spare
+    worker's share is held back, since a rolling restart briefly runs
+    workers + 1 processes.
+    """
+    per_worker = max(budget // (workers + 1), 2)
+    pool_size = max(per_worker // 2, 1)
+    return {"DB_POOL_SIZE": pool_size, "DB_MAX_OVERFLOW": per_worker - pool_size}
+
+
+def cache_overrides(workers: int) -> Dict[str, str]:
+    """
+    Settings that stop workers serving each other's stale users. The user
+    and token caches live in each process and only hear of another
+    worker's writes over Redis, so with several workers and no Redis
+    they are turned off.
+    """
+    if workers <= 1 or settings.CACHE_REDIS_ENABLED:
+        return {}
+    enabled = {"CACHE_ENABLED": settings.CACHE_ENABLED, "AUTH_CACHE_ENABLED": settings.AUTH_CACHE_ENABLED}
+    return {key: "false" for key, value in enabled.items() if value}
+
+
+def _run_worker(config: Dict[str, Any], sockets: List[socket.socket]) -> None:
+    import uvicorn
+
+    uvicorn.Server(uvicorn.Config(**config)).run(sockets=sockets)
+
+
+class Supervisor:
+    """Keeps `workers` uvicorn processes serving on one shared socket."""
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        workers: int,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: float = 30,
+    ):
+        self.config = config
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.processes: List[SpawnProcess] = []
+        self.started_at: Dict[int, float] = {}
+        self.should_exit = threading.Event()
+        self.should_reload = threading.Event()
+        self.context = multiprocessing.get_context("spawn")
+        self.sockets: List[socket.socket] = []
+
+    def _spawn(self) -> SpawnProcess:
+        config = dict(self.config)
+        if self.max_requests:
+            config["limit_max_requests"] = self.max_requests + random.randint(
+                0, self.max_requests_jitter
+            )
+        process = self.context.Process(target=_run_worker, args=(config, self.sockets))
+        process.start()
+        self.started_at[process.pid] = time.monotonic()
+        logger.info("Started worker %s", process.pid)
+        return process
+
+    def _stop(self, processes: List[SpawnProcess]) -> None:
+        # uvicorn drains in-flight requests on SIGTERM
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.graceful_timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Worker %s did not stop in time; killing it", process.pid)
+                process.kill()
+                process.join()
+            self.started_at.pop(process.pid, None)
+
+    def _reap(self) -> None:
+        for index, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            lifetime = time.monotonic() - self.started_at.pop(process.pid, 0)
+            if process.exitcode == 0:
+                logger.info("Worker %s exited (recycled); replacing it", process.pid)
+            else:
+                logger.warning("Worker %s died with exit code %s; replacing it", process.pid, process.exitcode)
+                if lifetime < MIN_WORKER_LIFETIME:
+                    self.should_exit.wait(MIN_WORKER_LIFETIME)
+            if self.should_exit.is_set():
+                return
+            self.processes[index] = self._spawn()
+
+    def _rolling_restart(self) -> None:
+        logger.info("Restarting %s workers one at a time", len(self.processes))
+        for index, old in enumerate(list(self.processes)):
+            if self.should_exit.is_set():
+                return
+            self.processes[index] = self._spawn()
+            self._stop([old])
+
+    def run(self) -> None:
+        import uvicorn
+
+        self.sockets = [uvicorn.Config(**self.config).bind_socket()]
+        signal.signal(signal.SIGTERM, lambda *args: self.should_exit.set())
+        signal.signal(signal.SIGINT, lambda *args: self.should_exit.set())
+        signal.signal(signal.SIGHUP, lambda *args: self.should_reload.set())
+
+        self.processes = [self._spawn() for _ in range(self.workers)]
+        while not self.should_exit.wait(0.5):
+            if self.should_reload.is_set():
+                self.should_reload.clear()
+                self._rolling_restart()
+            self._reap()
+
+        logger.info("Stopping %s workers", len(self.processes))
+        self._stop(self.processes)
+        for sock in self.sockets:
+            sock.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.serve")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS,
+                        help="Worker processes; 0 sizes from available CPUs")
+    parser.add_argument("--db-connection-budget", type=int, default=settings.DB_CONNECTION_BUDGET)
+    parser.add_argument("--max-requests", type=int, default=settings.SERVER_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.SERVER_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+
+    setup_logging()
+    workers = args.workers or available_cpus()
+    # Workers read their pool size from the environment they inherit
+    pool = pool_budget(workers, args.db_connection_budget)
+    os.environ.update({key: str(value) for key, value in pool.items()})
+    caches = cache_overrides(workers)
+    if caches:
+        logger.warning(
+            "Turning off %s: the caches are per worker and CACHE_REDIS_ENABLED "
+            "is off, so one worker's writes would not invalidate the others",
+            ", ".join(caches),
+        )
+        os.environ.update(caches)
+    logger.info(
+        "Serving on %s:%s with %s workers, pool_size=%s max_overflow=%s each",
+        args.host, args.port, workers, pool["DB_POOL_SIZE"], pool["DB_MAX_OVERFLOW"],
+    )
+
+    config = {
+        "app": "main:app",
+        "host": args.host,
+        "port": args.port,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        "log_config": None,
+    }
+    Supervisor(
+        config,
+        workers=workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+    ).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+from typing import Any, Optional
+
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import Principal, PrincipalCache, principal_cache
+from app.core.errors import ForbiddenException, UnauthorizedException
+from app.core.loader import DataLoader
+from app.core.security import create_access_token, decode_access_token
+from app.repository.user import async_user_repository, user_cache
+from app.services.user import async_user_service
+
+
+class AuthService:
+    """
+    Token issuing and verification.
+
+    With a principal cache, a token seen before is resolved from memory:
+    no signature check and no user lookup until the entry expires or the
+    user is updated or deleted.
+    """
+
+    def __init__(self, repository: Any, cache: Optional[PrincipalCache] = None):
+        self.repository = repository
+        self.cache = cache
+
+    async def login(self, db: AsyncSession, email: str, password: str) -> str:
+        user = await async_user_service.authenticate(db, email=email, password=password)
+        if not user:
+            raise UnauthorizedException("Incorrect email or password")
+        if not user.is_active:
+            raise ForbiddenException("Inactive user")
+        return create_access_token(user.id)
+
+    async def resolve(
+        self, db: AsyncSession, token: str, loader: Optional[DataLoader] = None
+    ) -> Principal:
+        """
+        Return the principal for a bearer token. With the request's user
+        loader, the user is fetched through it, so handlers that load the
+        same user get it for free.
+
+        Raises:
+            UnauthorizedException: If the token is invalid or expired, or
+                its user no longer exists
+        """
+        if self.cache is not None:
+            principal = self.cache.get(token)
+            if principal is not None:
+                return principal
+        try:
+            claims = decode_access_token(token)
+            user_id = int(claims["sub"])
+            expires_at = float(claims["exp"])
+        except (JWTError, KeyError, TypeError, ValueError):
+            raise UnauthorizedException()
+        if loader is not None:
+            user = await loader.load(user_id)
+        else:
+            user = await self.repository.get(db, id=user_id)
+        if user is None:
+            raise UnauthorizedException()
+        principal = Principal(
+            user_id=user.id,
+            email=user.email,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            expires_at=expires_at,
+        )
+        if self.cache is not None:
+            self.cache.set(token, principal)
+        return principal
+
+
+if principal_cache is not None:
+    # Updates and deletes seen by any worker (via the user cache's
+    # invalidation channel) drop that user's cached tokens
+    user_cache.add_invalidation_listener(principal_cache.on_user_cache_invalidated)
+
+# Create a singleton instance
+auth_service = AuthService(async_user_repository, cache=principal_cache)
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Sequence
+
+from app.db.session import AsyncSessionLocal
+from app.repository.user import async_user_repository
+
+# Columns included in exports; hashed_password is never exported
+USER_EXPORT_FIELDS = (
+    "id",
+    "email",
+    "full_name",
+    "is_active",
+    "is_superuser",
+    "created_at",
+    "updated_at",
+)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_ndjson(rows: Sequence[Any], fields: Sequence[str]) -> bytes:
+    return b"".join(
+        json.dumps(dict(zip(fields, row)), default=_json_default).encode() + b"\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: Sequence[Any], fields: Sequence[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def export_users(
+    format: str = "ndjson", *, gzip: bool = False, batch_size: int = 1000
+) -> AsyncIterator[bytes]:
+    """
+    Stream every user as NDJSON or CSV, one chunk per fetched batch.
+
+    The generator owns its session, so it stays valid for as long as the
+    response is being sent.
+
+    Args:
+        format: "ndjson" or "csv"
+        gzip: Compress the stream on the fly
+        batch_size: Rows fetched from the server-side cursor at a time
+
+    Yields:
+        bytes: Encoded (and optionally compressed) chunks
+    """
+    fields: List[str] = list(USER_EXPORT_FIELDS)
+    encode = encode_csv if format == "csv" else encode_ndjson
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+
+    def emit(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    if format == "csv":
+        yield emit(",".join(fields).encode() + b"\r\n")
+    async with AsyncSessionLocal() as db:
+        async for rows in async_user_repository.stream(
+            db, columns=fields, batch_size=batch_size
+        ):
+            chunk = emit(encode(rows, fields))
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.flush()
@@ -1,13 +1,35 @@
-from typing import Optional
+from datetime import datetime
+from typing import Iterable, List, Literal, Optional, Sequence, Tuple
+from pymongo.errors import DuplicateKeyError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
-from app.repository.user import user_repository
+from app.repository.user import async_user_repository, user_count, user_repository
 from app.models.user import User
-from app.api.v1.schemas.user import UserCreate, UserUpdate
-from app.core.errors import NotFoundException
+from app.api.v1.schemas.user import UserBulkUpdateItem, UserCreate, UserUpdate
+from app.core.audit import audit_log, diff
+from app.core.auth import principal_cache
+from app.core.config import get_settings
+from app.core.errors import BadRequestException, NotFoundException
+from app.core.loader import DataLoader
+from app.core.security import password_hasher, pwd_context
+from app.repository.base import NOT_FOUND, BulkResult, column_values
+from app.repository.pagination import Page
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+settings = get_settings()
+
+EMAIL_TAKEN = "The user with this email already exists in the system."
+# Reported for other constraint violations, in place of the driver's message
+CONSTRAINT_FAILED = "The user violates a database constraint."
+
+CountMode = Literal["exact", "estimated", "cached"]
+
+# Loaded alongside any field selection, so responses keep their validators
+VERSION_FIELDS = ("id", "updated_at")
+
+# Kept out of the audit trail; a change to it is recorded as "<redacted>"
+AUDIT_REDACTED = ("hashed_password",)
 
 
 class UserService:
@@ -80,5 +102,278 @@ class UserService:
         return pwd_context.verify(plain_password, hashed_password)
 
 
-# Create a singleton instance
-user_service = UserService() 
\ No newline at end of file
+class AsyncUserService:
+    """
+    Async user service used by the API routes
+    """
+
+    async def get_user(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        fields: Optional[Sequence[str]] = None,
+        loader: Optional[DataLoader] = None,
+    ) -> User:
+        """
+        The user, or with `fields` a row carrying only those fields. Given
+        the request's user loader (and no `fields`), the lookup joins its
+        batch and reuses a user the request already loaded.
+        """
+        if loader is not None and not fields:
+            user = await loader.load(user_id)
+        else:
+            user = await async_user_repository.get(
+                db=db, id=user_id, columns=self._columns(fields)
+            )
+        if not user:
+            raise NotFoundException(f"User with id {user_id} not found")
+        return user
+
+    async def get_users_by_ids(
+        self, db: AsyncSession, user_ids: Sequence[int]
+    ) -> List[Optional[User]]:
+        """Users for `user_ids` in the same order, None for ids with no user."""
+        self._check_bulk_size(len(user_ids))
+        if len(user_ids) == 1:
+            # A lone lookup, e.g. one route's user: keep get's single-flight
+            return [await async_user_repository.get(db=db, id=user_ids[0])]
+        return await async_user_repository.get_many(
+            db=db, ids=user_ids, chunk_size=settings.BULK_CHUNK_SIZE
+        )
+
+    async def get_user_updated_at(self, db: AsyncSession, user_id: int) -> datetime:
+        updated_at = await async_user_repository.get_updated_at(db=db, id=user_id)
+        if updated_at is None:
+            raise NotFoundException(f"User with id {user_id} not found")
+        return updated_at
+
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        return await async_user_repository.get_by_email(db=db, email=email)
+
+    async def search_users(
+        self, db: AsyncSession, q: str, limit: int = 20, active_only: bool = True
+    ) -> List[User]:
+        q = q.strip()
+        if not q:
+            return []
+        return await async_user_repository.search(
+            db=db, q=q, limit=limit, active_only=active_only
+        )
+
+    async def get_users(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[User]:
+        return await async_user_repository.get_multi(
+            db=db, skip=skip, limit=limit, columns=self._columns(fields)
+        )
+
+    async def get_users_page(
+        self,
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page:
+        return await async_user_repository.get_page(
+            db=db,
+            cursor=cursor,
+            limit=limit,
+            order_by=order_by,
+            columns=self._columns(fields),
+        )
+
+    async def count_users(
+        self, db: AsyncSession, mode: CountMode = "exact"
+    ) -> Tuple[int, CountMode]:
+        """
+        Total number of users, and the mode that produced it: "exact"
+        counts rows, "estimated" reads the database's statistics, "cached"
+        serves a count adjusted on create/delete. Where no estimate is
+        available (SQLite, a never-analyzed table) "estimated" falls back
+        to "exact".
+        """
+        if mode == "estimated":
+            estimate = await async_user_repository.estimate_count(db=db)
+            if estimate is not None:
+                return estimate, "estimated"
+            mode = "exact"
+        if mode == "cached":
+            total = await user_count.get(lambda: async_user_repository.count(db=db))
+            return total, "cached"
+        return await async_user_repository.count(db=db), "exact"
+
+    async def create_user(self, db: AsyncSession, user_in: UserCreate) -> User:
+        user_data = user_in.model_dump(exclude={"password"})
+        user_data["hashed_password"] = await self.get_password_hash(user_in.password)
+        # The unique email index decides duplicates, with no SELECT beforehand
+        try:
+            user = await async_user_repository.create(db=db, obj_in=user_data)
+        except (IntegrityError, DuplicateKeyError):
+            raise BadRequestException(EMAIL_TAKEN)
+        await user_count.adjust(1)
+        self._audit("create", user.id, None, column_values(user))
+        return user
+
+    async def update_user(
+        self, db: AsyncSession, user_id: int, user_in: UserUpdate
+    ) -> User:
+        user_data = user_in.model_dump(exclude_unset=True, exclude={"password"})
+        if user_in.password:
+            user_data["hashed_password"] = await self.get_password_hash(user_in.password)
+        try:
+            if audit_log is not None:
+                before, user = await async_user_repository.update_by_id_with_before(
+                    db=db, id=user_id, obj_in=user_data
+                )
+            else:
+                before, user = None, await async_user_repository.update_by_id(
+                    db=db, id=user_id, obj_in=user_data
+                )
+        except (IntegrityError, DuplicateKeyError):
+            raise BadRequestException(EMAIL_TAKEN)
+        if not user:
+            raise NotFoundException(f"User with id {user_id} not found")
+        self._invalidate_principals([user_id])
+        self._audit("update", user_id, before, column_values(user))
+        return user
+
+    async def delete_user(self, db: AsyncSession, user_id: int) -> User:
+        user = await async_user_repository.delete(db=db, id=user_id)
+        if not user:
+            raise NotFoundException(f"User with id {user_id} not found")
+        await user_count.adjust(-1)
+        self._invalidate_principals([user_id])
+        self._audit("delete", user_id, column_values(user), None)
+        return user
+
+    async def bulk_create_users(
+        self, db: AsyncSession, users_in: Sequence[UserCreate]
+    ) -> BulkResult:
+        self._check_bulk_size(len(users_in))
+        hashes = await password_hasher.hash_many(
+            [user_in.password for user_in in users_in]
+        )
+        rows = []
+        for user_in, hashed_password in zip(users_in, hashes):
+            user_data = user_in.model_dump(exclude={"password"})
+            user_data["hashed_password"] = hashed_password
+            rows.append(user_data)
+        result = await async_user_repository.create_many(
+            db=db, objs_in=rows, chunk_size=settings.BULK_CHUNK_SIZE
+        )
+        await user_count.adjust(len(result.items))
+        for user in result.items:
+            self._audit("create", user.id, None, column_values(user))
+        return self._public_errors(result)
+
+    async def bulk_update_users(
+        self, db: AsyncSession, users_in: Sequence[UserBulkUpdateItem]
+    ) -> BulkResult:
+        self._check_bulk_size(len(users_in))
+        passwords = [user_in.password for user_in in users_in if user_in.password]
+        hashes = iter(await password_hasher.hash_many(passwords))
+        rows = []
+        for user_in in users_in:
+            user_data = user_in.model_dump(exclude_unset=True, exclude={"password"})
+            user_data["id"] = user_in.id
+            if user_in.password:
+                user_data["hashed_password"] = next(hashes)
+            rows.append(user_data)
+        result = await async_user_repository.update_many(
+            db=db,
+            objs_in=rows,
+            chunk_size=settings.BULK_CHUNK_SIZE,
+            with_before=audit_log is not None,
+        )
+        self._invalidate_principals(user.id for user in result.items)
+        before = result.before or {}
+        for user in result.items:
+            self._audit("update", user.id, before.get(user.id), column_values(user))
+        return self._public_errors(result)
+
+    async def bulk_delete_users(
+        self, db: AsyncSession, user_ids: Sequence[int]
+    ) -> BulkResult:
+        self._check_bulk_size(len(user_ids))
+        result = await async_user_repository.delete_many(
+            db=db, ids=user_ids, chunk_size=settings.BULK_CHUNK_SIZE
+        )
+        await user_count.adjust(-len(result.items))
+        self._invalidate_principals(user.id for user in result.items)
+        for user in result.items:
+            self._audit("delete", user.id, column_values(user), None)
+        return result
+
+    def _public_errors(self, result: BulkResult) -> BulkResult:
+        # The repositories pass on the driver's message, which names tables
+        # and indexes; report what the constraint means instead
+        errors = [
+            error if error.detail == NOT_FOUND else error._replace(
+                detail=EMAIL_TAKEN if "email" in error.detail.lower() else CONSTRAINT_FAILED
+            )
+            for error in result.errors
+        ]
+        return result._replace(errors=errors)
+
+    def _invalidate_principals(self, user_ids: Iterable[int]) -> None:
+        # Cached tokens carry the user's flags; drop them on any change
+        if principal_cache is not None:
+            for user_id in user_ids:
+                principal_cache.invalidate_user(user_id)
+
+    def _columns(self, fields: Optional[Sequence[str]]) -> Optional[List[str]]:
+        return [*fields, *VERSION_FIELDS] if fields else None
+
+    def _audit(
+        self, action: str, user_id: int, before: Optional[dict], after: Optional[dict]
+    ) -> None:
+        if audit_log is None:
+            return
+        before, after = diff(before, after, redact=AUDIT_REDACTED)
+        audit_log.record(action, "user", user_id, before, after)
+
+    def _check_bulk_size(self, size: int) -> None:
+        if size > settings.BULK_MAX_ITEMS:
+            raise BadRequestException(
+                f"Bulk requests are limited to {settings.BULK_MAX_ITEMS} items"
+            )
+
+    async def authenticate(
+        self, db: AsyncSession, email: str, password: str
+    ) -> Optional[User]:
+        user = await async_user_repository.get_credentials(db=db, email=email)
+        if not user:
+            return None
+        valid, new_hash = await password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+        if not valid:
+            return None
+        if new_hash:
+            # Stored hash predates the current BCRYPT_ROUNDS; upgrade it
+            user = await async_user_repository.update_by_id(
+                db=db, id=user.id, obj_in={"hashed_password": new_hash}
+            )
+        return user
+
+    def is_active(self, user: User) -> bool:
+        return async_user_repository.is_active(user)
+
+    def is_superuser(self, user: User) -> bool:
+        return async_user_repository.is_superuser(user)
+
+    async def get_password_hash(self, password: str) -> str:
+        return await password_hasher.hash(password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
+
+
+# Create singleton instances
+user_service = UserService()
+async_user_service = AsyncUserService() 
\ No newline at end of file
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+
+from app.core.audit import AuditLog, diff
+from benchmarks.harness import BenchResult, measure, summarize
+from benchmarks.mongo import _mongo_database
+
+FLUSH_BATCH_SIZES = (1, 50, 500)
+
+
+def _snapshot(i: int) -> dict:
+    return {
+        "id": i,
+        "email": f"audit{i}@bench.example.com",
+        "full_name": f"Bench User {i}",
+        "is_active": True,
+        "is_superuser": False,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+async def audit_benchmarks(iterations: int, mock: bool = False) -> List[BenchResult]:
+    """
+    Cost of the audit trail: recording an event on the request path, writing
+    the buffer at several batch sizes, and replaying spilled events. Writes
+    to the "audit" collection of the benchmark database on MONGODB_URL, or
+    to mongomock-motor when `mock` is set.
+    """
+    collection = _mongo_database(mock)["audit"]
+    await collection.drop()
+    spill_path = os.path.join(tempfile.gettempdir(), "bench-audit-spill.jsonl")
+    if os.path.exists(spill_path):
+        os.remove(spill_path)
+    results = []
+
+    # Flushed explicitly below, so the timer never fires mid-measurement
+    audit = AuditLog(
+        lambda: collection, batch_size=iterations + 100, flush_interval=3600, spill_path=spill_path
+    )
+
+    async def record(i: int) -> None:
+        before, after = diff(_snapshot(i), {**_snapshot(i), "full_name": "Renamed"})
+        audit.record("update", "user", i, before, after)
+
+    results.append(await measure("audit.record", record, iterations=iterations))
+    await audit.close()
+
+    # One timed flush per sample, each writing `batch_size` buffered events
+    for batch_size in FLUSH_BATCH_SIZES:
+        audit = AuditLog(
+            lambda: collection, batch_size=batch_size, flush_interval=3600, spill_path=spill_path
+        )
+        latencies = []
+        for sample in range(max(iterations // batch_size, 10)):
+            for i in range(batch_size):
+                audit.record("update", "user", i, None, _snapshot(i))
+            start = time.perf_counter()
+            await audit.flush()
+            latencies.append(time.perf_counter() - start)
+        await audit.close()
+        result = summarize(f"audit.flush.batch{batch_size}", latencies)
+        # Report events per second rather than flushes per second
+        result.ops_per_sec *= batch_size
+        results.append(result)
+
+    def unavailable():
+        raise ConnectionError("mongo unavailable")
+
+    # Spill while Mongo is "down", then time the replay once it is back
+    audit = AuditLog(unavailable, batch_size=500, flush_interval=3600, spill_path=spill_path)
+    for i in range(iterations):
+        audit.record("create", "user", i, None, _snapshot(i))
+    await audit.flush()
+    audit.collection_factory = lambda: collection
+    start = time.perf_counter()
+    await audit.flush()
+    result = summarize("audit.replay", [time.perf_counter() - start])
+    result.ops_per_sec *= audit.stats.replayed
+    results.append(result)
+    await audit.close()
+
+    await collection.drop()
+    return results
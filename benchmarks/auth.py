@@ -0,0 +1,47 @@
+import random
+from typing import List
+
+from app.core.auth import PrincipalCache
+from app.core.config import get_settings
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.repository.user import AsyncUserRepository
+from app.services.auth import AuthService
+from benchmarks.harness import BenchResult, measure
+
+settings = get_settings()
+
+# Distinct users whose tokens are replayed, as from a pool of active clients
+ACTIVE_USERS = 200
+
+
+async def auth_benchmarks(scale: int, iterations: int) -> List[BenchResult]:
+    """
+    Per-request cost of resolving a bearer token to a principal: JWT
+    decode plus user lookup on every request, versus the principal cache.
+    """
+    repo = AsyncUserRepository(User)
+    rng = random.Random(14)
+    tokens = [create_access_token(rng.randint(1, scale)) for _ in range(min(ACTIVE_USERS, scale))]
+    uncached = AuthService(repo)
+    cached = AuthService(
+        repo, cache=PrincipalCache(maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL)
+    )
+    results = []
+
+    def resolve(service: AuthService):
+        async def operation(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await service.resolve(db, tokens[i % len(tokens)])
+        return operation
+
+    results.append(await measure("auth.resolve.uncached", resolve(uncached), iterations=iterations))
+    # Warm up with every token so the timed loop measures hits only
+    results.append(await measure(
+        "auth.resolve.cached", resolve(cached), iterations=iterations, warmup=len(tokens)
+    ))
+    results.append(await measure(
+        "auth.resolve.cached.concurrent", resolve(cached), iterations=iterations, concurrency=20
+    ))
+    return results
@@ -0,0 +1,48 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> Tuple[List[str], List[str]]:
+    """
+    Compare two result files benchmark by benchmark.
+
+    A benchmark regresses when its throughput drops, or its p99 latency
+    grows, by more than `threshold` (e.g. 0.1 for 10%).
+
+    Returns:
+        tuple: (report lines, names of regressed benchmarks)
+    """
+    lines = []
+    regressions = []
+    before = baseline["results"]
+    after = current["results"]
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        throughput = _change(old["ops_per_sec"], new["ops_per_sec"])
+        p99 = _change(old["p99_ms"], new["p99_ms"])
+        regressed = throughput < -threshold or p99 > threshold
+        if regressed:
+            regressions.append(name)
+        lines.append(
+            f"{'REGRESSED' if regressed else 'ok':<10} {name:<40} "
+            f"ops/s {old['ops_per_sec']:>10.1f} -> {new['ops_per_sec']:>10.1f} ({throughput:+.1%})  "
+            f"p99 {old['p99_ms']:>8.3f} -> {new['p99_ms']:>8.3f}ms ({p99:+.1%})"
+        )
+    for name in sorted(set(before) - set(after)):
+        lines.append(f"{'missing':<10} {name}")
+    for name in sorted(set(after) - set(before)):
+        lines.append(f"{'new':<10} {name}")
+    return lines, regressions
+
+
+def _change(old: float, new: float) -> float:
+    if not old:
+        return 0.0
+    return (new - old) / old
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import resource
+import sys
+import time
+import zlib
+from typing import List, Optional
+
+import httpx
+
+from app.core.config import get_settings
+from benchmarks.harness import BenchResult
+from benchmarks.serve import _wait_ready
+from benchmarks.startup import _free_port
+
+settings = get_settings()
+
+# How often the server's resident memory is read while an export streams
+RSS_SAMPLE_INTERVAL = 0.02
+
+VARIANTS = (
+    ("ndjson", False),
+    ("csv", False),
+    ("ndjson", True),
+)
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Current resident memory of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _children_peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _export(
+    client: httpx.AsyncClient, pid: int, format: str, gzip: bool
+) -> BenchResult:
+    """Stream one export to the end, counting rows and sampling the server's RSS."""
+    path = f"{settings.API_V1_PREFIX}/users/users/export"
+    samples: List[float] = []
+    done = asyncio.Event()
+
+    async def sample() -> None:
+        while not done.is_set():
+            rss = _rss_mb(pid)
+            if rss is not None:
+                samples.append(rss)
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    sampler = asyncio.create_task(sample())
+    decompressor = zlib.decompressobj(wbits=31) if gzip else None
+    rows = 0
+    size = 0
+    started = time.perf_counter()
+    try:
+        async with client.stream(
+            "GET", path, params={"format": format, "gzip": str(gzip).lower()}
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {path} -> {response.status_code}")
+            # iter_raw: the bytes on the wire, not httpx's transparent gunzip
+            async for chunk in response.aiter_raw():
+                size += len(chunk)
+                rows += (decompressor.decompress(chunk) if decompressor else chunk).count(b"\n")
+    finally:
+        done.set()
+        await sampler
+    elapsed = time.perf_counter() - started
+    if format == "csv":
+        rows -= 1  # Header line
+    label = f"{format}{'+gzip' if gzip else ''}"
+    print(f"export {label}: {rows} rows, {size / 1024 / 1024:.1f}MB on the wire")
+    return BenchResult(
+        name=f"export.GET /users/export {label} rows",
+        iterations=rows,
+        concurrency=1,
+        ops_per_sec=rows / elapsed if elapsed else 0.0,
+        mean_ms=elapsed * 1000,
+        p50_ms=elapsed * 1000,
+        p95_ms=elapsed * 1000,
+        p99_ms=elapsed * 1000,
+        peak_rss_mb=max(samples) if samples else None,
+    )
+
+
+async def export_benchmarks(scale: int) -> List[BenchResult]:
+    """
+    Stream GET /users/export to the end over real HTTP from a uvicorn
+    server, for every seeded row (--scale, with no upper bound), as NDJSON,
+    CSV and gzipped NDJSON. Reports rows per second and the server's peak
+    resident memory, sampled from /proc while the body streams; a flat
+    peak as --scale grows shows the export is not buffered. Where /proc is
+    missing, the peak falls back to ru_maxrss of exited child processes,
+    an upper bound that also covers earlier servers of the run.
+    """
+    results = []
+    for format, gzip in VARIANTS:
+        port = _free_port()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+            "--log-level", "warning",
+            env=dict(os.environ), stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+                await _wait_ready(client, process)
+                idle = _rss_mb(process.pid)
+                result = await _export(client, process.pid, format, gzip)
+                if idle is not None:
+                    print(f"server RSS before the export: {idle:.1f}MB")
+        finally:
+            process.terminate()
+            await process.wait()
+        if result.peak_rss_mb is None:
+            result.peak_rss_mb = _children_peak_rss_mb()
+        results.append(result)
+    return results
@@ -0,0 +1,91 @@
+import asyncio
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchResult:
+    """Throughput and latency percentiles of one benchmark"""
+    name: str
+    iterations: int
+    concurrency: int
+    ops_per_sec: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    # Peak resident memory of the measured process, where a suite samples it
+    peak_rss_mb: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def measure(
+    name: str,
+    operation: Callable[[int], Awaitable[Any]],
+    *,
+    iterations: int = 1000,
+    concurrency: int = 1,
+    warmup: int = 10,
+) -> BenchResult:
+    """
+    Run `operation(i)` `iterations` times with at most `concurrency` calls in
+    flight, after `warmup` untimed calls, and summarize the latencies.
+    """
+    for i in range(warmup):
+        await operation(i)
+
+    latencies: List[float] = []
+    counter = iter(range(iterations))
+
+    async def worker() -> None:
+        for i in counter:
+            start = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(name, latencies, concurrency=concurrency, elapsed=elapsed)
+
+
+def summarize(
+    name: str, latencies: List[float], *, concurrency: int = 1, elapsed: float = 0.0
+) -> BenchResult:
+    """
+    Build a result from latencies in seconds. Without `elapsed`, samples
+    are taken to have run back to back.
+    """
+    latencies = sorted(latencies)
+    iterations = len(latencies)
+    elapsed = elapsed or sum(latencies)
+    return BenchResult(
+        name=name,
+        iterations=iterations,
+        concurrency=concurrency,
+        ops_per_sec=iterations / elapsed if elapsed else 0.0,
+        mean_ms=statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p95_ms=percentile(latencies, 0.95) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+    )
+
+
+def print_result(result: BenchResult) -> None:
+    print(
+        f"{result.name:<40} {result.ops_per_sec:>10.1f} ops/s  "
+        f"p50 {result.p50_ms:>8.3f}ms  p95 {result.p95_ms:>8.3f}ms  "
+        f"p99 {result.p99_ms:>8.3f}ms"
+        + (f"  peak RSS {result.peak_rss_mb:>8.1f}MB" if result.peak_rss_mb is not None else "")
+    )
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import List
+
+import httpx
+
+from app.core.config import get_settings
+from benchmarks.harness import BenchResult, measure, summarize
+from benchmarks.seed import SEED_PASSWORD, seed_email
+from benchmarks.serve import _wait_ready
+from benchmarks.startup import _free_port
+
+settings = get_settings()
+
+# The production default, rather than the cheap --bcrypt-rounds of the
+# other suites: the point is what a realistic login costs the event loop
+LOGIN_BCRYPT_ROUNDS = 12
+LOGIN_CONCURRENCY = 8
+
+
+async def hashing_benchmarks(scale: int, iterations: int, concurrency: int) -> List[BenchResult]:
+    """
+    p99 of GET /users/{id} on a one-worker `python -m app.serve`, on its
+    own and while LOGIN_CONCURRENCY clients log in back to back, with
+    bcrypt on the default thread pool (PASSWORD_HASH_WORKERS=0) and on the
+    hashing process pool. Seeded users' hashes are upgraded to
+    LOGIN_BCRYPT_ROUNDS by their first login, during the warm-up.
+    """
+    rng = random.Random(4)
+    ids = [rng.randint(1, scale) for _ in range(iterations + 100)]
+    # Seeded users with i % 10 == 0 are inactive and cannot log in
+    logins = [seed_email(i) for i in range(1, min(scale, 100)) if i % 10][:LOGIN_CONCURRENCY]
+    users = f"{settings.API_V1_PREFIX}/users/users/"
+    token = f"{settings.API_V1_PREFIX}/auth/token"
+    results = []
+
+    for hash_workers in (0, max(settings.PASSWORD_HASH_WORKERS, 2)):
+        port = _free_port()
+        env = {
+            **os.environ,
+            "BCRYPT_ROUNDS": str(LOGIN_BCRYPT_ROUNDS),
+            "PASSWORD_HASH_WORKERS": str(hash_workers),
+        }
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.serve", "--host", "127.0.0.1",
+            "--port", str(port), "--workers", "1",
+            env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            limits = httpx.Limits(
+                max_connections=concurrency + LOGIN_CONCURRENCY,
+                max_keepalive_connections=concurrency + LOGIN_CONCURRENCY,
+            )
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None
+            ) as client:
+                await _wait_ready(client, process)
+
+                async def get_user(i: int) -> None:
+                    response = await client.get(f"{users}{ids[i]}")
+                    if response.status_code != 200:
+                        raise RuntimeError(f"GET {users}{ids[i]} -> {response.status_code}")
+
+                async def login(email: str) -> None:
+                    response = await client.post(
+                        token, data={"username": email, "password": SEED_PASSWORD}
+                    )
+                    if response.status_code != 200:
+                        raise RuntimeError(f"POST {token} -> {response.status_code}")
+
+                for email in logins:
+                    await login(email)
+                label = f"hash_workers={hash_workers}"
+                results.append(await measure(
+                    f"hashing.GET /users/{{id}} idle {label}", get_user,
+                    iterations=iterations, concurrency=concurrency, warmup=concurrency,
+                ))
+
+                stop = asyncio.Event()
+                login_latencies: List[float] = []
+
+                async def storm(email: str) -> None:
+                    while not stop.is_set():
+                        started = time.perf_counter()
+                        await login(email)
+                        login_latencies.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                stormers = [asyncio.create_task(storm(email)) for email in logins]
+                try:
+                    results.append(await measure(
+                        f"hashing.GET /users/{{id}} during logins {label}", get_user,
+                        iterations=iterations, concurrency=concurrency, warmup=0,
+                    ))
+                finally:
+                    stop.set()
+                    await asyncio.gather(*stormers)
+                results.append(summarize(
+                    f"hashing.POST /auth/token x{len(logins)} {label}", login_latencies,
+                    concurrency=len(logins), elapsed=time.perf_counter() - started,
+                ))
+        finally:
+            process.terminate()
+            await process.wait()
+    return results
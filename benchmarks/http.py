@@ -0,0 +1,155 @@
+import random
+from typing import List
+
+import httpx
+
+from app.core.config import get_settings
+from benchmarks.harness import BenchResult, measure
+from benchmarks.repository import SCRATCH_DOMAIN, _cleanup_scratch
+
+settings = get_settings()
+
+
+def _check(response: httpx.Response, *expected: int) -> None:
+    if response.status_code not in expected:
+        raise RuntimeError(
+            f"{response.request.method} {response.request.url} -> "
+            f"{response.status_code}: {response.text[:200]}"
+        )
+
+
+async def http_benchmarks(scale: int, iterations: int, concurrency: int) -> List[BenchResult]:
+    """
+    Load-test every /api/v1/users endpoint in-process through httpx's ASGI
+    transport, so the numbers include routing, validation and serialization
+    but no network or server overhead. The export is measured over real
+    HTTP by the export suite, since this transport buffers whole bodies.
+    """
+    from main import app
+
+    users = f"{settings.API_V1_PREFIX}/users/users/"
+    rng = random.Random(1)
+    ids = [rng.randint(1, scale) for _ in range(iterations + 100)]
+    results = []
+    await _cleanup_scratch()
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+    ) as client:
+        first = await client.get(users, params={"limit": 100})
+        next_cursor = first.headers.get("X-Next-Cursor")
+
+        async def list_first(i: int) -> None:
+            _check(await client.get(users, params={"limit": 100}), 200)
+
+        async def list_next(i: int) -> None:
+            params = {"limit": 100}
+            if next_cursor:
+                params["cursor"] = next_cursor
+            _check(await client.get(users, params=params), 200)
+
+        async def get_user(i: int) -> None:
+            _check(await client.get(f"{users}{ids[i]}"), 200)
+
+        # Wide pages, whole rows versus the two fields most callers need
+        wide = {"limit": 1000}
+        sparse = {"limit": 1000, "fields": "id,email"}
+        for label, params in (("all fields", wide), ("fields=id,email", sparse)):
+            body = (await client.get(users, params=params)).content
+            print(f"GET /users/?limit=1000 {label}: {len(body)} bytes")
+
+        async def list_wide(i: int) -> None:
+            _check(await client.get(users, params=wide), 200)
+
+        async def list_sparse(i: int) -> None:
+            _check(await client.get(users, params=sparse), 200)
+
+        # Resolving 100 ids: one request per id versus one batch request
+        def hundred_ids(i: int) -> List[int]:
+            return [ids[(i * 100 + j) % len(ids)] for j in range(100)]
+
+        async def get_100_one_by_one(i: int) -> None:
+            for id in hundred_ids(i):
+                _check(await client.get(f"{users}{id}"), 200)
+
+        async def get_100_batch(i: int) -> None:
+            chunk = hundred_ids(i)
+            _check(await client.get(f"{users}batch", params={"ids": ",".join(map(str, chunk))}), 200)
+
+        async def get_user_sparse(i: int) -> None:
+            _check(await client.get(f"{users}{ids[i]}", params={"fields": "id,email"}), 200)
+
+        etags = {}
+        for id in ids[:50]:
+            etags[id] = (await client.get(f"{users}{id}")).headers["ETag"]
+        conditional_ids = list(etags)
+
+        async def get_user_not_modified(i: int) -> None:
+            id = conditional_ids[i % len(conditional_ids)]
+            _check(await client.get(f"{users}{id}", headers={"If-None-Match": etags[id]}), 304)
+
+        async def get_missing(i: int) -> None:
+            _check(await client.get(f"{users}{scale * 10 + i}"), 404)
+
+        results.append(await measure("http.GET /users/", list_first, iterations=iterations // 10 or 1, concurrency=concurrency))
+        results.append(await measure("http.GET /users/?cursor", list_next, iterations=iterations // 10 or 1, concurrency=concurrency))
+        results.append(await measure("http.GET /users/?limit=1000", list_wide, iterations=iterations // 50 or 1, concurrency=concurrency))
+        results.append(await measure("http.GET /users/?limit=1000&fields", list_sparse, iterations=iterations // 50 or 1, concurrency=concurrency))
+        results.append(await measure("http.GET /users/{id}", get_user, iterations=iterations, concurrency=concurrency))
+        results.append(await measure("http.GET /users/{id}?fields", get_user_sparse, iterations=iterations, concurrency=concurrency))
+        results.append(await measure("http.GET /users/{id} x100", get_100_one_by_one, iterations=iterations // 100 or 1))
+        results.append(await measure("http.GET /users/batch?ids x100", get_100_batch, iterations=iterations // 100 or 1))
+        results.append(await measure("http.GET /users/{id} 304", get_user_not_modified, iterations=iterations, concurrency=concurrency))
+        results.append(await measure("http.GET /users/{id} 404", get_missing, iterations=iterations, concurrency=concurrency))
+
+        created: List[int] = []
+
+        async def create_user(i: int) -> None:
+            response = await client.post(
+                users, json={"email": f"h{i}@{SCRATCH_DOMAIN}", "password": "bench"}
+            )
+            _check(response, 201)
+            created.append(response.json()["id"])
+
+        async def update_user(i: int) -> None:
+            response = await client.put(
+                f"{users}{created[i % len(created)]}", json={"full_name": f"n{i}"}
+            )
+            _check(response, 200)
+
+        async def delete_user(i: int) -> None:
+            _check(await client.delete(f"{users}{created.pop()}"), 200)
+
+        writes = max(iterations // 10, 10)
+        results.append(await measure("http.POST /users/", create_user, iterations=writes, concurrency=concurrency, warmup=0))
+        results.append(await measure("http.PUT /users/{id}", update_user, iterations=writes, concurrency=concurrency))
+        results.append(await measure("http.DELETE /users/{id}", delete_user, iterations=writes, concurrency=concurrency, warmup=0))
+
+        batch = 100
+        bulk_ids: List[int] = []
+
+        async def bulk_create(i: int) -> None:
+            response = await client.post(f"{users}bulk", json={"items": [
+                {"email": f"bk{i}-{j}@{SCRATCH_DOMAIN}", "password": "bench"}
+                for j in range(batch)
+            ]})
+            _check(response, 200)
+            bulk_ids.extend(item["id"] for item in response.json()["items"])
+
+        async def bulk_update(i: int) -> None:
+            chunk = bulk_ids[i * batch % len(bulk_ids):][:batch]
+            response = await client.put(f"{users}bulk", json={"items": [
+                {"id": id, "full_name": f"n{i}"} for id in chunk
+            ]})
+            _check(response, 200)
+
+        async def bulk_delete(i: int) -> None:
+            chunk, bulk_ids[:] = bulk_ids[:batch], bulk_ids[batch:]
+            _check(await client.post(f"{users}bulk/delete", json={"ids": chunk}), 200)
+
+        results.append(await measure("http.POST /users/bulk x100", bulk_create, iterations=5, warmup=0))
+        results.append(await measure("http.PUT /users/bulk x100", bulk_update, iterations=5, warmup=0))
+        results.append(await measure("http.POST /users/bulk/delete x100", bulk_delete, iterations=5, warmup=0))
+
+    await _cleanup_scratch()
+    return results
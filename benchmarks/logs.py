@@ -0,0 +1,70 @@
+import io
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+from typing import List
+
+from app.core.logger import DroppingQueueHandler, JSONFormatter
+from benchmarks.harness import BenchResult, measure
+
+# Records logged per simulated request
+RECORDS_PER_REQUEST = 5
+
+
+class SlowStream(io.StringIO):
+    """A stdout stand-in whose writes stall, like a backed-up log collector."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, s: str) -> int:
+        time.sleep(self.delay)
+        return len(s)
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"benchmarks.logs.{name}")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+async def logging_benchmarks(iterations: int, sink_delay: float = 0.0002) -> List[BenchResult]:
+    """
+    Per-request cost of logging through a synchronous StreamHandler versus
+    the queue pipeline used by setup_logging, both writing JSON to a sink
+    that takes `sink_delay` seconds per write.
+    """
+    results = []
+
+    stream_handler = logging.StreamHandler(SlowStream(sink_delay))
+    stream_handler.setFormatter(JSONFormatter())
+    sync_logger = _logger("sync", stream_handler)
+
+    sink_handler = logging.StreamHandler(SlowStream(sink_delay))
+    sink_handler.setFormatter(JSONFormatter())
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=10000))
+    listener = QueueListener(queue_handler.queue, sink_handler)
+    queued_logger = _logger("queued", queue_handler)
+
+    def request(logger: logging.Logger):
+        async def operation(i: int) -> None:
+            for n in range(RECORDS_PER_REQUEST):
+                logger.info("request %s step %s", i, n, extra={"user_id": i})
+        return operation
+
+    results.append(await measure(
+        f"logging.sync_handler x{RECORDS_PER_REQUEST}", request(sync_logger), iterations=iterations
+    ))
+    listener.start()
+    try:
+        results.append(await measure(
+            f"logging.queue_handler x{RECORDS_PER_REQUEST}", request(queued_logger), iterations=iterations
+        ))
+    finally:
+        listener.stop()
+    print(f"   queue handler dropped {queue_handler.dropped} records")
+    return results
@@ -0,0 +1,149 @@
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, List
+
+from app.core.config import get_settings
+from app.core.security import pwd_context
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.repository.pagination import encode_cursor
+from app.repository.user import AsyncUserRepository, MongoUserRepository
+from benchmarks.harness import BenchResult, measure
+from benchmarks.repository import SCRATCH_DOMAIN, _cleanup_scratch
+from benchmarks.seed import SEED_BATCH, SEED_PASSWORD, seed_email
+
+settings = get_settings()
+
+BENCH_MONGODB_DB = "starter_kit_bench"
+
+
+def _mongo_database(mock: bool) -> Any:
+    if mock:
+        # Optional dependency, only needed to benchmark without a mongod
+        from mongomock_motor import AsyncMongoMockClient
+
+        return AsyncMongoMockClient()[BENCH_MONGODB_DB]
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(settings.MONGODB_URL)[BENCH_MONGODB_DB]
+
+
+async def seed_mongo_users(repo: MongoUserRepository, scale: int) -> None:
+    """Load the same synthetic users as seed_users, with matching ids."""
+    await repo.collection.drop()
+    await repo.counters.delete_many({"_id": repo.collection.name})
+    await repo.ensure_indexes()
+    hashed_password = pwd_context.hash(SEED_PASSWORD)
+    start_at = datetime.utcnow() - timedelta(seconds=scale)
+    started = time.perf_counter()
+    for offset in range(0, scale, SEED_BATCH):
+        await repo.collection.insert_many([
+            {
+                "_id": i + 1,
+                "email": seed_email(i),
+                "hashed_password": hashed_password,
+                "full_name": f"Bench User {i}",
+                "is_active": i % 10 != 0,
+                "is_superuser": False,
+                "created_at": start_at + timedelta(seconds=i),
+                "updated_at": start_at + timedelta(seconds=i),
+            }
+            for i in range(offset, min(scale, offset + SEED_BATCH))
+        ])
+    await repo.counters.update_one(
+        {"_id": repo.collection.name}, {"$set": {"seq": scale}}, upsert=True
+    )
+    print(f"seeded {scale} mongo users in {time.perf_counter() - started:.1f}s")
+
+
+async def mongo_benchmarks(scale: int, iterations: int, mock: bool = False) -> List[BenchResult]:
+    """
+    Run one workload against the SQL and MongoDB user repositories, both
+    without a cache, and report them side by side as backend.<sql|mongo>.*.
+    Uses MONGODB_URL, or mongomock-motor when `mock` is set.
+    """
+    mongo_repo = MongoUserRepository(User, _mongo_database(mock)["users"])
+    await seed_mongo_users(mongo_repo, scale)
+    await _cleanup_scratch()
+    sql_repo = AsyncUserRepository(User)
+
+    rng = random.Random(3)
+    ids = [rng.randint(1, scale) for _ in range(iterations + 100)]
+    deep_id = max(scale - 100, 0)
+    deep_cursor = encode_cursor("id", deep_id, deep_id)
+    results = []
+
+    for backend, repo in (("sql", sql_repo), ("mongo", mongo_repo)):
+        prefix = f"backend.{backend}"
+        created: List[int] = []
+
+        async def get(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await repo.get(db, ids[i])
+
+        async def get_by_email(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await repo.get_by_email(db, email=seed_email(ids[i] - 1))
+
+        async def first_page(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await repo.get_page(db, limit=100)
+
+        async def deep_page(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await repo.get_page(db, cursor=deep_cursor, limit=100)
+
+        async def create(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                user = await repo.create(
+                    db, obj_in={"email": f"{backend}{i}@{SCRATCH_DOMAIN}", "hashed_password": "x"}
+                )
+                created.append(user.id)
+
+        async def update_by_id(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await repo.update_by_id(db, id=created[i % len(created)], obj_in={"full_name": f"n{i}"})
+
+        async def delete_one(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await repo.delete(db, id=created.pop())
+
+        async def create_many(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                result = await repo.create_many(db, objs_in=[
+                    {"email": f"{backend}b{i}-{j}@{SCRATCH_DOMAIN}", "hashed_password": "x"}
+                    for j in range(1000)
+                ])
+                created.extend(user.id for user in result.items)
+
+        async def delete_many(i: int) -> None:
+            chunk, created[:] = created[:1000], created[1000:]
+            async with AsyncSessionLocal() as db:
+                await repo.delete_many(db, ids=chunk)
+
+        async def stream(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                async for _ in repo.stream(db, columns=["id", "email", "created_at"], batch_size=1000):
+                    pass
+
+        writes = max(iterations // 10, 10)
+        results.append(await measure(f"{prefix}.get", get, iterations=iterations))
+        results.append(await measure(f"{prefix}.get_by_email", get_by_email, iterations=iterations))
+        results.append(await measure(f"{prefix}.get.concurrent", get, iterations=iterations, concurrency=20))
+        results.append(await measure(f"{prefix}.get_page.first", first_page, iterations=writes))
+        results.append(await measure(f"{prefix}.get_page.deep", deep_page, iterations=writes))
+        results.append(await measure(f"{prefix}.create", create, iterations=writes, warmup=0))
+        results.append(await measure(f"{prefix}.update_by_id", update_by_id, iterations=writes))
+        results.append(await measure(f"{prefix}.delete", delete_one, iterations=writes, warmup=0))
+        for name, operation in (("create_many.1000", create_many), ("delete_many.1000", delete_many)):
+            result = await measure(f"{prefix}.{name}", operation, iterations=3, warmup=0)
+            result.ops_per_sec *= 1000
+            results.append(result)
+        result = await measure(f"{prefix}.stream.rows", stream, iterations=1, warmup=0)
+        result.ops_per_sec *= scale
+        results.append(result)
+
+    await _cleanup_scratch()
+    await mongo_repo.collection.delete_many({"email": {"$regex": f"@{SCRATCH_DOMAIN}$"}})
+    return results
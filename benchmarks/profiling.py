@@ -0,0 +1,46 @@
+from typing import List
+
+from app.core.profiling import ProfileStore, ProfilingMiddleware
+from benchmarks.harness import BenchResult, measure
+
+TOKEN = "bench-profile-token"
+
+
+async def _endpoint(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _send(message) -> None:
+    pass
+
+
+def _scope(profile: bool) -> dict:
+    headers = [(b"host", b"bench"), (b"accept", b"application/json")]
+    if profile:
+        headers.append((b"x-profile", TOKEN.encode()))
+    return {"type": "http", "method": "GET", "path": "/api/v1/users/users/1", "headers": headers}
+
+
+async def profiling_benchmarks(iterations: int) -> List[BenchResult]:
+    """
+    Cost of ProfilingMiddleware around a trivial ASGI endpoint, called
+    directly: absent, present but not triggered (with and without a
+    sample rate), and triggered by the X-Profile header.
+    """
+    store = ProfileStore(maxlen=10)
+    cases = [
+        ("profiling.off", _endpoint, False),
+        ("profiling.idle", ProfilingMiddleware(_endpoint, store, token=TOKEN), False),
+        ("profiling.idle_sampling_1pct", ProfilingMiddleware(_endpoint, store, token=TOKEN, sample_rate=0.01), False),
+        ("profiling.profiled", ProfilingMiddleware(_endpoint, store, token=TOKEN), True),
+    ]
+    results = []
+    for name, app, profile in cases:
+        scope = _scope(profile)
+
+        async def call(i: int) -> None:
+            await app(scope, None, _send)
+
+        results.append(await measure(name, call, iterations=iterations if not profile else max(iterations // 10, 10)))
+    return results
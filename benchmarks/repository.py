@@ -0,0 +1,211 @@
+import asyncio
+import random
+from typing import List
+
+from sqlalchemy import delete, func, select
+
+from app.core.metrics import RequestStats, request_stats
+from app.core.singleflight import SingleFlight, ThreadedSingleFlight
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.user import User
+from app.repository.pagination import encode_cursor
+from app.repository.user import AsyncUserRepository, UserRepository, user_cache
+from app.services.user import async_user_service
+from benchmarks.harness import BenchResult, measure
+from benchmarks.seed import SEED_PASSWORD, seed_email
+
+SCRATCH_DOMAIN = "scratch.bench.example.com"
+
+
+async def _cleanup_scratch() -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.email.like(f"%@{SCRATCH_DOMAIN}")))
+        await db.commit()
+
+
+async def repository_benchmarks(scale: int, iterations: int) -> List[BenchResult]:
+    """Microbenchmarks of BaseRepository/UserRepository methods, cache off."""
+    repo = AsyncUserRepository(User)
+    sync_repo = UserRepository(User)
+    rng = random.Random(42)
+    ids = [rng.randint(1, scale) for _ in range(iterations + 100)]
+    results = []
+
+    async def get(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.get(db, ids[i])
+
+    async def get_by_email(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.get_by_email(db, email=seed_email(ids[i] - 1))
+
+    def sync_get_blocking(i: int) -> None:
+        with SessionLocal() as db:
+            sync_repo.get(db, ids[i])
+
+    async def sync_get(i: int) -> None:
+        await asyncio.to_thread(sync_get_blocking, i)
+
+    async def get_100_one_by_one(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            for id in ids[i % 100:][:100]:
+                await repo.get(db, id)
+
+    async def get_many_100(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.get_many(db, ids[i % 100:][:100])
+
+    async def first_page(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.get_page(db, limit=100)
+
+    # Cursor pointing at the last page, i.e. the deepest keyset seek
+    async with AsyncSessionLocal() as db:
+        max_id = await db.scalar(select(func.max(User.id)))
+    deep_id = max(max_id - 100, 0)
+    deep_cursor = encode_cursor("id", deep_id, deep_id)
+
+    async def deep_page_keyset(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.get_page(db, cursor=deep_cursor, limit=100)
+
+    async def deep_page_offset(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.get_multi(db, skip=max(scale - 100, 0), limit=100)
+
+    deep_iterations = max(iterations // 10, 10)
+    results.append(await measure("repository.get", get, iterations=iterations))
+    results.append(await measure("repository.get_by_email", get_by_email, iterations=iterations))
+    results.append(await measure("repository.get.concurrent", get, iterations=iterations, concurrency=20))
+    results.extend(await hot_key_benchmarks(scale, iterations))
+    results.append(await measure("repository.sync_get.threadpool", sync_get, iterations=iterations, concurrency=20))
+    results.append(await measure("repository.get.x100", get_100_one_by_one, iterations=deep_iterations))
+    results.append(await measure("repository.get_many.100", get_many_100, iterations=deep_iterations))
+    results.append(await measure("repository.get_page.first", first_page, iterations=deep_iterations))
+    results.append(await measure("repository.get_page.deep_keyset", deep_page_keyset, iterations=deep_iterations))
+    results.append(await measure("repository.get_multi.deep_offset", deep_page_offset, iterations=deep_iterations))
+
+    await _cleanup_scratch()
+    created: List[int] = []
+
+    async def create(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            user = await repo.create(
+                db, obj_in={"email": f"c{i}@{SCRATCH_DOMAIN}", "hashed_password": "x"}
+            )
+            created.append(user.id)
+
+    async def update_by_id(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.update_by_id(db, id=created[i % len(created)], obj_in={"full_name": f"n{i}"})
+
+    async def delete_one(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.delete(db, id=created.pop())
+
+    results.append(await measure("repository.create", create, iterations=iterations, warmup=0))
+    results.append(await measure("repository.update_by_id", update_by_id, iterations=iterations))
+    results.append(await measure("repository.delete", delete_one, iterations=iterations, warmup=0))
+
+    batch = 1000
+
+    async def create_many(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await repo.create_many(
+                db,
+                objs_in=[
+                    {"email": f"b{i}-{j}@{SCRATCH_DOMAIN}", "hashed_password": "x"}
+                    for j in range(batch)
+                ],
+            )
+
+    result = await measure("repository.create_many.1000", create_many, iterations=5, warmup=0)
+    result.ops_per_sec *= batch
+    results.append(result)
+    await _cleanup_scratch()
+    return results
+
+
+async def hot_key_benchmarks(scale: int, iterations: int, concurrency: int = 50) -> List[BenchResult]:
+    """
+    Many concurrent lookups of a handful of hot users with the cache off,
+    with and without single-flight coalescing, on the async and threaded
+    sync paths. Prints the SQL statements each variant issued.
+    """
+    hot_ids = [1 + i * max(scale // 5, 1) % scale for i in range(5)]
+    results = []
+
+    def async_get(repo: AsyncUserRepository):
+        async def operation(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await repo.get(db, hot_ids[i % len(hot_ids)])
+        return operation
+
+    def sync_get(repo: UserRepository):
+        def blocking(i: int) -> None:
+            with SessionLocal() as db:
+                repo.get(db, hot_ids[i % len(hot_ids)])
+
+        async def operation(i: int) -> None:
+            await asyncio.to_thread(blocking, i)
+        return operation
+
+    variants = [
+        ("repository.get.hot_key", async_get(AsyncUserRepository(User))),
+        ("repository.get.hot_key.singleflight",
+         async_get(AsyncUserRepository(User, flight=SingleFlight(timeout=2.0)))),
+        ("repository.sync_get.hot_key", sync_get(UserRepository(User))),
+        ("repository.sync_get.hot_key.singleflight",
+         sync_get(UserRepository(User, flight=ThreadedSingleFlight(timeout=2.0)))),
+    ]
+    for name, operation in variants:
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        try:
+            result = await measure(name, operation, iterations=iterations, concurrency=concurrency, warmup=0)
+        finally:
+            request_stats.reset(token)
+        print(f"   {name}: {stats.db_queries} SQL statements for {iterations} lookups")
+        results.append(result)
+    return results
+
+
+async def service_benchmarks(scale: int, iterations: int) -> List[BenchResult]:
+    """UserService operations, including the cache and password hashing."""
+    rng = random.Random(7)
+    ids = [rng.randint(1, scale) for _ in range(iterations + 100)]
+    hot_ids = ids[:50]
+    results = []
+
+    async def get_user_cached(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await async_user_service.get_user(db, hot_ids[i % len(hot_ids)])
+
+    async def get_user_by_email(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await async_user_service.get_user_by_email(db, seed_email(ids[i] - 1))
+
+    async def authenticate(i: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await async_user_service.authenticate(db, seed_email(ids[i] - 1), SEED_PASSWORD)
+
+    def count_users(mode: str):
+        async def operation(i: int) -> None:
+            async with AsyncSessionLocal() as db:
+                await async_user_service.count_users(db, mode=mode)
+        return operation
+
+    user_cache.local.clear()
+    for mode in ("exact", "estimated", "cached"):
+        async with AsyncSessionLocal() as db:
+            _, used = await async_user_service.count_users(db, mode=mode)
+        results.append(await measure(
+            f"service.count_users.{mode}" + ("" if used == mode else f" ({used})"),
+            count_users(mode), iterations=max(iterations // 10, 10),
+        ))
+    results.append(await measure("service.get_user.hot_cached", get_user_cached, iterations=iterations))
+    results.append(await measure("service.get_user_by_email", get_user_by_email, iterations=iterations))
+    results.append(await measure(
+        "service.authenticate", authenticate, iterations=max(iterations // 20, 10), concurrency=4
+    ))
+    return results
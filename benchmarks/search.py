@@ -0,0 +1,61 @@
+import random
+from typing import List
+
+import httpx
+
+from app.core.config import get_settings
+from benchmarks.harness import BenchResult, measure
+from benchmarks.http import _check
+
+settings = get_settings()
+
+PAGE_SIZE = 1000
+
+
+async def search_benchmarks(scale: int, iterations: int) -> List[BenchResult]:
+    """
+    Finding users by part of their email or name: GET /users/search versus
+    what clients did before it existed, paging through GET /users/ and
+    filtering each page themselves until they have enough hits. Run with
+    --scale 1000000 or more, against Postgres, to exercise the indexes.
+    """
+    from main import app
+
+    users = f"{settings.API_V1_PREFIX}/users/users/"
+    rng = random.Random(19)
+    # Digits of a seeded id: hits email and full_name, anywhere in the string
+    needles = [str(rng.randint(1, scale))[-5:] for _ in range(iterations + 100)]
+    prefixes = [f"user{rng.randint(1, scale)}" for _ in range(iterations + 100)]
+    results = []
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+    ) as client:
+        def search(queries: List[str]):
+            async def operation(i: int) -> None:
+                _check(await client.get(f"{users}search", params={"q": queries[i], "limit": 20}), 200)
+            return operation
+
+        async def client_filter(i: int) -> None:
+            needle = needles[i]
+            hits = 0
+            params = {"limit": PAGE_SIZE}
+            while hits < 20:
+                response = await client.get(users, params=params)
+                _check(response, 200)
+                hits += sum(
+                    needle in user["email"] or needle in (user["full_name"] or "")
+                    for user in response.json() if user["is_active"]
+                )
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+                params["cursor"] = cursor
+
+        results.append(await measure("search.GET /users/search substring", search(needles), iterations=iterations))
+        results.append(await measure("search.GET /users/search prefix", search(prefixes), iterations=iterations))
+        results.append(await measure(
+            "search.client filtering GET /users/", client_filter,
+            iterations=max(iterations // 100, 3), warmup=1,
+        ))
+    return results
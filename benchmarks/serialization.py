@@ -0,0 +1,82 @@
+from typing import List
+
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select
+
+from app.api.v1.schemas.user import User as UserSchema
+from app.core.config import get_settings
+from app.core.serialization import fast_response
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from benchmarks.harness import BenchResult, measure
+
+settings = get_settings()
+
+PAGE = 1000
+
+
+async def serialization_benchmarks(iterations: int) -> List[BenchResult]:
+    """
+    Cost of turning loaded users into a JSON body: FastAPI's response_model
+    path (validate the rows into the schema, serialize, json.dumps) versus
+    fast_response (orjson straight from the rows), for one user and for a
+    page of PAGE. Then the same choice end to end, GET /users/{id} and
+    GET /users/?limit=PAGE in-process with FAST_JSON_RESPONSES off and on.
+    """
+    from main import app
+
+    async with AsyncSessionLocal() as db:
+        rows = list((await db.scalars(select(User).order_by(User.id).limit(PAGE))).all())
+    one = create_response_field(name="Response_user", type_=UserSchema)
+    many = create_response_field(name="Response_users", type_=List[UserSchema])
+    results = []
+
+    def response_model(field, content):
+        async def operation(i: int) -> None:
+            JSONResponse(await serialize_response(field=field, response_content=content))
+        return operation
+
+    def fast(content, many: bool):
+        async def operation(i: int) -> None:
+            fast_response(UserSchema, content, many=many)
+        return operation
+
+    page_iterations = max(iterations // 10, 10)
+    results.append(await measure("serialization.response_model x1", response_model(one, rows[0]), iterations=iterations))
+    results.append(await measure("serialization.fast_response x1", fast(rows[0], False), iterations=iterations))
+    results.append(await measure(f"serialization.response_model x{len(rows)}", response_model(many, rows), iterations=page_iterations))
+    results.append(await measure(f"serialization.fast_response x{len(rows)}", fast(rows, True), iterations=page_iterations))
+
+    users = f"{settings.API_V1_PREFIX}/users/users/"
+    enabled = settings.FAST_JSON_RESPONSES
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+        ) as client:
+
+            async def get_user(i: int) -> None:
+                response = await client.get(f"{users}{rows[i % len(rows)].id}")
+                if response.status_code != 200:
+                    raise RuntimeError(f"GET /users/{{id}} -> {response.status_code}")
+
+            async def list_page(i: int) -> None:
+                response = await client.get(users, params={"limit": PAGE})
+                if response.status_code != 200:
+                    raise RuntimeError(f"GET /users/ -> {response.status_code}")
+
+            for flag in (False, True):
+                settings.FAST_JSON_RESPONSES = flag
+                label = f"FAST_JSON_RESPONSES={str(flag).lower()}"
+                results.append(await measure(
+                    f"serialization.GET /users/{{id}} {label}", get_user, iterations=iterations
+                ))
+                results.append(await measure(
+                    f"serialization.GET /users/?limit={PAGE} {label}", list_page,
+                    iterations=page_iterations,
+                ))
+    finally:
+        settings.FAST_JSON_RESPONSES = enabled
+    return results
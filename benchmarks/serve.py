@@ -0,0 +1,71 @@
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+import httpx
+
+from app.core.config import get_settings
+from app.serve import available_cpus
+from benchmarks.harness import BenchResult, measure
+from benchmarks.startup import _free_port
+
+settings = get_settings()
+
+
+async def _wait_ready(client: httpx.AsyncClient, process: asyncio.subprocess.Process, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.returncode is None:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("server did not become ready")
+
+
+async def serve_benchmarks(
+    scale: int, iterations: int, concurrency: int, max_workers: Optional[int] = None
+) -> List[BenchResult]:
+    """
+    Throughput of GET /users/{id} over real HTTP against `python -m app.serve`
+    with 1, 2, 4 ... up to the available CPUs. The load generator is a single
+    process, so at high worker counts it may become the bottleneck itself.
+    """
+    max_workers = max_workers or available_cpus()
+    counts = sorted({min(2 ** n, max_workers) for n in range(max_workers.bit_length() + 1)})
+    rng = random.Random(18)
+    ids = [rng.randint(1, scale) for _ in range(iterations + 100)]
+    path = f"{settings.API_V1_PREFIX}/users/users/"
+    results = []
+
+    for workers in counts:
+        port = _free_port()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.serve", "--host", "127.0.0.1",
+            "--port", str(port), "--workers", str(workers),
+            env=dict(os.environ), stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None
+            ) as client:
+                await _wait_ready(client, process)
+
+                async def get_user(i: int) -> None:
+                    response = await client.get(f"{path}{ids[i]}")
+                    if response.status_code != 200:
+                        raise RuntimeError(f"GET {path}{ids[i]} -> {response.status_code}")
+
+                results.append(await measure(
+                    f"serve.GET /users/{{id}} workers={workers}", get_user,
+                    iterations=iterations, concurrency=concurrency, warmup=concurrency,
+                ))
+        finally:
+            process.terminate()
+            await process.wait()
+    return results
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.config import get_settings
+from benchmarks.harness import BenchResult, measure, summarize
+
+settings = get_settings()
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _import_main() -> float:
+    """Seconds to import main in a fresh interpreter, excluding its own startup."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", IMPORT_SNIPPET,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError("importing main failed")
+    return float(stdout.decode().strip().splitlines()[-1])
+
+
+async def _first_good_response(path: str, env: Dict[str, str], timeout: float = 60.0) -> None:
+    """Start uvicorn and poll `path` until it answers 200."""
+    port = _free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+        env={**os.environ, **env},
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if process.returncode is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"server never answered {path} with 200")
+                try:
+                    if (await client.get(path)).status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.005)
+    finally:
+        process.terminate()
+        await process.wait()
+
+
+async def startup_benchmarks(iterations: int, runs: Optional[int] = None) -> List[BenchResult]:
+    """
+    Cold-start costs, each sample in a fresh interpreter: importing main,
+    and time from spawning uvicorn to the first 200 from GET /users/{id}
+    and from /ready, with and without the startup warm-up.
+    """
+    runs = runs or max(min(iterations // 100, 10), 3)
+    user_path = f"{settings.API_V1_PREFIX}/users/users/1"
+    await _import_main()  # Untimed, to fill the OS page cache and __pycache__
+    import_times = [await _import_main() for _ in range(runs)]
+    results = [summarize("startup.import main", import_times)]
+
+    def first_response(path: str, warmup: bool):
+        env = {"STARTUP_WARMUP": "true" if warmup else "false"}
+
+        async def operation(i: int) -> None:
+            await _first_good_response(path, env)
+        return operation
+
+    for warmup in (False, True):
+        suffix = "" if warmup else ".no_warmup"
+        results.append(await measure(
+            f"startup.first_response{suffix}", first_response(user_path, warmup), iterations=runs, warmup=0
+        ))
+    results.append(await measure(
+        "startup.ready", first_response("/ready", True), iterations=runs, warmup=0
+    ))
+    return results
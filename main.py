@@ -1,18 +1,66 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
+from app.core.errors import ServiceUnavailableException
+from app.core.limiter import AIMDLimit, LoadSheddingMiddleware
+from app.api.debug import router as debug_router
 from app.api.v1.api import api_router
-from app.core.logger import setup_logging
+from app.core.audit import audit_log
+from app.core.logger import get_log_stats, setup_logging
+from app.core.metrics import MetricsMiddleware, register_stats, render_metrics
+from app.core.profiling import ProfilingMiddleware, profile_store
+from app.core.security import password_hasher
+from app.db.routing import ReadYourWritesMiddleware
+from app.core.warmup import warm_up
+from app.db.session import close_connections, replicas
+from app.repository.user import async_user_repository, sync_user_flight, user_cache, user_flight
 
 settings = get_settings()
 
 # Setup logging
 setup_logging()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start serving straight away and warm up in the background; /ready
+    reports 503 until the warm-up has finished. On shutdown, write out the
+    audit buffer, stop the hashing workers and close every pool and client.
+    """
+    app.state.ready = False
+    if settings.USER_REPOSITORY_BACKEND == "mongo":
+        await async_user_repository.ensure_indexes()
+    warmup_task: Optional[asyncio.Task] = None
+    if settings.STARTUP_WARMUP:
+        async def run_warm_up() -> None:
+            await warm_up()
+            app.state.ready = True
+
+        warmup_task = asyncio.create_task(run_warm_up())
+    else:
+        app.state.ready = True
+    yield
+    app.state.ready = False
+    if warmup_task is not None:
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    if audit_log is not None:
+        await audit_log.close()
+    password_hasher.shutdown()
+    await user_cache.close()
+    await close_connections()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
-    openapi_url=f"{settings.API_V1_PREFIX}/openapi.json"
+    openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -24,6 +72,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes stickiness for clients that were routed to replicas
+if replicas.engines:
+    app.add_middleware(
+        ReadYourWritesMiddleware, sticky_seconds=settings.REPLICA_STICKY_SECONDS
+    )
+
+# On-demand profiles of single requests, served under /debug/profiles
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        sample_interval=settings.PROFILING_SAMPLE_INTERVAL,
+    )
+    app.include_router(debug_router, prefix="/debug")
+    register_stats(
+        "request_profiles", "Requests profiled, stored, and skipped while another was profiled",
+        profile_store.status, label="state",
+    )
+
+# Per-route latency, status and DB work, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Shed load before it queues on the DB pool; added last so it runs first
+concurrency_limit = AIMDLimit(
+    initial=settings.CONCURRENCY_LIMIT_INITIAL,
+    min_limit=settings.CONCURRENCY_LIMIT_MIN,
+    max_limit=settings.CONCURRENCY_LIMIT_MAX,
+    latency_target=settings.CONCURRENCY_LATENCY_TARGET,
+    backoff=settings.CONCURRENCY_BACKOFF,
+)
+if settings.LOAD_SHEDDING_ENABLED:
+    app.add_middleware(
+        LoadSheddingMiddleware,
+        limit=concurrency_limit,
+        priorities=settings.ROUTE_PRIORITIES,
+        low_priority_share=settings.LOAD_SHED_LOW_PRIORITY_SHARE,
+        retry_after=settings.LOAD_SHED_RETRY_AFTER,
+    )
+    register_stats(
+        "http_concurrency_limit", "Adaptive in-flight request limit and requests counted against it",
+        concurrency_limit.status, label="state",
+    )
+
+register_stats(
+    "user_cache_events", "User cache hit/miss counters by tier",
+    lambda: user_cache.stats.as_dict(), label="event",
+)
+register_stats(
+    "user_lookup_singleflight", "User lookups that ran a query, joined one in flight, or timed out waiting",
+    lambda: {
+        **{f"async_{key}": value for key, value in user_flight.stats.as_dict().items()},
+        **{f"sync_{key}": value for key, value in sync_user_flight.stats.as_dict().items()},
+    },
+    label="event",
+)
+if audit_log is not None:
+    register_stats(
+        "audit_log_events", "Audit events recorded, written, spilled and replayed, and the current backlog",
+        audit_log.status, label="state",
+    )
+register_stats(
+    "password_hasher_jobs", "Password hashing jobs pending and rejected",
+    lambda: {"pending": password_hasher.pending, "rejected": password_hasher.rejected},
+    label="state",
+)
+register_stats(
+    "logging_records", "Log records queued, dropped on overflow and sampled out",
+    get_log_stats, label="state",
+)
+register_stats(
+    "db_replica_healthy", "Whether each read replica is currently used (1) or skipped (0)",
+    replicas.status, label="replica",
+)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -40,4 +164,19 @@ async def health_check():
         "status": "healthy",
         "service": settings.APP_NAME,
         "environment": settings.ENV
-    } 
\ No newline at end of file
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the startup warm-up has finished"""
+    if not app.state.ready:
+        raise ServiceUnavailableException("Warming up")
+    return {"status": "ready"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,26 @@
+"""Add users (created_at, id) index for keyset pagination
+
+Revision ID: 3c1f9b2d7e41
+Revises: 68a5efe27d2a
+Create Date: 2026-10-16 09:12:44.318201
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9b2d7e41'
+down_revision: Union[str, None] = '68a5efe27d2a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,45 @@
+"""Add users search indexes (pg_trgm and text_pattern_ops on email, full_name)
+
+Revision ID: 9a4e2c7b5d18
+Revises: 3c1f9b2d7e41
+Create Date: 2026-10-16 22:05:31.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e2c7b5d18'
+down_revision: Union[str, None] = '3c1f9b2d7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Postgres only; elsewhere (SQLite) search falls back to a scan
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in ('email', 'full_name'):
+        op.create_index(
+            f'ix_users_{column}_trgm', 'users', [column], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+            postgresql_where=sa.text('is_active'),
+        )
+        op.create_index(
+            f'ix_users_{column}_lower_prefix', 'users',
+            [sa.text(f'lower({column}) text_pattern_ops')], unique=False,
+            postgresql_where=sa.text('is_active'),
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in ('email', 'full_name'):
+        op.drop_index(f'ix_users_{column}_lower_prefix', table_name='users')
+        op.drop_index(f'ix_users_{column}_trgm', table_name='users')
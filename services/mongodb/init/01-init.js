@@ -47,4 +47,10 @@ db.createCollection('users', {
 
 // Create indexes
 db.users.createIndex({ 'email': 1 }, { unique: true });
-db.users.createIndex({ 'is_active': 1 }); 
\ No newline at end of file
+db.users.createIndex({ 'is_active': 1 }); 
+db.users.createIndex({ 'created_at': 1, '_id': 1 });
+
+// Audit trail of user changes (app/core/audit.py)
+db.createCollection('audit');
+db.audit.createIndex({ 'entity': 1, 'entity_id': 1, 'at': -1 });
+db.audit.createIndex({ 'at': -1 });
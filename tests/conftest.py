@@ -0,0 +1,75 @@
+import asyncio
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List
+
+# Settings are read once, at import; point the app at a throwaway SQLite
+# database and keep it off MongoDB, Redis and the hashing process pool.
+_tmp = tempfile.mkdtemp(prefix="starter-kit-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_tmp}/app.db",
+    "DEBUG": "false",
+    "STARTUP_WARMUP": "false",
+    "AUDIT_ENABLED": "false",
+    "CACHE_REDIS_ENABLED": "false",
+    "PASSWORD_HASH_WORKERS": "0",
+    "BCRYPT_ROUNDS": "4",
+})
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.core.auth import principal_cache  # noqa: E402
+from app.db.session import async_engine  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.repository.user import user_cache  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    # One loop for the session: pooled aiosqlite connections are bound to it
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(autouse=True)
+async def database():
+    """Fresh tables and empty caches for every test."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    user_cache.local.clear()
+    if principal_cache is not None:
+        principal_cache.local.clear()
+    yield
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@contextmanager
+def _collect_statements(engine) -> Iterator[List[str]]:
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def count_statements():
+    """`with count_statements() as statements:` collects the SQL run in the block."""
+    return lambda engine=async_engine: _collect_statements(engine)
@@ -0,0 +1,262 @@
+import asyncio
+import os
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.audit import AuditLog
+from app.repository.user import async_user_repository
+from app.services import user as user_service_module
+
+USERS = "/api/v1/users/users/"
+
+
+class CountingCollection:
+    """A mongomock-motor collection that counts insert_many calls."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.inserts = 0
+
+    async def insert_many(self, documents, **kwargs):
+        self.inserts += 1
+        return await self.collection.insert_many(documents, **kwargs)
+
+
+def unavailable():
+    raise ConnectionError("mongo unavailable")
+
+
+@pytest.fixture
+def collection():
+    return CountingCollection(AsyncMongoMockClient()["tests"]["audit"])
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "audit-spill.jsonl")
+
+
+def spilled_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def test_flushes_when_a_batch_is_full(collection, spill_path):
+    audit = AuditLog(lambda: collection, batch_size=3, flush_interval=3600, spill_path=spill_path)
+    for i in range(2):
+        audit.record("create", "user", i, None, {"id": i})
+    await asyncio.sleep(0.05)
+    assert audit.stats.written == 0
+    audit.record("create", "user", 2, None, {"id": 2})
+    await wait_for(lambda: audit.stats.written == 3)
+    assert collection.inserts == 1
+    await audit.close()
+
+
+async def test_flush_writes_insert_many_batches(collection, spill_path):
+    audit = AuditLog(lambda: collection, batch_size=3, flush_interval=3600, spill_path=spill_path)
+    for i in range(7):
+        audit.record("create", "user", i, None, {"id": i})
+    await audit.flush()
+    assert audit.stats.written == 7
+    assert audit.backlog == 0
+    assert collection.inserts == 3
+    assert await collection.collection.count_documents({}) == 7
+    await audit.close()
+
+
+async def test_flushes_on_interval(collection, spill_path):
+    audit = AuditLog(lambda: collection, batch_size=100, flush_interval=0.05, spill_path=spill_path)
+    audit.record("delete", "user", 1, {"id": 1}, None)
+    await wait_for(lambda: audit.stats.written == 1)
+    assert collection.inserts == 1
+    await audit.close()
+
+
+async def test_spills_when_mongo_is_unavailable(spill_path):
+    audit = AuditLog(unavailable, batch_size=2, flush_interval=3600, spill_path=spill_path)
+    for i in range(5):
+        audit.record("update", "user", i, {"full_name": "a"}, {"full_name": "b"})
+    await audit.flush()
+    assert audit.stats.flush_failures == 1
+    assert audit.stats.spilled == 5
+    assert audit.spill_backlog == 5
+    assert audit.backlog == 0
+    assert spilled_lines(spill_path) == 5
+    await audit.close()
+
+
+async def test_spills_past_max_buffer(collection, spill_path):
+    audit = AuditLog(
+        lambda: collection, batch_size=100, flush_interval=3600, max_buffer=2, spill_path=spill_path
+    )
+    for i in range(5):
+        audit.record("create", "user", i, None, {"id": i})
+    await wait_for(lambda: audit.stats.spilled == 3)
+    assert audit.backlog == 2
+    assert spilled_lines(spill_path) == 3
+    await audit.close()
+
+
+async def test_replays_spilled_events_in_batches(collection, spill_path):
+    audit = AuditLog(unavailable, batch_size=2, flush_interval=3600, spill_path=spill_path)
+    for i in range(5):
+        audit.record("create", "user", i, None, {"id": i})
+    await audit.flush()
+
+    audit.collection_factory = lambda: collection
+    await audit.flush()
+    assert audit.stats.replayed == 5
+    assert audit.spill_backlog == 0
+    assert collection.inserts == 3
+    assert await collection.collection.count_documents({}) == 5
+    assert not os.path.exists(spill_path)
+    assert not any(name.endswith(".replaying") for name in os.listdir(os.path.dirname(spill_path)))
+    await audit.close()
+
+
+async def test_replay_failure_keeps_the_rest(collection, spill_path):
+    audit = AuditLog(unavailable, batch_size=2, flush_interval=3600, spill_path=spill_path)
+    for i in range(5):
+        audit.record("create", "user", i, None, {"id": i})
+    await audit.flush()
+
+    # Mongo comes back for one batch, then goes away again
+    class Flaky:
+        writes = 0
+
+        async def insert_many(self, documents, **kwargs):
+            Flaky.writes += 1
+            if Flaky.writes > 1:
+                raise ConnectionError("mongo unavailable")
+            return await collection.insert_many(documents, **kwargs)
+
+    audit.collection_factory = Flaky
+    await audit.flush()
+    assert audit.stats.replayed == 2
+    assert audit.spill_backlog == 3
+    assert spilled_lines(spill_path) == 3
+
+    audit.collection_factory = lambda: collection
+    await audit.flush()
+    assert audit.stats.replayed == 5
+    ids = sorted(doc["entity_id"] for doc in await collection.collection.find().to_list(None))
+    assert ids == [0, 1, 2, 3, 4]
+    await audit.close()
+
+
+async def test_replay_skips_events_already_written(collection, spill_path):
+    audit = AuditLog(lambda: collection, batch_size=10, flush_interval=3600, spill_path=spill_path)
+    audit.record("create", "user", 1, None, {"id": 1})
+    await audit.flush()
+    # The same event spilled too, as after a write that timed out but landed
+    await audit._spill(await collection.collection.find().to_list(None))
+
+    await audit.flush()
+    assert audit.spill_backlog == 0
+    assert await collection.collection.count_documents({}) == 1
+    await audit.close()
+
+
+async def test_spill_is_replayed_by_the_next_process(collection, spill_path):
+    audit = AuditLog(unavailable, batch_size=10, flush_interval=3600, spill_path=spill_path)
+    audit.record("create", "user", 1, None, {"id": 1})
+    await audit.close()
+
+    restarted = AuditLog(lambda: collection, batch_size=10, flush_interval=3600, spill_path=spill_path)
+    assert restarted.spill_backlog == 1
+    restarted.record("create", "user", 2, None, {"id": 2})
+    await restarted.flush()
+    assert await collection.collection.count_documents({}) == 2
+    await restarted.close()
+
+
+@pytest.fixture
+async def audit_log(monkeypatch, collection, spill_path):
+    audit = AuditLog(lambda: collection, batch_size=100, flush_interval=3600, spill_path=spill_path)
+    monkeypatch.setattr(user_service_module, "audit_log", audit)
+    yield audit
+    await audit.close()
+
+
+@pytest.fixture(params=["cached", "uncached"])
+def cache_mode(request, monkeypatch):
+    if request.param == "uncached":
+        monkeypatch.setattr(async_user_repository, "cache", None)
+    return request.param
+
+
+async def test_user_changes_are_audited(client, audit_log, collection, count_statements, cache_mode):
+    response = await client.post(USERS, json={"email": "audited@example.com", "password": "secret"})
+    user_id = response.json()["id"]
+    await client.get(f"{USERS}{user_id}")
+
+    # On SQLite the before-image is a SELECT ... FOR UPDATE ahead of the
+    # UPDATE; PostgreSQL reads it in the UPDATE itself
+    with count_statements() as statements:
+        response = await client.put(f"{USERS}{user_id}", json={"full_name": "Renamed"})
+    assert response.status_code == 200
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "UPDATE"]
+    await client.delete(f"{USERS}{user_id}")
+    await audit_log.flush()
+
+    events = await collection.collection.find().to_list(None)
+    assert [event["action"] for event in events] == ["create", "update", "delete"]
+    assert events[0]["after"]["hashed_password"] == "<redacted>"
+    update = events[1]
+    assert update["before"]["full_name"] is None
+    assert update["after"]["full_name"] == "Renamed"
+    assert set(update["after"]) == {"full_name", "updated_at"}
+
+
+async def test_password_change_is_audited_redacted(client, audit_log, collection, cache_mode):
+    response = await client.post(USERS, json={"email": "audited@example.com", "password": "secret"})
+    user_id = response.json()["id"]
+
+    await client.put(f"{USERS}{user_id}", json={"password": "changed"})
+    await audit_log.flush()
+    update = await collection.collection.find_one({"action": "update"})
+    assert update["before"]["hashed_password"] == "<redacted>"
+    assert update["after"]["hashed_password"] == "<redacted>"
+
+
+async def test_bulk_update_is_audited_with_before(client, audit_log, collection, cache_mode):
+    ids = []
+    for i in range(2):
+        response = await client.post(USERS, json={"email": f"bulk{i}@example.com", "password": "secret"})
+        ids.append(response.json()["id"])
+
+    response = await client.put(f"{USERS}bulk", json={"items": [
+        {"id": ids[0], "full_name": "First"},
+        {"id": ids[1], "is_active": False},
+        {"id": 999, "full_name": "Missing"},
+    ]})
+    assert response.status_code == 200
+    await audit_log.flush()
+    updates = {
+        event["entity_id"]: event
+        for event in await collection.collection.find({"action": "update"}).to_list(None)
+    }
+    assert set(updates) == set(ids)
+    assert updates[ids[0]]["before"]["full_name"] is None
+    assert updates[ids[0]]["after"]["full_name"] == "First"
+    assert updates[ids[1]]["before"]["is_active"] is True
+    assert updates[ids[1]]["after"]["is_active"] is False
+    assert "full_name" not in updates[ids[1]]["after"]
+
+
+async def test_update_without_audit_is_one_statement(client, count_statements, cache_mode):
+    response = await client.post(USERS, json={"email": "quiet@example.com", "password": "secret"})
+    with count_statements() as statements:
+        await client.put(f"{USERS}{response.json()['id']}", json={"full_name": "Renamed"})
+    assert len(statements) == 1
@@ -0,0 +1,100 @@
+"""
+Bearer token resolution, and the principal cache kept in step with
+changes to the user a token belongs to.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+
+from app.core.auth import principal_cache
+from app.core.config import get_settings
+
+settings = get_settings()
+
+USERS = "/api/v1/users/users/"
+TOKEN = "/api/v1/auth/token"
+ME = "/api/v1/auth/me"
+
+pytestmark = pytest.mark.skipif(principal_cache is None, reason="AUTH_CACHE_ENABLED is off")
+
+
+def signed(**claims) -> str:
+    return jwt.encode(claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+async def user(client):
+    response = await client.post(USERS, json={"email": "me@example.com", "password": "secret"})
+    return response.json()
+
+
+@pytest.fixture
+async def token(client, user):
+    response = await client.post(TOKEN, data={"username": "me@example.com", "password": "secret"})
+    token = response.json()["access_token"]
+    response = await client.get(ME, headers=bearer(token))
+    assert response.status_code == 200
+    assert principal_cache.get(token) is not None
+    return token
+
+
+async def test_wrong_password(client, user):
+    response = await client.post(TOKEN, data={"username": "me@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("case", ["no exp", "no sub", "sub not an id", "null sub", "no such user"])
+async def test_signed_tokens_with_bad_claims_are_unauthorized(client, user, case):
+    exp = datetime.utcnow() + timedelta(minutes=5)
+    claims = {
+        "no exp": {"sub": str(user["id"])},
+        "no sub": {"exp": exp},
+        "sub not an id": {"sub": "not-an-id", "exp": exp},
+        "null sub": {"sub": None, "exp": exp},
+        "no such user": {"sub": "999", "exp": exp},
+    }[case]
+    response = await client.get(ME, headers=bearer(signed(**claims)))
+    assert response.status_code == 401
+
+
+async def test_forged_and_expired_tokens_are_unauthorized(client, user):
+    exp = datetime.utcnow() + timedelta(minutes=5)
+    forged = jwt.encode({"sub": str(user["id"]), "exp": exp}, "not-the-key", algorithm="HS256")
+    expired = signed(sub=str(user["id"]), exp=datetime.utcnow() - timedelta(minutes=1))
+    for token in (forged, expired, "garbage"):
+        assert (await client.get(ME, headers=bearer(token))).status_code == 401
+
+
+async def test_update_drops_cached_tokens(client, user, token):
+    await client.put(f"{USERS}{user['id']}", json={"full_name": "Renamed"})
+    assert principal_cache.get(token) is None
+    assert (await client.get(ME, headers=bearer(token))).json()["full_name"] == "Renamed"
+
+
+async def test_deactivation_takes_effect_at_once(client, user, token):
+    await client.put(f"{USERS}{user['id']}", json={"is_active": False})
+    assert principal_cache.get(token) is None
+    assert (await client.get(ME, headers=bearer(token))).status_code == 403
+
+
+async def test_bulk_deactivation_takes_effect_at_once(client, user, token):
+    await client.put(f"{USERS}bulk", json={"items": [{"id": user["id"], "is_active": False}]})
+    assert principal_cache.get(token) is None
+    assert (await client.get(ME, headers=bearer(token))).status_code == 403
+
+
+async def test_delete_drops_cached_tokens(client, user, token):
+    await client.delete(f"{USERS}{user['id']}")
+    assert principal_cache.get(token) is None
+    assert (await client.get(ME, headers=bearer(token))).status_code == 401
+
+
+async def test_bulk_delete_drops_cached_tokens(client, user, token):
+    await client.post(f"{USERS}bulk/delete", json={"ids": [user["id"]]})
+    assert principal_cache.get(token) is None
+    assert (await client.get(ME, headers=bearer(token))).status_code == 401
@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.api.v1.schemas.user import UserCreate
+from app.core.cache import LocalTTLCache, TwoTierCache
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.repository.user import AsyncUserRepository
+from app.services.user import async_user_service
+
+CHANNEL = "cache:invalidate"
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+def worker_cache(server) -> TwoTierCache:
+    """The user cache of one worker: its own local tier, the shared Redis."""
+    redis = FakeRedis(server=server)
+    return TwoTierCache(
+        "users",
+        local=LocalTTLCache(maxsize=100, ttl=60),
+        redis_factory=lambda: redis,
+        redis_ttl=60,
+        channel=CHANNEL,
+    )
+
+
+@pytest.fixture
+async def caches(server):
+    workers = [worker_cache(server), worker_cache(server)]
+    yield workers
+    for cache in workers:
+        await cache.close()
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def subscribed(cache: TwoTierCache, count: int):
+    async def check():
+        _, subscribers = (await cache.redis.pubsub_numsub(cache.channel))[0]
+        return subscribers >= count
+
+    await wait_for(check)
+
+
+async def test_hit_in_each_tier(caches):
+    first, second = caches
+    assert await first.get("id:1") is None
+    assert (first.stats.local_misses, first.stats.redis_misses) == (1, 1)
+
+    await first.set("id:1", {"id": 1})
+    assert await first.get("id:1") == {"id": 1}
+    assert first.stats.local_hits == 1
+
+    # Another worker finds it in Redis, then in its own local tier
+    assert await second.get("id:1") == {"id": 1}
+    assert await second.get("id:1") == {"id": 1}
+    assert (second.stats.redis_hits, second.stats.local_hits) == (1, 1)
+
+
+async def test_get_many_reads_each_tier(caches):
+    first, second = caches
+    await first.set("id:1", 1)
+    await first.set("id:2", 2)
+    await second.get("id:1")
+
+    assert await second.get_many(["id:1", "id:2", "id:3"]) == [1, 2, None]
+    assert second.stats.local_hits == 1
+    assert (second.stats.redis_hits, second.stats.redis_misses) == (2, 1)
+    assert "id:2" in second.local
+
+
+async def test_invalidation_reaches_other_workers(caches):
+    first, second = caches
+    await first.set("id:1", {"id": 1})
+    await second.get("id:1")
+    assert "id:1" in second.local
+    await subscribed(first, 2)
+
+    dropped = []
+    second.add_invalidation_listener(dropped.extend)
+    await first.invalidate(["id:1"])
+
+    async def gone():
+        return "id:1" not in second.local
+
+    await wait_for(gone)
+    assert dropped == ["id:1"]
+    assert await first.redis.get("users:id:1") is None
+    assert await second.get("id:1") is None
+
+
+async def test_redis_failure_is_a_miss(server):
+    cache = worker_cache(server)
+    server.connected = False
+    await cache.set("id:1", 1)
+    cache.local.clear()
+    assert await cache.get("id:1") is None
+    assert await cache.get_many(["id:1"]) == [None]
+    assert cache.stats.redis_errors >= 3
+    server.connected = True
+    await cache.close()
+
+
+@pytest.fixture
+async def repositories(caches):
+    return [AsyncUserRepository(User, cache=cache) for cache in caches]
+
+
+async def create_user(repository, email):
+    async with AsyncSessionLocal() as db:
+        return await repository.create(
+            db, obj_in={"email": email, "hashed_password": "hash"}
+        )
+
+
+async def test_password_hash_is_never_cached(repositories, server, count_statements):
+    first, second = repositories
+    user = await create_user(first, "cached@example.com")
+    async with AsyncSessionLocal() as db:
+        loaded = await first.get(db, id=user.id)
+    assert loaded.hashed_password == "hash"
+
+    redis = FakeRedis(server=server)
+    cached = json.loads(await redis.get(f"users:id:{user.id}"))
+    assert "hashed_password" not in cached
+    assert "hashed_password" not in first.cache.local.get(f"id:{user.id}")
+
+    # Served from Redis to another worker, without the hash
+    with count_statements() as statements:
+        async with AsyncSessionLocal() as db:
+            other = await second.get(db, id=user.id)
+    assert statements == []
+    assert other.email == "cached@example.com"
+    assert other.hashed_password is None
+
+
+async def test_stale_email_pointer_is_not_followed(repositories):
+    repository, _ = repositories
+    renamed = await create_user(repository, "old@example.com")
+    async with AsyncSessionLocal() as db:
+        await repository.get_by_email(db, email="old@example.com")
+        # Invalidates the row and the new email, not the old email's pointer
+        await repository.update_by_id(db, id=renamed.id, obj_in={"email": "new@example.com"})
+    assert await repository.cache.get("email:old@example.com") == renamed.id
+    taken = await create_user(repository, "old@example.com")
+
+    async with AsyncSessionLocal() as db:
+        user = await repository.get_by_email(db, email="old@example.com")
+    assert user.id == taken.id
+    assert await repository.cache.get("email:old@example.com") == taken.id
+
+
+async def test_authenticate_a_cached_user():
+    async with AsyncSessionLocal() as db:
+        user = await async_user_service.create_user(
+            db, UserCreate(email="login@example.com", password="secret")
+        )
+        # Warm the cache, which holds everything but the hash
+        await async_user_service.get_user(db, user.id)
+        await async_user_service.get_user_by_email(db, "login@example.com")
+
+    async with AsyncSessionLocal() as db:
+        assert await async_user_service.authenticate(db, "login@example.com", "secret")
+        assert await async_user_service.authenticate(db, "login@example.com", "wrong") is None
@@ -0,0 +1,142 @@
+"""
+ETag / Last-Modified validators on user reads, and 304 answers to
+conditional requests.
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from app.core.conditional import collection_etag, entity_etag, is_not_modified
+
+USERS = "/api/v1/users/users/"
+
+
+async def create(client, email="etag@example.com"):
+    response = await client.post(USERS, json={"email": email, "password": "secret"})
+    assert response.status_code == 201
+    return response.json()
+
+
+async def fetch(client, user_id, **headers):
+    return await client.get(f"{USERS}{user_id}", headers=headers)
+
+
+async def test_get_carries_validators(client):
+    user = await create(client)
+    response = await fetch(client, user["id"])
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('"')
+    assert "Last-Modified" in response.headers
+
+
+async def test_matching_if_none_match_is_not_modified(client):
+    user = await create(client)
+    etag = (await fetch(client, user["id"])).headers["ETag"]
+
+    response = await fetch(client, user["id"], **{"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("header", [
+    "W/{etag}",
+    '"other", {etag}',
+    "*",
+])
+async def test_weak_listed_and_any_if_none_match(client, header):
+    user = await create(client)
+    etag = (await fetch(client, user["id"])).headers["ETag"]
+    response = await fetch(client, user["id"], **{"If-None-Match": header.format(etag=etag)})
+    assert response.status_code == 304
+
+
+async def test_stale_if_none_match_gets_the_user(client):
+    user = await create(client)
+    response = await fetch(client, user["id"], **{"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json()["email"] == user["email"]
+
+
+async def test_if_modified_since(client):
+    user = await create(client)
+    last_modified = (await fetch(client, user["id"])).headers["Last-Modified"]
+
+    response = await fetch(client, user["id"], **{"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(days=1), usegmt=True)
+    response = await fetch(client, user["id"], **{"If-Modified-Since": earlier})
+    assert response.status_code == 200
+
+
+async def test_if_none_match_takes_precedence(client):
+    user = await create(client)
+    last_modified = (await fetch(client, user["id"])).headers["Last-Modified"]
+    response = await fetch(
+        client, user["id"], **{"If-None-Match": '"stale"', "If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 200
+
+
+async def test_conditional_get_of_a_missing_user(client):
+    response = await fetch(client, 999, **{"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+async def test_etag_changes_after_an_update(client):
+    user = await create(client)
+    etag = (await fetch(client, user["id"])).headers["ETag"]
+
+    await client.put(f"{USERS}{user['id']}", json={"full_name": "Renamed"})
+    response = await fetch(client, user["id"], **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Renamed"
+    assert response.headers["ETag"] != etag
+
+
+async def test_list_etag(client):
+    await create(client, "a@example.com")
+    response = await client.get(USERS)
+    etag = response.headers["ETag"]
+    assert "Last-Modified" not in response.headers
+
+    response = await client.get(USERS, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # A new row changes the page, and so its ETag
+    await create(client, "b@example.com")
+    response = await client.get(USERS, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["ETag"] != etag
+
+
+async def test_list_etag_covers_the_total(client):
+    await create(client)
+    plain = (await client.get(USERS)).headers["ETag"]
+    counted = (await client.get(USERS, params={"count": "exact"})).headers["ETag"]
+    assert plain != counted
+
+
+def test_etags_are_stable_and_version_sensitive():
+    at = datetime(2024, 1, 2, 3, 4, 5, 6)
+    assert entity_etag(1, at) == entity_etag(1, at.replace(tzinfo=timezone.utc))
+    assert entity_etag(1, at) != entity_etag(1, at + timedelta(microseconds=1))
+    assert entity_etag(1, at) != entity_etag(2, at)
+    assert collection_etag([(1, at), (2, at)]) != collection_etag([(2, at), (1, at)])
+
+
+class FakeRequest:
+    def __init__(self, **headers):
+        self.headers = {name.lower(): value for name, value in headers.items()}
+
+
+def test_malformed_if_modified_since_is_ignored():
+    at = datetime(2024, 1, 2, 3, 4, 5)
+    assert not is_not_modified(FakeRequest(**{"If-Modified-Since": "yesterday"}), '"x"', at)
+    # A date without a zone is not an HTTP date
+    assert not is_not_modified(
+        FakeRequest(**{"If-Modified-Since": "Tue, 02 Jan 2024 03:04:05"}), '"x"', at
+    )
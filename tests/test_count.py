@@ -0,0 +1,99 @@
+"""
+`?count=` on the user list: the total in X-Total-Count and the mode that
+produced it in X-Total-Count-Mode.
+"""
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy import insert
+
+from app.core.cache import CachedCount
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.services import user as user_service_module
+
+USERS = "/api/v1/users/users/"
+
+
+async def create(client, email):
+    response = await client.post(USERS, json={"email": email, "password": "secret"})
+    assert response.status_code == 201
+    return response.json()
+
+
+async def total(client, mode):
+    response = await client.get(USERS, params={"count": mode, "limit": 1})
+    assert response.status_code == 200
+    return int(response.headers["X-Total-Count"]), response.headers["X-Total-Count-Mode"]
+
+
+async def insert_unseen(email):
+    """Add a row the way another service would, without adjusting the count."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User).values(email=email, hashed_password="x"))
+        await db.commit()
+
+
+async def test_no_count_by_default(client):
+    response = await client.get(USERS)
+    assert "X-Total-Count" not in response.headers
+
+
+async def test_exact(client):
+    for i in range(3):
+        await create(client, f"user{i}@example.com")
+    assert await total(client, "exact") == (3, "exact")
+
+
+async def test_estimated_falls_back_to_exact_on_sqlite(client):
+    for i in range(2):
+        await create(client, f"user{i}@example.com")
+    assert await total(client, "estimated") == (2, "exact")
+
+
+@pytest.fixture(params=["local", "redis"])
+def user_count(request, monkeypatch):
+    redis_factory = None
+    if request.param == "redis":
+        # The counter adjusts Redis with a Lua script
+        pytest.importorskip("lupa")
+        redis = FakeRedis(server=FakeServer())
+        redis_factory = lambda: redis  # noqa: E731
+    count = CachedCount("users:count", ttl=3600, redis_factory=redis_factory)
+    monkeypatch.setattr(user_service_module, "user_count", count)
+    return count
+
+
+async def test_cached_count_tracks_writes(client, user_count):
+    users = [await create(client, f"user{i}@example.com") for i in range(2)]
+    assert await total(client, "cached") == (2, "cached")
+
+    # Served from the counter, not recounted
+    await insert_unseen("unseen@example.com")
+    assert await total(client, "cached") == (2, "cached")
+    assert await total(client, "exact") == (3, "exact")
+
+    await create(client, "user2@example.com")
+    assert await total(client, "cached") == (3, "cached")
+
+    await client.delete(f"{USERS}{users[0]['id']}")
+    await client.delete(f"{USERS}{users[0]['id']}")
+    assert await total(client, "cached") == (2, "cached")
+
+
+async def test_cached_count_tracks_bulk_writes(client, user_count):
+    await create(client, "user0@example.com")
+    assert await total(client, "cached") == (1, "cached")
+
+    # Only the rows that landed are counted
+    response = await client.post(f"{USERS}bulk", json={"items": [
+        {"email": f"{name}@example.com", "password": "secret"}
+        for name in ["a", "b", "user0", "c"]
+    ]})
+    created = [item["id"] for item in response.json()["items"]]
+    assert len(created) == 3
+    assert await total(client, "cached") == (4, "cached")
+
+    response = await client.post(f"{USERS}bulk/delete", json={"ids": [*created[:2], 999]})
+    assert len(response.json()["errors"]) == 1
+    assert await total(client, "cached") == (2, "cached")
@@ -0,0 +1,81 @@
+"""
+GET /users/export: NDJSON and CSV bodies, CSV quoting, and gzip streams
+that decompress to the same export.
+"""
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from app.api.v1.routes import user as user_routes
+from app.services.export import USER_EXPORT_FIELDS
+
+USERS = "/api/v1/users/users/"
+EXPORT = f"{USERS}export"
+
+NAMES = [
+    None,
+    "Plain Name",
+    'Quoted "Name", with a comma',
+    "Line\nbreak",
+    "Ünïcödé ✓",
+]
+
+
+@pytest.fixture
+async def users(client, monkeypatch):
+    # Small batches, so every export spans several chunks
+    monkeypatch.setattr(user_routes.settings, "EXPORT_BATCH_SIZE", 2)
+    created = []
+    for i, name in enumerate(NAMES):
+        response = await client.post(
+            USERS, json={"email": f"export{i}@example.com", "password": "secret", "full_name": name}
+        )
+        created.append(response.json())
+    return created
+
+
+async def test_ndjson(client, users):
+    response = await client.get(EXPORT)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="users.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [tuple(row) for row in rows] == [USER_EXPORT_FIELDS] * len(NAMES)
+    assert [row["id"] for row in rows] == [user["id"] for user in users]
+    assert [row["full_name"] for row in rows] == NAMES
+    assert all("hashed_password" not in row for row in rows)
+
+
+async def test_csv_round_trips_awkward_values(client, users):
+    response = await client.get(EXPORT, params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert tuple(header) == USER_EXPORT_FIELDS
+    assert [row[header.index("email")] for row in rows] == [user["email"] for user in users]
+    assert [row[header.index("full_name")] for row in rows] == [name or "" for name in NAMES]
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+async def test_gzip_is_the_same_export(client, users, format):
+    plain = (await client.get(EXPORT, params={"format": format})).content
+
+    async with client.stream("GET", EXPORT, params={"format": format, "gzip": "true"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert raw[:2] == b"\x1f\x8b"
+    assert len(raw) < len(plain)
+    assert gzip.decompress(raw) == plain
+
+
+async def test_empty_export(client):
+    assert (await client.get(EXPORT)).content == b""
+    csv_body = (await client.get(EXPORT, params={"format": "csv"})).text
+    assert csv_body == ",".join(USER_EXPORT_FIELDS) + "\r\n"
+
+
+async def test_unknown_format_is_rejected(client):
+    assert (await client.get(EXPORT, params={"format": "xml"})).status_code == 422
@@ -0,0 +1,136 @@
+"""
+Adaptive concurrency limit and load shedding: once the limit is reached,
+normal and low-priority routes get 503 while critical ones still pass.
+"""
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.config import get_settings
+from app.core.limiter import AIMDLimit, LoadSheddingMiddleware
+from main import concurrency_limit
+
+settings = get_settings()
+
+PRIORITIES = {"/health": "critical", "/export": "low"}
+
+
+def test_slow_samples_back_off_once_per_window(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.limiter.time.monotonic", lambda: now[0])
+    limit = AIMDLimit(initial=10, min_limit=2, max_limit=20, latency_target=0.5, backoff=0.5)
+
+    limit.on_sample(1.0, in_flight=10)
+    limit.on_sample(1.0, in_flight=10)
+    assert limit.limit == 5
+    now[0] += 0.5
+    limit.on_sample(1.0, in_flight=10)
+    assert limit.limit == 2
+    now[0] += 0.5
+    limit.on_sample(1.0, in_flight=10)
+    assert limit.limit == 2
+
+
+def test_fast_samples_grow_the_limit_only_while_it_is_in_use():
+    limit = AIMDLimit(initial=4, min_limit=1, max_limit=5, latency_target=0.5)
+    limit.on_sample(0.01, in_flight=1)
+    assert limit.limit == 4
+    # About one more per limit's worth of fast samples
+    for _ in range(5):
+        limit.on_sample(0.01, in_flight=4)
+    assert limit.limit == 5
+    for _ in range(10):
+        limit.on_sample(0.01, in_flight=5)
+    assert limit.limit == 5
+
+
+@pytest.fixture
+def shedding():
+    """A limited app whose /slow requests stay in flight until released."""
+    release = asyncio.Event()
+    limit = AIMDLimit(initial=4, min_limit=1, max_limit=4, latency_target=0.01, backoff=0.5)
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("slow")
+
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[
+        Route("/slow", slow), Route("/health", ok), Route("/export", ok), Route("/users", ok)
+    ])
+    app = LoadSheddingMiddleware(app, limit=limit, priorities=PRIORITIES)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    return client, limit, release
+
+
+async def hold(client, release):
+    """Start a /slow request and wait until it is in flight."""
+    release.clear()
+    task = asyncio.create_task(client.get("/slow"))
+    await asyncio.sleep(0.02)
+    return task
+
+
+async def test_limit_forced_down_sheds_normal_routes(shedding):
+    client, limit, release = shedding
+
+    # Requests slower than the latency target halve the limit down to 1
+    for _ in range(2):
+        task = await hold(client, release)
+        release.set()
+        await task
+        await asyncio.sleep(0.02)
+    assert limit.limit == 1
+
+    task = await hold(client, release)
+    response = await client.get("/users")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert (await client.get("/health")).status_code == 200
+    release.set()
+    assert (await task).status_code == 200
+
+    # Critical requests were neither counted nor sampled
+    assert limit.in_flight == 0
+    assert (await client.get("/users")).status_code == 200
+
+
+async def test_low_priority_is_shed_first(shedding):
+    client, limit, release = shedding
+    assert limit.limit == 4
+
+    tasks = [await hold(client, release) for _ in range(2)]
+    assert (await client.get("/export")).status_code == 503
+    assert (await client.get("/users")).status_code == 200
+    release.set()
+    await asyncio.gather(*tasks)
+    assert (await client.get("/export")).status_code == 200
+
+
+async def test_app_sheds_user_routes_but_not_critical_ones(client, monkeypatch):
+    critical = [
+        path for path, priority in settings.ROUTE_PRIORITIES.items() if priority == "critical"
+    ]
+    assert {"/health", "/metrics"} <= set(critical)
+
+    shed_before = REGISTRY.get_sample_value(
+        "http_requests_shed_total", {"route": "/api/v1/users/users/", "priority": "normal"}
+    ) or 0.0
+    # Saturate the app's limit as if that many requests were in flight
+    monkeypatch.setattr(concurrency_limit, "in_flight", concurrency_limit.limit)
+
+    response = await client.get("/api/v1/users/users/")
+    assert response.status_code == 503
+    assert (await client.get("/api/v1/users/users/1")).status_code == 503
+    assert (await client.get("/health")).status_code == 200
+    assert (await client.get("/metrics")).status_code == 200
+    assert REGISTRY.get_sample_value(
+        "http_requests_shed_total", {"route": "/api/v1/users/users/", "priority": "normal"}
+    ) == shed_before + 1
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.core.loader import DataLoader
+from app.repository.user import async_user_repository
+
+USERS = "/api/v1/users/users/"
+
+
+async def test_concurrent_loads_share_a_batch():
+    batches = []
+
+    async def batch_load(keys):
+        batches.append(keys)
+        return [key * 10 for key in keys]
+
+    loader = DataLoader(batch_load)
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1)) == [10, 20, 10]
+    assert await loader.load(2) == 20
+    assert batches == [[1, 2]]
+
+
+async def test_batch_load_returning_the_wrong_count_fails_every_key():
+    async def batch_load(keys):
+        return keys[:1]
+
+    loader = DataLoader(batch_load)
+    results = await asyncio.wait_for(
+        asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True), timeout=1
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def create_users(client, count):
+    ids = []
+    for i in range(count):
+        response = await client.post(USERS, json={"email": f"u{i}@example.com", "password": "secret"})
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def test_batch_reads_cached_users_from_the_cache(client, count_statements):
+    ids = await create_users(client, 3)
+    await client.get(f"{USERS}{ids[0]}")
+
+    with count_statements() as statements:
+        response = await client.get(f"{USERS}batch", params={"ids": ",".join(map(str, ids))})
+    assert [user["id"] for user in response.json()["items"]] == ids
+    assert len(statements) == 1
+
+    with count_statements() as statements:
+        await client.get(f"{USERS}batch", params={"ids": ",".join(map(str, ids))})
+    assert statements == []
+
+
+@pytest.fixture
+def uncached(monkeypatch):
+    monkeypatch.setattr(async_user_repository, "cache", None)
+
+
+async def test_me_loads_the_user_once(client, count_statements, uncached):
+    await create_users(client, 1)
+    response = await client.post(
+        "/api/v1/auth/token", data={"username": "u0@example.com", "password": "secret"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    with count_statements() as statements:
+        response = await client.get("/api/v1/auth/me", headers=headers)
+    assert response.json()["email"] == "u0@example.com"
+    assert len(statements) == 1
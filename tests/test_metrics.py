@@ -0,0 +1,30 @@
+import time
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import instrument_engine
+
+
+def sample(metric, engine_name):
+    return REGISTRY.get_sample_value(metric, {"engine": engine_name}) or 0.0
+
+
+def test_checkout_wait_leaves_out_connecting(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/metrics.db", poolclass=QueuePool)
+    instrument_engine(engine, "metrics-test")
+
+    @event.listens_for(engine, "do_connect")
+    def slow_connect(dialect, conn_rec, cargs, cparams):
+        time.sleep(0.2)
+
+    for _ in range(2):
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+
+    assert sample("db_pool_connect_seconds_count", "metrics-test") == 1
+    assert sample("db_pool_connect_seconds_sum", "metrics-test") >= 0.2
+    assert sample("db_pool_checkout_wait_seconds_count", "metrics-test") == 2
+    assert sample("db_pool_checkout_wait_seconds_sum", "metrics-test") < 0.1
+    engine.dispose()
@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.core.errors import BadRequestException
+from app.repository.pagination import decode_cursor, encode_cursor
+
+USERS = "/api/v1/users/users/"
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    at = datetime(2024, 1, 2, 3, 4, 5)
+    assert decode_cursor(encode_cursor("created_at", at, 7), "created_at", datetime) == (at, 7)
+    assert decode_cursor(encode_cursor("id", 7, 7), "id", int) == (7, 7)
+
+
+@pytest.mark.parametrize("payload, order_by, sort_type", [
+    (["id", None, "x"], "id", int),
+    (["id", 1, None], "id", int),
+    (["id", True, True], "id", int),
+    (["created_at", "2024-01-01", 1], "created_at", datetime),
+    (["created_at", {"$ne": None}, 1], "created_at", datetime),
+    (["created_at", {"dt": 5}, 1], "created_at", datetime),
+    (["email", 5, 1], "email", str),
+    ({"id": 1}, "id", int),
+    ("not a list", "id", int),
+])
+def test_malformed_cursor_is_rejected(payload, order_by, sort_type):
+    with pytest.raises(BadRequestException):
+        decode_cursor(raw_cursor(payload), order_by, sort_type)
+
+
+def test_cursor_for_another_column_is_rejected():
+    with pytest.raises(BadRequestException):
+        decode_cursor(encode_cursor("id", 1, 1), "created_at", datetime)
+
+
+async def test_bad_cursor_is_a_400(client):
+    response = await client.get(USERS, params={"cursor": raw_cursor(["id", None, "x"])})
+    assert response.status_code == 400
+    assert "cursor" in response.text
+
+
+async def test_cursor_pages_through_users(client):
+    for i in range(3):
+        await client.post(USERS, json={"email": f"page{i}@example.com", "password": "secret"})
+    first = await client.get(USERS, params={"limit": 2, "order_by": "created_at"})
+    rest = await client.get(USERS, params={
+        "limit": 2, "order_by": "created_at", "cursor": first.headers["X-Next-Cursor"],
+    })
+    emails = [user["email"] for user in first.json() + rest.json()]
+    assert emails == [f"page{i}@example.com" for i in range(3)]
+    assert "X-Next-Cursor" not in rest.headers
@@ -0,0 +1,216 @@
+"""
+Read-replica routing, with SQLite files standing in for the primary and
+its replicas. Each database holds one user whose email names it, so a
+read shows which database served it.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.singleflight import SingleFlight
+from app.db.routing import STICKY_COOKIE, ReadYourWritesMiddleware, ReplicaSet, RoutingSession
+from app.models.base import Base
+from app.models.user import User
+from app.repository.user import AsyncUserRepository
+
+
+async def seeded_engine(path, name):
+    # A queue pool, as for the real databases, so checked-out connections count
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(email=f"{name}@example.com", hashed_password="x"))
+    return engine
+
+
+async def served_by(session) -> str:
+    email = await session.scalar(select(User.email).order_by(User.id).limit(1))
+    return email.split("@")[0]
+
+
+@pytest.fixture
+async def engines(tmp_path):
+    primary = await seeded_engine(tmp_path / "primary.db", "primary")
+    replicas = [await seeded_engine(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(2)]
+    yield primary, replicas
+    for engine in [primary, *replicas]:
+        await engine.dispose()
+
+
+def session_factory(primary, replica_engines, strategy="round_robin", retry_after=30.0):
+    replicas = ReplicaSet(
+        [engine.sync_engine for engine in replica_engines],
+        strategy=strategy,
+        retry_after=retry_after,
+    )
+    factory = async_sessionmaker(
+        bind=primary,
+        expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        replicas=replicas,
+        sticky_seconds=5.0,
+    )
+    return factory, replicas
+
+
+async def read_once(factory) -> str:
+    async with factory() as session:
+        return await served_by(session)
+
+
+async def test_round_robin_spreads_reads(engines):
+    primary, replicas = engines
+    factory, _ = session_factory(primary, replicas)
+    assert [await read_once(factory) for _ in range(4)] == [
+        "replica0", "replica1", "replica0", "replica1"
+    ]
+
+
+async def test_session_keeps_its_replica(engines):
+    primary, replicas = engines
+    factory, _ = session_factory(primary, replicas)
+    async with factory() as session:
+        assert [await served_by(session) for _ in range(3)] == ["replica0"] * 3
+
+
+async def test_least_connections_picks_the_idle_replica(engines):
+    primary, replicas = engines
+    factory, _ = session_factory(primary, replicas, strategy="least_connections")
+    busy = await replicas[0].connect()
+    try:
+        assert [await read_once(factory) for _ in range(2)] == ["replica1", "replica1"]
+    finally:
+        await busy.close()
+    busy = await replicas[1].connect()
+    try:
+        assert await read_once(factory) == "replica0"
+    finally:
+        await busy.close()
+
+
+async def test_writes_go_to_the_primary_and_stick(engines):
+    primary, replicas = engines
+    factory, _ = session_factory(primary, replicas)
+    async with factory() as session:
+        await session.execute(insert(User).values(email="new@example.com", hashed_password="x"))
+        await session.commit()
+        assert await served_by(session) == "primary"
+    async with primary.connect() as conn:
+        emails = (await conn.scalars(select(User.email))).all()
+    assert "new@example.com" in emails
+
+
+async def test_unreachable_replica_falls_back_and_is_skipped(engines, tmp_path):
+    primary, replicas = engines
+    # SQLite cannot open a file in a missing directory: a DBAPI error on connect
+    missing = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+    factory, replica_set = session_factory(primary, [missing, replicas[1]])
+
+    assert await read_once(factory) == "primary"
+    assert list(replica_set.status().values()) == [0, 1]
+    assert [await read_once(factory) for _ in range(3)] == ["replica1"] * 3
+    await missing.dispose()
+
+
+@pytest.mark.parametrize(
+    "error", [ConnectionRefusedError(111, "Connection refused"), asyncio.TimeoutError()]
+)
+async def test_connect_errors_outside_the_dbapi_fall_back(engines, error):
+    primary, replicas = engines
+
+    async def refuse():
+        # As asyncpg does for a replica that is down or unreachable
+        raise error
+
+    down = create_async_engine("sqlite+aiosqlite://", async_creator=refuse)
+    factory, replica_set = session_factory(primary, [down])
+    assert await read_once(factory) == "primary"
+    assert replica_set.healthy() == []
+    await down.dispose()
+
+
+async def test_skipped_replica_is_retried(engines, tmp_path):
+    primary, replicas = engines
+    missing = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+    factory, replica_set = session_factory(primary, [missing], retry_after=0.05)
+    assert await read_once(factory) == "primary"
+    assert replica_set.healthy() == []
+    await asyncio.sleep(0.06)
+    assert replica_set.healthy() == [missing.sync_engine]
+    await missing.dispose()
+
+
+@pytest.fixture
+async def sticky_client(engines):
+    primary, replicas = engines
+    factory, _ = session_factory(primary, replicas[:1])
+
+    async def read(request):
+        async with factory() as session:
+            return PlainTextResponse(await served_by(session))
+
+    async def write(request):
+        async with factory() as session:
+            await session.execute(insert(User).values(email="w@example.com", hashed_password="x"))
+            await session.commit()
+        return PlainTextResponse("ok")
+
+    app = Starlette(
+        routes=[Route("/read", read), Route("/write", write, methods=["POST"])],
+        middleware=[Middleware(ReadYourWritesMiddleware, sticky_seconds=5.0)],
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver.local") as client:
+        yield client
+
+
+async def test_read_your_writes_cookie(sticky_client):
+    assert (await sticky_client.get("/read")).text == "replica0"
+
+    response = await sticky_client.post("/write")
+    assert STICKY_COOKIE in response.cookies
+    deadline = float(response.cookies[STICKY_COOKIE])
+    assert time.time() < deadline <= time.time() + 5.0
+
+    # The client sends the cookie back, so its next read sees its write
+    assert (await sticky_client.get("/read")).text == "primary"
+
+
+async def test_expired_or_forged_cookie(sticky_client):
+    sticky_client.cookies.set(STICKY_COOKIE, f"{time.time() - 1:.3f}")
+    assert (await sticky_client.get("/read")).text == "replica0"
+
+    sticky_client.cookies.set(STICKY_COOKIE, "not-a-number")
+    assert (await sticky_client.get("/read")).text == "replica0"
+
+
+async def test_sticky_window_is_capped(sticky_client):
+    # A far-future deadline from the client is not carried into the next cookie
+    sticky_client.cookies.set(STICKY_COOKIE, f"{time.time() + 3600:.3f}")
+    response = await sticky_client.post("/write")
+    assert float(response.cookies[STICKY_COOKIE]) <= time.time() + 5.0
+
+
+async def test_primary_reads_do_not_share_a_replica_lookup(engines):
+    primary, replicas = engines
+    factory, _ = session_factory(primary, replicas[:1])
+    repository = AsyncUserRepository(User, flight=SingleFlight(timeout=2.0))
+
+    async with factory() as reader, factory() as writer:
+        await writer.execute(insert(User).values(email="w@example.com", hashed_password="x"))
+        await writer.commit()
+        from_replica, from_primary = await asyncio.gather(
+            repository.get(reader, id=1), repository.get(writer, id=1)
+        )
+    assert from_replica.email == "replica0@example.com"
+    assert from_primary.email == "primary@example.com"
+    assert repository.flight.stats.coalesced == 0
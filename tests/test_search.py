@@ -0,0 +1,99 @@
+"""
+User search on both backends: ranking tiers, prefix-only short queries
+and user input taken literally.
+"""
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.repository.user import AsyncUserRepository, MongoUserRepository
+
+USERS = [
+    ("alice@example.com", None),
+    ("zed@example.com", "Alice Zed"),
+    ("malice@example.com", None),
+    ("al@example.com", "Al"),
+    ("inactive.alice@example.com", "Alice Inactive"),
+    ("a_b@example.com", None),
+    ("axb@example.com", None),
+    ("pct%off@example.com", None),
+    ("pctxoff@example.com", None),
+]
+
+
+@pytest.fixture(params=["sql", "mongo"])
+async def search(request):
+    if request.param == "sql":
+        repository = AsyncUserRepository(User)
+    else:
+        repository = MongoUserRepository(User, AsyncMongoMockClient()["tests"]["users"])
+    async with AsyncSessionLocal() as db:
+        for email, full_name in USERS:
+            await repository.create(db, obj_in={
+                "email": email,
+                "full_name": full_name,
+                "hashed_password": "x",
+                "is_active": not email.startswith("inactive"),
+            })
+
+        async def run(q, **kwargs):
+            return [user.email for user in await repository.search(db, q=q, **kwargs)]
+
+        yield run
+
+
+async def test_ranks_email_prefix_then_name_prefix_then_substring(search):
+    assert await search("ali") == [
+        "alice@example.com", "zed@example.com", "malice@example.com"
+    ]
+
+
+async def test_shorter_emails_first_within_a_tier(search):
+    assert (await search("al"))[:2] == ["al@example.com", "alice@example.com"]
+
+
+async def test_short_queries_match_prefixes_only(search):
+    assert await search("al") == ["al@example.com", "alice@example.com", "zed@example.com"]
+    assert await search("ce") == []
+    assert "malice@example.com" in await search("lic")
+
+
+async def test_case_insensitive(search):
+    assert await search("ALICE Z") == ["zed@example.com"]
+
+
+async def test_inactive_users_on_request(search):
+    assert "inactive.alice@example.com" not in await search("alice")
+    assert "inactive.alice@example.com" in await search("alice", active_only=False)
+
+
+async def test_limit_keeps_the_best_ranked(search):
+    assert await search("ali", limit=2) == ["alice@example.com", "zed@example.com"]
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("a_b", ["a_b@example.com"]),
+    ("_", []),
+    ("%", []),
+    ("%off", ["pct%off@example.com"]),
+    ("t%o", ["pct%off@example.com"]),
+    ("\\", []),
+])
+async def test_wildcards_match_literally(search, q, expected):
+    assert await search(q) == expected
+
+
+async def test_search_route(client):
+    for email, full_name in USERS[:4]:
+        await client.post(
+            "/api/v1/users/users/",
+            json={"email": email, "password": "secret", "full_name": full_name},
+        )
+    response = await client.get("/api/v1/users/users/search", params={"q": "ali"})
+    assert response.status_code == 200
+    assert [user["email"] for user in response.json()] == [
+        "alice@example.com", "zed@example.com", "malice@example.com"
+    ]
+    response = await client.get("/api/v1/users/users/search", params={"q": "%"})
+    assert response.json() == []
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.core.errors import ServiceUnavailableException
+from app.core.security import PasswordHasher, pwd_context
+
+
+async def test_bulk_hashing_is_charged_per_password():
+    hasher = PasswordHasher(workers=0, max_pending=4, rounds=4, bulk_max_pending=2)
+    hasher.pending = 3
+    with pytest.raises(ServiceUnavailableException):
+        await hasher.hash_many(["a", "b", "c"])
+    assert hasher.rejected == 1
+    assert hasher.pending == 3
+
+
+async def test_bulk_hashing_runs_in_rounds():
+    hasher = PasswordHasher(workers=0, max_pending=4, rounds=4, bulk_max_pending=2)
+    seen = []
+    submit = hasher._submit
+
+    async def record(func, *args):
+        seen.append(hasher.pending)
+        return await submit(func, *args)
+
+    hasher._submit = record
+    passwords = [f"password{i}" for i in range(5)]
+    hashes = await hasher.hash_many(passwords)
+    assert all(pwd_context.verify(p, h) for p, h in zip(passwords, hashes))
+    assert max(seen) <= 2
+    assert hasher.pending == 0
+
+    # Room is left for logins while a batch is hashed
+    hasher.pending = 2
+    assert len(await hasher.hash_many(passwords)) == 5
+
+
+async def test_broken_pool_is_replaced(caplog):
+    hasher = PasswordHasher(workers=1, max_pending=4, rounds=4)
+    try:
+        await hasher.warm_up()
+        broken = hasher._executor
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+        await asyncio.sleep(0.1)
+
+        hashed = await hasher.hash("secret")
+        assert await hasher.verify("secret", hashed)
+        assert hasher._executor is not broken
+        assert "pool broken" in caplog.text
+        assert hasher.pending == 0
+    finally:
+        hasher.shutdown()
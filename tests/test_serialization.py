@@ -0,0 +1,76 @@
+"""
+fast_response (FAST_JSON_RESPONSES) returns the same bodies as FastAPI's
+response_model path.
+"""
+from typing import List
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select
+
+from app.api.v1.routes import user as user_routes
+from app.api.v1.schemas.user import User as UserSchema
+from app.core.serialization import fast_response
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.repository.user import user_cache
+
+USERS = "/api/v1/users/users/"
+
+NAMES = [None, "Plain", 'Quote " and \\ backslash', "Ünïcödé ✓ 😀", "Line\nbreak\ttab"]
+
+
+@pytest.fixture
+async def rows(client):
+    for i, name in enumerate(NAMES):
+        await client.post(
+            USERS, json={"email": f"json{i}@example.com", "password": "secret", "full_name": name}
+        )
+    await client.put(f"{USERS}2", json={"is_active": False})
+    async with AsyncSessionLocal() as db:
+        return list((await db.scalars(select(User).order_by(User.id))).all())
+
+
+async def response_model_body(schema, content) -> bytes:
+    field = create_response_field(name="Response_test", type_=schema)
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def test_fast_response_matches_response_model(rows):
+    for row in rows:
+        assert fast_response(UserSchema, row).body == await response_model_body(UserSchema, row)
+    assert (
+        fast_response(UserSchema, rows, many=True).body
+        == await response_model_body(List[UserSchema], rows)
+    )
+    assert fast_response(UserSchema, [], many=True).body == b"[]"
+
+
+async def routes_bodies(client):
+    return {
+        "get": (await client.get(f"{USERS}1")).content,
+        "list": (await client.get(USERS)).content,
+        "search": (await client.get(f"{USERS}search", params={"q": "json"})).content,
+        "update": (await client.put(f"{USERS}3", json={"full_name": "Ünïcödé"})).content,
+        "delete": (await client.delete(f"{USERS}4")).content,
+    }
+
+
+async def test_routes_answer_the_same_with_either_path(client, rows, monkeypatch):
+    bodies = {}
+    for flag in (False, True):
+        # Each pass starts from the same rows
+        async with AsyncSessionLocal() as db:
+            await db.execute(User.__table__.delete())
+            await db.execute(User.__table__.insert(), [
+                {column: getattr(row, column) for column in User.__table__.columns.keys()}
+                for row in rows
+            ])
+            await db.commit()
+        user_cache.local.clear()
+        monkeypatch.setattr(user_routes.settings, "FAST_JSON_RESPONSES", flag)
+        bodies[flag] = await routes_bodies(client)
+    assert bodies[True] == bodies[False]
+    assert b"hashed_password" not in b"".join(bodies[True].values())
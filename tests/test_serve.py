@@ -0,0 +1,20 @@
+from app import serve
+
+
+def test_pool_budget_holds_back_a_spare_worker():
+    assert serve.pool_budget(4, 50) == {"DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 5}
+    assert serve.pool_budget(64, 50) == {"DB_POOL_SIZE": 1, "DB_MAX_OVERFLOW": 1}
+
+
+def test_local_caches_are_off_with_several_workers_and_no_redis(monkeypatch):
+    monkeypatch.setattr(serve.settings, "CACHE_REDIS_ENABLED", False)
+    assert serve.cache_overrides(1) == {}
+    assert serve.cache_overrides(4) == {"CACHE_ENABLED": "false", "AUTH_CACHE_ENABLED": "false"}
+
+    monkeypatch.setattr(serve.settings, "AUTH_CACHE_ENABLED", False)
+    assert serve.cache_overrides(4) == {"CACHE_ENABLED": "false"}
+
+
+def test_local_caches_stay_on_with_redis(monkeypatch):
+    monkeypatch.setattr(serve.settings, "CACHE_REDIS_ENABLED", True)
+    assert serve.cache_overrides(4) == {}
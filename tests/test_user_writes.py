@@ -0,0 +1,199 @@
+"""
+Every user mutation costs one SQL statement: INSERT, UPDATE or DELETE
+with RETURNING, with no lookup before it, in the error cases too.
+"""
+import pytest
+from sqlalchemy import select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.repository.user import async_user_repository
+from app.services import user as user_service_module
+from app.services.user import EMAIL_TAKEN
+
+USERS = "/api/v1/users/users/"
+
+
+async def create(client, email="writer@example.com"):
+    response = await client.post(USERS, json={"email": email, "password": "secret"})
+    assert response.status_code == 201
+    return response.json()
+
+
+async def test_create_is_one_statement(client, count_statements):
+    with count_statements() as statements:
+        response = await client.post(
+            USERS, json={"email": "new@example.com", "password": "secret"}
+        )
+    assert response.status_code == 201
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT")
+
+
+async def test_create_duplicate_email_is_one_statement(client, count_statements):
+    await create(client, "taken@example.com")
+    with count_statements() as statements:
+        response = await client.post(
+            USERS, json={"email": "taken@example.com", "password": "secret"}
+        )
+    assert response.status_code == 400
+    assert len(statements) == 1
+
+
+async def test_update_is_one_statement(client, count_statements):
+    user = await create(client)
+    with count_statements() as statements:
+        response = await client.put(f"{USERS}{user['id']}", json={"full_name": "Renamed"})
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Renamed"
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE")
+
+
+async def test_update_with_password_is_one_statement(client, count_statements):
+    user = await create(client)
+    with count_statements() as statements:
+        response = await client.put(f"{USERS}{user['id']}", json={"password": "changed"})
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+
+async def test_update_duplicate_email_is_one_statement(client, count_statements):
+    await create(client, "first@example.com")
+    user = await create(client, "second@example.com")
+    with count_statements() as statements:
+        response = await client.put(
+            f"{USERS}{user['id']}", json={"email": "first@example.com"}
+        )
+    assert response.status_code == 400
+    assert len(statements) == 1
+
+
+async def test_update_missing_is_one_statement(client, count_statements):
+    with count_statements() as statements:
+        response = await client.put(f"{USERS}999", json={"full_name": "Nobody"})
+    assert response.status_code == 404
+    assert len(statements) == 1
+
+
+async def test_delete_is_one_statement(client, count_statements):
+    user = await create(client)
+    with count_statements() as statements:
+        response = await client.delete(f"{USERS}{user['id']}")
+    assert response.status_code == 200
+    assert len(statements) == 1
+    assert statements[0].startswith("DELETE")
+
+
+async def test_delete_missing_is_one_statement(client, count_statements):
+    with count_statements() as statements:
+        response = await client.delete(f"{USERS}999")
+    assert response.status_code == 404
+    assert len(statements) == 1
+
+
+async def test_update_returns_the_new_row_of_an_instance_in_the_session(client):
+    user = await create(client)
+    async with AsyncSessionLocal() as db:
+        loaded = await db.get(User, user["id"])
+        await async_user_repository.update_many(
+            db, objs_in=[{"id": user["id"], "full_name": "B"}]
+        )
+        updated = await async_user_repository.update_by_id(
+            db, id=user["id"], obj_in={"full_name": "C"}
+        )
+    assert updated is loaded
+    assert updated.full_name == "C"
+
+
+async def changed_elsewhere(db, user_id):
+    """Load a user into `db`, then change the row behind the session's back."""
+    loaded = await db.get(User, user_id)
+    await db.execute(
+        update(User).where(User.id == user_id).values(full_name="Elsewhere"),
+        execution_options={"synchronize_session": False},
+    )
+    await db.commit()
+    return loaded
+
+
+async def test_delete_returns_the_deleted_row_of_an_instance_in_the_session(client):
+    user = await create(client)
+    async with AsyncSessionLocal() as db:
+        await changed_elsewhere(db, user["id"])
+        deleted = await async_user_repository.delete(db, id=user["id"])
+    assert deleted.full_name == "Elsewhere"
+
+
+async def test_bulk_delete_returns_the_deleted_rows_of_instances_in_the_session(client):
+    user = await create(client)
+    async with AsyncSessionLocal() as db:
+        await changed_elsewhere(db, user["id"])
+        result = await async_user_repository.delete_many(db, ids=[user["id"]])
+    assert [item.full_name for item in result.items] == ["Elsewhere"]
+
+
+def emails(result):
+    return [item["email"] for item in result["items"]]
+
+
+def failures(result):
+    return [(error["index"], error["detail"]) for error in result["errors"]]
+
+
+async def stored_emails():
+    async with AsyncSessionLocal() as db:
+        return sorted((await db.scalars(select(User.email))).all())
+
+
+@pytest.fixture
+def chunk_size(monkeypatch):
+    monkeypatch.setattr(user_service_module.settings, "BULK_CHUNK_SIZE", 2)
+
+
+async def test_bulk_create_keeps_the_items_that_do_not_fail(client):
+    await create(client, "taken@example.com")
+    response = await client.post(f"{USERS}bulk", json={"items": [
+        {"email": "new0@example.com", "password": "secret"},
+        {"email": "taken@example.com", "password": "secret"},
+        {"email": "new0@example.com", "password": "secret"},
+        {"email": "new3@example.com", "password": "secret"},
+    ]})
+    assert response.status_code == 200
+    result = response.json()
+    assert failures(result) == [(1, EMAIL_TAKEN), (2, EMAIL_TAKEN)]
+    assert emails(result) == ["new0@example.com", "new3@example.com"]
+    assert await stored_emails() == [
+        "new0@example.com", "new3@example.com", "taken@example.com"
+    ]
+
+
+async def test_bulk_create_reports_indexes_across_chunks(client, chunk_size):
+    # Chunks [a, b] [c, a] [d]: only the second fails, and only in part
+    response = await client.post(f"{USERS}bulk", json={"items": [
+        {"email": f"{name}@example.com", "password": "secret"}
+        for name in ["a", "b", "c", "a", "d"]
+    ]})
+    result = response.json()
+    assert failures(result) == [(3, EMAIL_TAKEN)]
+    assert emails(result) == [f"{name}@example.com" for name in "abcd"]
+    assert await stored_emails() == [f"{name}@example.com" for name in "abcd"]
+
+
+async def test_bulk_update_reports_missing_and_conflicting_items(client, chunk_size):
+    users = [await create(client, f"user{i}@example.com") for i in range(3)]
+    # Chunks [user0, missing] [user1 -> user2's email, user2]
+    response = await client.put(f"{USERS}bulk", json={"items": [
+        {"id": users[0]["id"], "full_name": "Zero"},
+        {"id": 999, "full_name": "Nobody"},
+        {"id": users[1]["id"], "email": "user2@example.com"},
+        {"id": users[2]["id"], "full_name": "Two"},
+    ]})
+    assert response.status_code == 200
+    result = response.json()
+    assert failures(result) == [(1, "Not found"), (2, EMAIL_TAKEN)]
+    assert [error["id"] for error in result["errors"]] == [999, users[1]["id"]]
+    assert [item["full_name"] for item in result["items"]] == ["Zero", "Two"]
+    assert await stored_emails() == [f"user{i}@example.com" for i in range(3)]
+    names = [(await client.get(f"{USERS}{user['id']}")).json()["full_name"] for user in users]
+    assert names == ["Zero", None, "Two"]